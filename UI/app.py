@@ -2,7 +2,7 @@ import sys
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QGridLayout, QLabel, QPushButton,
                              QFrame, QStackedWidget)
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QIcon, QFont
 import os
 
@@ -13,7 +13,9 @@ from pages.dev_packs_page import DevPacksPage
 from pages.aur_installer_page import AURInstallerPage
 from pages.logs_page import LogsPage
 from pages.settings_page import SettingsPage
-from core.package_manager import PackageManager
+from pages.operation_queue import OperationQueueDialog
+from core.package_manager import get_package_manager
+from core.settings import load_settings
 
 
 class DevManager(QMainWindow):
@@ -25,6 +27,14 @@ class DevManager(QMainWindow):
         # Store reference to navigation buttons for styling
         self.nav_buttons = []
 
+        # Pages are built on first visit; only Home is built at startup
+        self.page_factories = [HomePage, IndividualToolsPage, DevPacksPage,
+                               AURInstallerPage, LogsPage, SettingsPage]
+        self.built_pages = {}
+        self.queue_dialog = None
+        self.warm_pages = load_settings().get("preload_pages", True)
+        self._warmup_started = False
+
         # Create central widget
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -98,6 +108,13 @@ class DevManager(QMainWindow):
 
         layout.addStretch()
 
+        # Running and queued installs, removals and queries
+        queue_btn = QPushButton("⏳  Operations")
+        queue_btn.setObjectName("navButton")
+        queue_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        queue_btn.clicked.connect(self.show_operation_queue)
+        layout.addWidget(queue_btn)
+
         # User section at bottom
         user_widget = QWidget()
         user_widget.setObjectName("userSection")
@@ -132,13 +149,10 @@ class DevManager(QMainWindow):
         # Stacked widget to hold different pages
         self.stacked_widget = QStackedWidget()
 
-        # Add all pages to the stacked widget
-        self.stacked_widget.addWidget(HomePage())  # Index 0
-        self.stacked_widget.addWidget(IndividualToolsPage())  # Index 1
-        self.stacked_widget.addWidget(DevPacksPage())  # Index 2
-        self.stacked_widget.addWidget(AURInstallerPage())  # Index 3
-        self.stacked_widget.addWidget(LogsPage())  # Index 4
-        self.stacked_widget.addWidget(SettingsPage())  # Index 5
+        # Empty placeholders keep the page indexes; the real pages replace them on demand
+        for _ in self.page_factories:
+            self.stacked_widget.addWidget(QWidget())
+        self.ensure_page(0)
 
         layout.addWidget(self.stacked_widget)
 
@@ -164,7 +178,7 @@ class DevManager(QMainWindow):
         connected = QLabel("● Connected")
         connected.setObjectName("statusConnected")
 
-        pm = PackageManager()
+        pm = get_package_manager()
         distro_info = pm.distro
         distro = QLabel(distro_info.get("name", "Unknown"))
         distro.setObjectName("statusOS")
@@ -179,9 +193,39 @@ class DevManager(QMainWindow):
 
         return header
 
+    def ensure_page(self, page_index):
+        """Build a page the first time it is needed"""
+        if page_index in self.built_pages:
+            return self.built_pages[page_index]
+
+        page = self.page_factories[page_index]()
+        placeholder = self.stacked_widget.widget(page_index)
+        current_index = self.stacked_widget.currentIndex()
+        self.stacked_widget.removeWidget(placeholder)
+        placeholder.deleteLater()
+        self.stacked_widget.insertWidget(page_index, page)
+        self.stacked_widget.setCurrentIndex(current_index)
+        self.built_pages[page_index] = page
+        return page
+
+    def showEvent(self, event):
+        """Start warming the other pages once the window has been painted"""
+        super().showEvent(event)
+        if self.warm_pages and not self._warmup_started:
+            self._warmup_started = True
+            QTimer.singleShot(0, self.warm_next_page)
+
+    def warm_next_page(self):
+        """Build one pending page per event-loop pass so the window stays responsive"""
+        pending = [i for i in range(len(self.page_factories)) if i not in self.built_pages]
+        if pending:
+            self.ensure_page(pending[0])
+            QTimer.singleShot(0, self.warm_next_page)
+
     def switch_page(self, page_index, clicked_button):
         """Switch to a different page and update header title"""
         # Update the stacked widget to show the selected page
+        self.ensure_page(page_index)
         self.stacked_widget.setCurrentIndex(page_index)
 
         # Update header title based on page
@@ -196,6 +240,14 @@ class DevManager(QMainWindow):
         clicked_button.setObjectName("navButtonActive")
         clicked_button.setStyle(clicked_button.style())  # Force style refresh
 
+    def show_operation_queue(self):
+        """Open (or raise) the operation queue window"""
+        if self.queue_dialog is None:
+            self.queue_dialog = OperationQueueDialog(self)
+        self.queue_dialog.show()
+        self.queue_dialog.raise_()
+        self.queue_dialog.activateWindow()
+
     def load_stylesheets(self):
         """Load all stylesheets"""
         styles_dir = os.path.join(os.path.dirname(__file__), 'styles')
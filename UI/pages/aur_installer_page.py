@@ -1,58 +1,413 @@
 # UI/pages/aur_installer_page.py
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
                              QLabel, QPushButton, QFrame, QLineEdit, QScrollArea,
-                             QMessageBox, QGroupBox)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+                             QMessageBox, QGroupBox, QComboBox, QListView,
+                             QStyledItemDelegate, QStyle)
+from PyQt6.QtCore import (Qt, QObject, QTimer, QSize, QRect, QRectF, QEvent, pyqtSignal,
+                          QAbstractListModel, QModelIndex)
+from PyQt6.QtGui import QColor, QFont, QFontMetrics, QPainter, QPainterPath
 import sys
 import os
+import time
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
-from core.aur_manager import AURManager
+from core.aur_manager import AURManager, format_duration
+from core.cache import MemoryCache, get_disk_cache
+from core.package_manager import get_package_manager
+from core.scheduler import get_scheduler, AUR_BUILD_BACKEND, DONE, QUERY, MUTATION, PRIORITY_HIGH, PRIORITY_NORMAL
+from .operation_queue import watch
+
+
+class AURSearchController(QObject):
+    """Runs one search at a time for the page, as high-priority scheduler queries.
+
+    A new query cancels the search in flight (killing its helper process),
+    typing is debounced, and results from searches that have since been
+    superseded are dropped by comparing generations. Complete result lists
+    are kept in a small LRU cache so repeating a recent search is instant.
+    """
+    started = pyqtSignal(str)
+    batch = pyqtSignal(list)
+    finished = pyqtSignal(list)
+    streamed = pyqtSignal(int, list)    # generation, partial results; emitted from the scheduler thread
+
+    DEBOUNCE_MS = 300
+    MIN_TYPED_LENGTH = 2
+    SEARCH_BATCH_SIZE = 200
+    SEARCH_BATCH_INTERVAL = 0.1  # seconds
+
+    def __init__(self, aur_manager, parent=None):
+        super().__init__(parent)
+        self.aur = aur_manager
+        self.cache = MemoryCache(max_entries=32, ttl=300)
+        self.generation = 0
+        self.operation = None
+        self.pending_query = ""
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(self.DEBOUNCE_MS)
+        self.debounce_timer.timeout.connect(lambda: self.search(self.pending_query))
+        self.streamed.connect(self.on_batch)
+
+    def schedule(self, query):
+        """Search once typing pauses"""
+        self.pending_query = query
+        if len(query.strip()) >= self.MIN_TYPED_LENGTH:
+            self.debounce_timer.start()
+        else:
+            self.debounce_timer.stop()
 
+    def search(self, query):
+        """Search now, superseding anything in flight"""
+        self.debounce_timer.stop()
+        query = query.strip()
+        if not query:
+            return
+        self.cancel()
+        self.generation += 1
+        generation = self.generation
+        self.started.emit(query)
+
+        key = query.lower()
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.finished.emit(cached)
+            return
 
-class AURWorker(QThread):
-    """Worker thread for AUR operations"""
-    finished = pyqtSignal(bool, str)
-    search_results = pyqtSignal(list)
+        operation = get_scheduler().submit_query(
+            f"Search AUR for {query}", lambda op: self.stream_search(op, query, generation), PRIORITY_HIGH
+        )
+        watch(operation, self, lambda op: self.on_results(generation, key, op))
+        self.operation = operation
+
+    def stream_search(self, operation, query, generation):
+        """Emit results in batches as they are parsed; returns the full list (runs on the scheduler)"""
+        results = []
+        batch = []
+        last_emit = time.monotonic()
+        for package in self.aur.iter_search_aur(query, on_process=operation.attach_process):
+            operation.check_cancelled()
+            results.append(package)
+            batch.append(package)
+            now = time.monotonic()
+            if len(batch) >= self.SEARCH_BATCH_SIZE or now - last_emit >= self.SEARCH_BATCH_INTERVAL:
+                self.streamed.emit(generation, batch)
+                batch = []
+                last_emit = now
+        operation.check_cancelled()
+        if batch:
+            self.streamed.emit(generation, batch)
+        return results
+
+    def cancel(self):
+        """Kill the search in flight, if any"""
+        if self.operation is not None:
+            self.operation.cancel()
+            self.operation = None
+
+    def on_batch(self, generation, packages):
+        if generation == self.generation:
+            self.batch.emit(packages)
+
+    def on_results(self, generation, key, operation):
+        if operation.status != DONE:
+            return
+        self.cache.set(key, operation.result)
+        if generation == self.generation:
+            self.operation = None
+            self.finished.emit(operation.result)
 
-    def __init__(self, aur_manager, action, package_name=""):
-        super().__init__()
-        self.aur = aur_manager
-        self.action = action
-        self.package_name = package_name
 
-    def run(self):
-        try:
-            if self.action == "install_helper":
-                success, msg = self.aur.install_helper(self.package_name)
-                self.finished.emit(success, msg)
-            elif self.action == "remove_helper":
-                success, msg = self.aur.remove_helper(self.package_name)
-                self.finished.emit(success, msg)
-            elif self.action == "search":
-                results = self.aur.search_aur(self.package_name)
-                self.search_results.emit(results)
-            elif self.action == "install_package":
-                success, msg = self.aur.install_package(self.package_name)
-                self.finished.emit(success, msg)
-            elif self.action == "remove_package":
-                success, msg = self.aur.remove_package(self.package_name)
-                self.finished.emit(success, msg)
-        except Exception as e:
-            self.finished.emit(False, str(e))
+class AURPackagesModel(QAbstractListModel):
+    """AUR search results; install state is looked up lazily, in bulk, for painted rows"""
+    VersionRole = Qt.ItemDataRole.UserRole + 1
+    DescriptionRole = Qt.ItemDataRole.UserRole + 2
+    VotesRole = Qt.ItemDataRole.UserRole + 3
+    PopularityRole = Qt.ItemDataRole.UserRole + 4
+    InstalledRole = Qt.ItemDataRole.UserRole + 5   # True / False, None while unknown
+    BusyRole = Qt.ItemDataRole.UserRole + 6
+
+    # names whose install state should be looked up, batched per event-loop pass
+    state_requested = pyqtSignal(list)
+
+    def __init__(self):
+        super().__init__()
+        self.packages = []
+        self.relevance = []
+        self.sort_mode = "relevance"
+        self.rows_by_name = {}
+        self.installed = {}
+        self.busy = set()
+        self.requested = set()
+        self.pending = []
+        self.request_timer = QTimer(self)
+        self.request_timer.setSingleShot(True)
+        self.request_timer.setInterval(30)
+        self.request_timer.timeout.connect(self.flush_state_requests)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.packages)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        pkg = self.packages[index.row()]
+        name = pkg["name"]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return name
+        if role == self.VersionRole:
+            return pkg["version"]
+        if role == self.DescriptionRole:
+            return pkg["description"]
+        if role == self.VotesRole:
+            return pkg["votes"]
+        if role == self.PopularityRole:
+            return pkg["popularity"]
+        if role == self.InstalledRole:
+            return self.installed.get(name)
+        if role == self.BusyRole:
+            return name in self.busy
+        return None
+
+    def set_packages(self, packages):
+        self.beginResetModel()
+        self.packages = [self.normalize(pkg) for pkg in packages]
+        self.relevance = list(self.packages)
+        self.rows_by_name = {pkg["name"]: row for row, pkg in enumerate(self.packages)}
+        self.requested = {name for name in self.rows_by_name if name in self.installed}
+        self.pending = []
+        self.endResetModel()
+
+    def append_packages(self, packages):
+        """Add streamed results, keeping the current sort order"""
+        packages = [self.normalize(pkg) for pkg in packages if pkg.get("name") not in self.rows_by_name]
+        if not packages:
+            return
+        first = len(self.packages)
+        self.beginInsertRows(QModelIndex(), first, first + len(packages) - 1)
+        self.packages.extend(packages)
+        self.relevance.extend(packages)
+        for row, pkg in enumerate(packages, first):
+            self.rows_by_name[pkg["name"]] = row
+        self.endInsertRows()
+        if self.sort_mode != "relevance":
+            self.sort_by(self.sort_mode)
+
+    def sort_by(self, mode):
+        """Reorder rows in place by "votes", "popularity", "name" or the helper's own order"""
+        self.sort_mode = mode
+        sort_keys = {
+            "votes": (lambda pkg: pkg["votes"], True),
+            "popularity": (lambda pkg: pkg["popularity"], True),
+            "name": (lambda pkg: pkg["name"].lower(), False),
+        }
+        self.layoutAboutToBeChanged.emit()
+        if mode in sort_keys:
+            key, reverse = sort_keys[mode]
+            self.packages = sorted(self.relevance, key=key, reverse=reverse)
+        else:
+            self.packages = list(self.relevance)
+        self.rows_by_name = {pkg["name"]: row for row, pkg in enumerate(self.packages)}
+        self.layoutChanged.emit()
+
+    @staticmethod
+    def normalize(pkg):
+        def number(value, kind):
+            try:
+                return kind(value)
+            except (TypeError, ValueError):
+                return kind(0)
+
+        return {
+            "name": pkg.get("name", ""),
+            "version": pkg.get("version", ""),
+            "description": pkg.get("description", ""),
+            "votes": number(pkg.get("votes"), int),
+            "popularity": number(pkg.get("popularity"), float),
+        }
+
+    def request_state(self, name):
+        """Called while painting; queues the name for the next bulk lookup"""
+        if name not in self.requested:
+            self.requested.add(name)
+            self.pending.append(name)
+            self.request_timer.start()
+
+    def flush_state_requests(self):
+        if self.pending:
+            names, self.pending = self.pending, []
+            self.state_requested.emit(names)
+
+    def set_installed(self, states):
+        for name, version in states.items():
+            self.installed[name] = version is not None
+            row = self.rows_by_name.get(name)
+            if row is not None:
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [self.InstalledRole])
+
+    def set_busy(self, name, busy):
+        if busy:
+            self.busy.add(name)
+        else:
+            self.busy.discard(name)
+        row = self.rows_by_name.get(name)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [self.BusyRole])
+
+
+class AURPackageDelegate(QStyledItemDelegate):
+    """Paints an AUR result row and turns clicks on its button into a signal"""
+    button_clicked = pyqtSignal(str, bool)
+
+    ROW_HEIGHT = 120
+    SPACING = 12
+    PADDING = 20
+    BUTTON_SIZE = QSize(100, 40)
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT + self.SPACING)
+
+    def item_rect(self, option):
+        return option.rect.adjusted(0, 0, -1, -self.SPACING)
+
+    def button_rect(self, option):
+        item = self.item_rect(option)
+        return QRect(item.right() - self.PADDING - self.BUTTON_SIZE.width(),
+                     item.center().y() - self.BUTTON_SIZE.height() // 2,
+                     self.BUTTON_SIZE.width(), self.BUTTON_SIZE.height())
+
+    def paint(self, painter, option, index):
+        installed = index.data(AURPackagesModel.InstalledRole)
+        if installed is None:
+            index.model().request_state(index.data(Qt.ItemDataRole.DisplayRole))
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        item = self.item_rect(option)
+        hovered = bool(option.state & QStyle.StateFlag.State_MouseOver)
+        selected = bool(option.state & QStyle.StateFlag.State_Selected)
+
+        # Row background, same colors as #aurPackageItem
+        path = QPainterPath()
+        path.addRoundedRect(QRectF(item).adjusted(0.5, 0.5, -0.5, -0.5), 10, 10)
+        painter.fillPath(path, QColor("#1F2430" if hovered else "#1A1F2E"))
+        painter.setPen(QColor("#2563EB" if selected else "#3A3F4E" if hovered else "#2A2F3E"))
+        painter.drawPath(path)
+
+        button = self.button_rect(option)
+        left = item.left() + self.PADDING
+        text_width = button.left() - self.PADDING - left
+        font = QFont(option.font)
+
+        # Name and version badge
+        font.setPixelSize(16)
+        font.setWeight(QFont.Weight.DemiBold)
+        painter.setFont(font)
+        painter.setPen(QColor("#FFFFFF"))
+        name = index.data(Qt.ItemDataRole.DisplayRole)
+        name_width = min(QFontMetrics(font).horizontalAdvance(name), text_width)
+        name_rect = QRect(left, item.top() + self.PADDING, name_width, 24)
+        painter.drawText(name_rect, Qt.AlignmentFlag.AlignVCenter, name)
+
+        font.setPixelSize(13)
+        font.setWeight(QFont.Weight.Normal)
+        painter.setFont(font)
+        version = index.data(AURPackagesModel.VersionRole)
+        badge = QRect(name_rect.right() + 10, name_rect.top(), QFontMetrics(font).horizontalAdvance(version) + 20, 24)
+        if badge.right() < button.left() - self.PADDING:
+            badge_path = QPainterPath()
+            badge_path.addRoundedRect(QRectF(badge), 4, 4)
+            painter.fillPath(badge_path, QColor("#252A3A"))
+            painter.setPen(QColor("#6B7280"))
+            painter.drawText(badge, Qt.AlignmentFlag.AlignCenter, version)
+
+        # Description, elided to one line
+        painter.setPen(QColor("#8B92A8"))
+        description = index.data(AURPackagesModel.DescriptionRole) or "No description available"
+        desc_rect = QRect(left, name_rect.bottom() + 8, text_width, 20)
+        painter.drawText(desc_rect, Qt.AlignmentFlag.AlignVCenter,
+                         QFontMetrics(font).elidedText(description, Qt.TextElideMode.ElideRight, text_width))
+
+        # Votes and popularity
+        font.setPixelSize(12)
+        painter.setFont(font)
+        painter.setPen(QColor("#6B7280"))
+        stats = (f"👍 {index.data(AURPackagesModel.VotesRole)} votes      "
+                 f"📊 {index.data(AURPackagesModel.PopularityRole):.2f}")
+        painter.drawText(QRect(left, desc_rect.bottom() + 8, text_width, 20), Qt.AlignmentFlag.AlignVCenter, stats)
+
+        # Button, same colors as #installButton / #installedButton
+        if index.data(AURPackagesModel.BusyRole):
+            text, color = ("Removing..." if installed else "Installing..."), "#4B5563"
+        elif installed is None:
+            text, color = "…", "#2A2F3E"
+        elif installed:
+            text, color = "✓ Installed", "#10B981"
+        else:
+            text, color = "Install", "#2563EB"
+        button_path = QPainterPath()
+        button_path.addRoundedRect(QRectF(button), 6, 6)
+        painter.fillPath(button_path, QColor(color))
+        font.setPixelSize(14)
+        font.setWeight(QFont.Weight.DemiBold)
+        painter.setFont(font)
+        painter.setPen(QColor("#FFFFFF"))
+        painter.drawText(button, Qt.AlignmentFlag.AlignCenter, text)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QEvent.Type.MouseButtonRelease
+                and event.button() == Qt.MouseButton.LeftButton
+                and self.button_rect(option).contains(event.position().toPoint())):
+            installed = index.data(AURPackagesModel.InstalledRole)
+            if installed is not None and not index.data(AURPackagesModel.BusyRole):
+                self.button_clicked.emit(index.data(Qt.ItemDataRole.DisplayRole), installed)
+            return True
+        return super().editorEvent(event, model, option, index)
 
 
 class AURInstallerPage(QWidget):
     """AUR Installer page - Search and install packages from Arch User Repository"""
 
+    build_finished = pyqtSignal(str, bool)   # package name, success, as each parallel build ends
+
+    INSTALLED_CACHE_KEY = "aur.installed_packages"
+    INSTALLED_CACHE_TTL = 60
+
     def __init__(self):
         super().__init__()
         self.aur = AURManager()
+        self.cache = get_disk_cache()
         self.helper_buttons = {}
-        self.package_buttons = {}
-        self.workers = []
+        self.search_controller = None
+        self.build_finished.connect(self.on_build_result)
         self.init_ui()
 
+    def submit_operation(self, title, fn, on_done, kind=QUERY, backend=None, priority=PRIORITY_NORMAL):
+        """Run fn(operation) on the operation scheduler, then on_done(operation) on the GUI thread.
+
+        Mutations default to the system package manager's queue. Builds go on
+        AUR_BUILD_BACKEND instead and queue only their pacman steps there, so
+        compiling never holds up other installs.
+        """
+        scheduler = get_scheduler()
+        if kind == QUERY:
+            operation = scheduler.submit_query(title, fn, priority)
+        else:
+            operation = scheduler.submit_mutation(title, fn, backend or get_package_manager().manager or "pacman",
+                                                  priority)
+        watch(operation, self, on_done)
+        return operation
+
+    @staticmethod
+    def outcome(operation):
+        """(success, message) of an operation whose function returns one"""
+        if operation.status == DONE:
+            return operation.result
+        return False, operation.error or "Cancelled"
+
     def init_ui(self):
         """Initialize the AUR installer page UI"""
         # Create a scroll area for the entire page
@@ -92,21 +447,21 @@ class AURInstallerPage(QWidget):
         helper_section = self.create_helper_section()
         self.main_layout.addWidget(helper_section)
 
-        # Only show search and packages if helper is installed
-        if self.aur.active_helper:
-            # Stats row
-            stats = self.create_stats_row()
-            self.main_layout.addWidget(stats)
+        # Stats row, including the offline index status
+        stats = self.create_stats_row()
+        self.main_layout.addWidget(stats)
 
+        # Search works with either a helper or the offline index
+        if self.aur.active_helper or self.aur.index.is_available():
             # Search bar
             search_bar = self.create_search_bar()
             self.main_layout.addWidget(search_bar)
 
-            # Packages list (no longer a scroll area, just a container)
+            # Packages list
             self.packages_container = self.create_packages_list()
             self.main_layout.addWidget(self.packages_container)
         else:
-            no_helper = QLabel("Install an AUR helper above to search and install packages.")
+            no_helper = QLabel("Install an AUR helper or update the AUR index to search packages.")
             no_helper.setObjectName("pageDescription")
             no_helper.setAlignment(Qt.AlignmentFlag.AlignCenter)
             self.main_layout.addWidget(no_helper)
@@ -254,24 +609,61 @@ class AURInstallerPage(QWidget):
         return card
 
     def on_install_helper(self, helper_name, button):
-        """Handle helper installation"""
-        reply = QMessageBox.question(
-            self, "Install AUR Helper",
-            f"Do you want to install {helper_name}?\n\n"
-            "This will compile the helper from source.",
-            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        """Handle helper installation, looking for a prebuilt -bin variant first"""
+        if self.aur.substitution_policy() == "never":
+            self.confirm_install_helper(helper_name, button, None)
+            return
+
+        button.setEnabled(False)
+        aur = self.aur
+        self.submit_operation(
+            f"Look for a prebuilt {helper_name}", lambda op: aur.binary_substitutes([helper_name]),
+            lambda op: self.confirm_install_helper(helper_name, button, (op.result or {}).get(helper_name))
         )
 
-        if reply == QMessageBox.StandardButton.Yes:
+    def confirm_install_helper(self, helper_name, button, substitute):
+        """Ask before installing a helper; offers its -bin package depending on the substitution policy"""
+        button.setEnabled(True)
+        use_binary = False
+        if substitute is None:
+            reply = QMessageBox.question(
+                self, "Install AUR Helper",
+                f"Do you want to install {helper_name}?\n\n"
+                "This will compile the helper from source.",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            confirmed = reply == QMessageBox.StandardButton.Yes
+        elif self.aur.substitution_policy() == "auto":
+            reply = QMessageBox.question(
+                self, "Install AUR Helper",
+                f"Do you want to install {helper_name}?\n\n"
+                f"The prebuilt {substitute.binary} package will be used, "
+                f"saving about {format_duration(substitute.seconds_saved)} of compiling.",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            confirmed = use_binary = reply == QMessageBox.StandardButton.Yes
+        else:
+            box = QMessageBox(self)
+            box.setWindowTitle("Install AUR Helper")
+            box.setText(f"A prebuilt {substitute.binary} package is available for {helper_name}.\n\n"
+                        f"Using it saves about {format_duration(substitute.seconds_saved)} of compiling.")
+            binary_btn = box.addButton(f"Use {substitute.binary}", QMessageBox.ButtonRole.AcceptRole)
+            source_btn = box.addButton("Build from source", QMessageBox.ButtonRole.AcceptRole)
+            box.addButton(QMessageBox.StandardButton.Cancel)
+            box.exec()
+            confirmed = box.clickedButton() in (binary_btn, source_btn)
+            use_binary = box.clickedButton() is binary_btn
+
+        if confirmed:
             button.setText("Installing...")
             button.setEnabled(False)
 
-            worker = AURWorker(self.aur, "install_helper", helper_name)
-            worker.finished.connect(
-                lambda success, msg: self.on_helper_operation_finished(success, msg, helper_name, button, "install")
+            aur = self.aur
+            self.submit_operation(
+                f"Install {helper_name}", lambda op: aur.install_helper(helper_name, use_binary),
+                lambda op: self.on_helper_operation_finished(*self.outcome(op), helper_name, button, "install"),
+                kind=MUTATION, backend=AUR_BUILD_BACKEND
             )
-            self.workers.append(worker)
-            worker.start()
 
     def on_remove_helper(self, helper_name, button):
         """Handle helper removal"""
@@ -285,12 +677,12 @@ class AURInstallerPage(QWidget):
             button.setText("Removing...")
             button.setEnabled(False)
 
-            worker = AURWorker(self.aur, "remove_helper", helper_name)
-            worker.finished.connect(
-                lambda success, msg: self.on_helper_operation_finished(success, msg, helper_name, button, "remove")
+            aur = self.aur
+            self.submit_operation(
+                f"Remove {helper_name}", lambda op: aur.remove_helper(helper_name),
+                lambda op: self.on_helper_operation_finished(*self.outcome(op), helper_name, button, "remove"),
+                kind=MUTATION
             )
-            self.workers.append(worker)
-            worker.start()
 
     def on_helper_operation_finished(self, success, message, helper_name, button, action):
         """Handle helper operation completion"""
@@ -321,10 +713,14 @@ class AURInstallerPage(QWidget):
                 if widget:
                     widget.deleteLater()
 
+        if self.search_controller is not None:
+            self.search_controller.cancel()
+            self.search_controller.deleteLater()
+            self.search_controller = None
+
         # Reinitialize
         self.aur = AURManager()
         self.helper_buttons = {}
-        self.package_buttons = {}
         self.init_ui()
 
     def create_search_bar(self):
@@ -340,17 +736,42 @@ class AURInstallerPage(QWidget):
         self.search_input.setFixedHeight(45)
         self.search_input.returnPressed.connect(self.on_search)
 
+        self.search_controller = AURSearchController(self.aur, self)
+        self.search_controller.started.connect(self.on_search_started)
+        self.search_controller.batch.connect(self.on_search_batch)
+        self.search_controller.finished.connect(self.on_search_results)
+        self.search_input.textChanged.connect(self.search_controller.schedule)
+
         self.search_btn = QPushButton("Search")
         self.search_btn.setObjectName("searchButton")
         self.search_btn.setFixedWidth(100)
         self.search_btn.setCursor(Qt.CursorShape.PointingHandCursor)
         self.search_btn.clicked.connect(self.on_search)
 
+        # Sorting reorders the model's rows, no widgets are rebuilt
+        self.sort_combo = QComboBox()
+        self.sort_combo.setObjectName("settingsCombo")
+        self.sort_combo.addItems(["Relevance", "Votes", "Popularity", "Name"])
+        self.sort_combo.setFixedWidth(150)
+        self.sort_combo.currentTextChanged.connect(self.on_sort_changed)
+
+        self.install_selected_btn = QPushButton("Install Selected")
+        self.install_selected_btn.setObjectName("installButton")
+        self.install_selected_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.install_selected_btn.setEnabled(False)
+        self.install_selected_btn.clicked.connect(self.on_install_selected)
+
         search_layout.addWidget(self.search_input)
+        search_layout.addWidget(self.sort_combo)
         search_layout.addWidget(self.search_btn)
+        search_layout.addWidget(self.install_selected_btn)
 
         return search_container
 
+    def on_sort_changed(self, mode):
+        """Re-sort the result list"""
+        self.packages_model.sort_by(mode.lower())
+
     def on_search(self):
         """Handle search button click"""
         query = self.search_input.text().strip()
@@ -358,30 +779,46 @@ class AURInstallerPage(QWidget):
             QMessageBox.warning(self, "Search", "Please enter a search term.")
             return
 
+        self.search_controller.search(query)
+
+    def on_search_started(self, query):
+        """Clear the list for a new search"""
         self.search_btn.setText("Searching...")
         self.search_btn.setEnabled(False)
 
-        worker = AURWorker(self.aur, "search", query)
-        worker.search_results.connect(self.on_search_results)
-        self.workers.append(worker)
-        worker.start()
+        self.packages_model.sort_mode = self.sort_combo.currentText().lower()
+        self.packages_model.set_packages([])
+        self.on_selection_changed()
+        self.packages_placeholder.setText("Searching...")
+        self.packages_placeholder.setVisible(True)
+        self.packages_view.setVisible(False)
+
+    def on_search_batch(self, packages):
+        """Show results as they stream in"""
+        self.packages_model.append_packages(packages)
+        self.packages_placeholder.setVisible(False)
+        self.packages_view.setVisible(True)
 
     def on_search_results(self, results):
-        """Handle search results"""
+        """Handle the end of a search"""
         self.search_btn.setText("Search")
         self.search_btn.setEnabled(True)
 
-        # Update packages list
-        self.update_packages_list(results)
+        # every result already arrived through on_search_batch
+        if self.packages_model.rowCount() != len(results):
+            self.update_packages_list(results)
+        else:
+            self.packages_placeholder.setText("No packages found")
+            self.packages_placeholder.setVisible(not results)
+            self.packages_view.setVisible(bool(results))
 
     def update_packages_list(self, packages):
         """Update the packages list with search results"""
-        self.main_layout.removeWidget(self.packages_container)
-        self.packages_container.deleteLater()
-
-        self.packages_container = self.create_packages_list(packages)
-        # Insert before the stretch
-        self.main_layout.insertWidget(self.main_layout.count() - 1, self.packages_container)
+        self.packages_model.set_packages(packages)
+        self.packages_model.sort_by(self.sort_combo.currentText().lower())
+        self.packages_placeholder.setText("No packages found")
+        self.packages_placeholder.setVisible(not packages)
+        self.packages_view.setVisible(bool(packages))
 
     def create_stats_row(self):
         """Create statistics row showing AUR info"""
@@ -401,138 +838,270 @@ class AURInstallerPage(QWidget):
         helper_layout.addWidget(helper_label)
         helper_layout.addWidget(helper_value)
 
-        # Installed from AUR
-        installed_packages = self.aur.get_installed_aur_packages()
+        # Installed from AUR - cached list first, revalidated in the background when stale
+        cached = self.cache.get(self.INSTALLED_CACHE_KEY)
         installed_layout = QVBoxLayout()
         installed_label = QLabel("Installed from AUR")
         installed_label.setObjectName("aurStatLabel")
-        installed_value = QLabel(str(len(installed_packages)))
+        installed_value = QLabel(str(len(cached.value)) if cached is not None else "…")
         installed_value.setObjectName("aurStatValue")
+        self.installed_count_label = installed_value
+        if cached is None or not cached.fresh:
+            aur = self.aur
+            self.submit_operation("List installed AUR packages", lambda op: aur.get_installed_aur_packages(),
+                                  self.on_installed_packages)
         installed_layout.addWidget(installed_label)
         installed_layout.addWidget(installed_value)
 
+        # Offline AUR index
+        index_layout = QVBoxLayout()
+        index_label = QLabel("AUR Index")
+        index_label.setObjectName("aurStatLabel")
+        index_value = QLabel(self.index_status_text())
+        index_value.setObjectName("aurStatValue")
+        index_layout.addWidget(index_label)
+        index_layout.addWidget(index_value)
+
+        self.index_button = QPushButton("Update Index" if self.aur.index.is_available() else "Download Index")
+        self.index_button.setObjectName("installButton")
+        self.index_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.index_button.clicked.connect(self.on_update_index)
+
         stats_layout.addLayout(helper_layout)
         stats_layout.addLayout(installed_layout)
+        stats_layout.addLayout(index_layout)
         stats_layout.addStretch()
+        stats_layout.addWidget(self.index_button, alignment=Qt.AlignmentFlag.AlignVCenter)
 
         return stats_container
 
-    def create_packages_list(self, packages=None):
-        """Create list of AUR packages (no scroll - parent handles scrolling)"""
+    def index_status_text(self):
+        """Package count and age of the offline index"""
+        info = self.aur.index.info()
+        if not info["updated_at"]:
+            return "Not downloaded"
+        age = max(0, time.time() - info["updated_at"])
+        if age < 3600:
+            when = f"{int(age // 60)}m ago"
+        elif age < 86400:
+            when = f"{int(age // 3600)}h ago"
+        else:
+            when = f"{int(age // 86400)}d ago"
+        return f"{info['count']:,} pkgs · {when}"
+
+    def on_update_index(self):
+        """Download the AUR metadata dump and rebuild the offline index"""
+        self.index_button.setText("Updating...")
+        self.index_button.setEnabled(False)
+
+        # downloading and indexing takes a while; it gets its own queue instead of a query slot
+        aur = self.aur
+        self.submit_operation("Update AUR index", lambda op: aur.update_index(), self.on_index_updated,
+                              kind=MUTATION, backend="aur-index")
+
+    def on_index_updated(self, operation):
+        """Handle index update completion"""
+        success, message = self.outcome(operation)
+        if success:
+            # the search section depends on the index being present
+            self.refresh_page()
+        else:
+            self.index_button.setText("Update Index" if self.aur.index.is_available() else "Download Index")
+            self.index_button.setEnabled(True)
+            QMessageBox.warning(self, "Error", message)
+
+    def on_installed_packages(self, operation):
+        """Handle the revalidated list of installed AUR packages"""
+        packages = operation.result
+        if packages is None:
+            return
+        self.cache.set(self.INSTALLED_CACHE_KEY, packages, self.INSTALLED_CACHE_TTL)
+        try:
+            self.installed_count_label.setText(str(len(packages)))
+        except RuntimeError:
+            # the stats row was rebuilt while the query ran
+            pass
+
+    def create_packages_list(self):
+        """Create the virtualized list of AUR packages"""
         container = QWidget()
         layout = QVBoxLayout(container)
         layout.setContentsMargins(0, 0, 0, 0)
         layout.setSpacing(12)
 
-        if packages is None:
-            # Show placeholder
-            placeholder = QLabel("Search for packages to install from the AUR")
-            placeholder.setObjectName("pageDescription")
-            placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            layout.addWidget(placeholder)
-            return container
-
-        if not packages:
-            no_results = QLabel("No packages found")
-            no_results.setObjectName("pageDescription")
-            no_results.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            layout.addWidget(no_results)
-            return container
-
-        for pkg in packages:
-            item = self.create_package_item(
-                pkg.get("name", ""),
-                pkg.get("version", ""),
-                pkg.get("description", ""),
-                pkg.get("votes", 0),
-                pkg.get("popularity", 0)
-            )
-            layout.addWidget(item)
+        self.packages_placeholder = QLabel("Search for packages to install from the AUR")
+        self.packages_placeholder.setObjectName("pageDescription")
+        self.packages_placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.packages_placeholder)
+
+        self.packages_model = AURPackagesModel()
+        self.packages_model.state_requested.connect(self.on_state_requested)
+
+        # Only the visible rows are ever painted, however many results there are
+        self.packages_view = QListView()
+        self.packages_view.setObjectName("aurPackagesList")
+        self.packages_view.setUniformItemSizes(True)
+        # several rows can be selected and installed as one parallel build
+        self.packages_view.setSelectionMode(QListView.SelectionMode.ExtendedSelection)
+        self.packages_view.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.packages_view.setMouseTracking(True)
+        self.packages_view.setVerticalScrollMode(QListView.ScrollMode.ScrollPerPixel)
+        self.packages_view.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.packages_view.setMinimumHeight(560)
+        self.packages_delegate = AURPackageDelegate(self.packages_view)
+        self.packages_delegate.button_clicked.connect(self.on_package_button_clicked)
+        self.packages_view.setItemDelegate(self.packages_delegate)
+        self.packages_view.setModel(self.packages_model)
+        self.packages_view.selectionModel().selectionChanged.connect(self.on_selection_changed)
+        self.packages_view.setVisible(False)
+        layout.addWidget(self.packages_view)
 
         return container
 
-    def create_package_item(self, name, version, description, votes, popularity):
-        """Create an individual package list item"""
-        item = QFrame()
-        item.setObjectName("aurPackageItem")
+    def on_state_requested(self, names):
+        """Look up install state for the rows that were just painted, in one call"""
+        aur = self.aur
+        self.submit_operation("Check installed AUR packages", lambda op: aur.query_installed(names),
+                              lambda op: self.packages_model.set_installed(op.result or {}), priority=PRIORITY_HIGH)
 
-        layout = QHBoxLayout(item)
-        layout.setContentsMargins(20, 20, 20, 20)
-        layout.setSpacing(15)
+    def on_package_button_clicked(self, package_name, installed):
+        if installed:
+            self.on_remove_package(package_name)
+        else:
+            self.on_install_package(package_name)
 
-        # Left side - package info
-        info_layout = QVBoxLayout()
-        info_layout.setSpacing(5)
+    def on_install_package(self, package_name):
+        """Handle package installation"""
+        self.packages_model.set_busy(package_name, True)
 
-        # Package name and version
-        name_layout = QHBoxLayout()
-        name_label = QLabel(name)
-        name_label.setObjectName("aurPackageName")
-        version_label = QLabel(version)
-        version_label.setObjectName("aurPackageVersion")
-        name_layout.addWidget(name_label)
-        name_layout.addWidget(version_label)
-        name_layout.addStretch()
+        aur = self.aur
+        self.submit_operation(
+            f"Install {package_name} (AUR)", lambda op: aur.install_package(package_name),
+            lambda op: self.on_package_operation_finished(*self.outcome(op), package_name),
+            kind=MUTATION
+        )
 
-        # Description
-        desc_label = QLabel(description if description else "No description available")
-        desc_label.setObjectName("aurPackageDescription")
-        desc_label.setWordWrap(True)
-
-        # Stats
-        stats_layout = QHBoxLayout()
-        votes_label = QLabel(f"👍 {votes} votes")
-        votes_label.setObjectName("aurPackageStat")
-        popularity_label = QLabel(f"📊 {popularity:.2f}")
-        popularity_label.setObjectName("aurPackageStat")
-        stats_layout.addWidget(votes_label)
-        stats_layout.addSpacing(20)
-        stats_layout.addWidget(popularity_label)
-        stats_layout.addStretch()
+    def on_selection_changed(self):
+        names = self.selected_packages()
+        self.install_selected_btn.setEnabled(bool(names))
+        self.install_selected_btn.setText(f"Install Selected ({len(names)})" if names else "Install Selected")
+
+    def selected_packages(self):
+        """Selected rows that aren't installed or busy"""
+        names = []
+        for index in self.packages_view.selectionModel().selectedIndexes():
+            if index.data(AURPackagesModel.InstalledRole) is not True and not index.data(AURPackagesModel.BusyRole):
+                names.append(index.data(Qt.ItemDataRole.DisplayRole))
+        return names
+
+    def on_install_selected(self):
+        """Resolve the selected packages' dependencies and show the plan before building"""
+        names = self.selected_packages()
+        if not names:
+            return
+        for name in names:
+            self.packages_model.set_busy(name, True)
+        self.packages_view.clearSelection()
+        self.install_selected_btn.setText("Resolving...")
 
-        info_layout.addLayout(name_layout)
-        info_layout.addWidget(desc_label)
-        info_layout.addLayout(stats_layout)
+        if self.aur.substitution_policy() == "never":
+            self.start_plan(names, {})
+            return
+        aur = self.aur
+        self.submit_operation("Look for prebuilt packages", lambda op: aur.binary_substitutes(names),
+                              lambda op: self.on_substitutes_ready(op, names))
+
+    def on_substitutes_ready(self, operation, names):
+        """Swap in prebuilt -bin packages, automatically or after asking"""
+        if operation.status != DONE:
+            self.on_packages_installed(*self.outcome(operation), names)
+            return
+        substitutes = operation.result
+        if substitutes and self.aur.substitution_policy() == "ask":
+            lines = "\n".join(f"{s.package} → {s.binary} (saves about {format_duration(s.seconds_saved)})"
+                              for s in substitutes.values())
+            reply = QMessageBox.question(
+                self, "Prebuilt Packages Available",
+                f"These packages have prebuilt variants:\n\n{lines}\n\nUse them instead of compiling?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                substitutes = {}
+        self.start_plan(names, substitutes)
+
+    def start_plan(self, names, substitutes):
+        """Resolve dependencies of the packages to install (with -bin substitutions applied)"""
+        targets = [substitutes[name].binary if name in substitutes else name for name in names]
+        # only reads .SRCINFOs; installing git and base-devel, if missing, queues on its own
+        aur = self.aur
+        self.submit_operation(f"Resolve dependencies of {', '.join(targets)}", lambda op: aur.plan_install(targets),
+                              lambda op: self.on_plan_ready(op, names, substitutes))
+
+    def on_plan_ready(self, operation, names, substitutes):
+        """Confirm the build plan, then build it"""
+        self.on_selection_changed()
+        if operation.status != DONE:
+            self.on_packages_installed(*self.outcome(operation), names)
+            return
+        plan = operation.result
+        if plan.unresolved:
+            self.on_packages_installed(False, f"Could not resolve: {', '.join(plan.unresolved)}", names)
+            return
 
-        layout.addLayout(info_layout)
-        layout.addStretch()
+        summary = plan.describe()
+        if substitutes:
+            saved = sum(s.seconds_saved for s in substitutes.values())
+            summary += (f"\n\nUsing {', '.join(s.binary for s in substitutes.values())} "
+                        f"saves about {format_duration(saved)} of compiling.")
+        reply = QMessageBox.question(
+            self, "Install AUR Packages",
+            f"{summary}\n\nContinue?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            for name in names:
+                self.packages_model.set_busy(name, False)
+            return
 
-        # Right side - action buttons
-        buttons_layout = QVBoxLayout()
+        aur = self.aur
 
-        installed = self.aur.is_package_installed(name)
+        def install(operation):
+            built = []
+            # every package of every level reports once, AUR dependencies included
+            total = sum(len(level) for level in plan.levels) or 1
 
-        if installed:
-            install_btn = QPushButton("✓ Installed")
-            install_btn.setObjectName("installedButton")
-            install_btn.clicked.connect(lambda: self.on_remove_package(name, install_btn))
-        else:
-            install_btn = QPushButton("Install")
-            install_btn.setObjectName("installButton")
-            install_btn.clicked.connect(lambda: self.on_install_package(name, install_btn))
+            def on_result(result):
+                built.append(result.name)
+                operation.set_progress(min(1.0, len(built) / total), result.name)
+                self.build_finished.emit(result.name, result.success)
 
-        install_btn.setFixedWidth(100)
-        install_btn.setCursor(Qt.CursorShape.PointingHandCursor)
-        self.package_buttons[name] = install_btn
+            success, failed = aur.install_packages(plan.targets, on_result=on_result, plan=plan)
+            if success:
+                return True, f"Successfully installed {len(plan.targets)} packages"
+            return False, f"Failed to install: {', '.join(failed)}\n\nBuild logs are in {aur.build_log_dir}"
 
-        buttons_layout.addWidget(install_btn)
-        layout.addLayout(buttons_layout)
+        self.submit_operation(f"Build and install {', '.join(plan.targets)}", install,
+                              lambda op: self.on_packages_installed(*self.outcome(op), names),
+                              kind=MUTATION, backend=AUR_BUILD_BACKEND)
 
-        return item
+    def on_build_result(self, package_name, success):
+        """One package of a parallel install finished"""
+        self.packages_model.set_busy(package_name, False)
+        self.packages_model.set_installed(self.aur.query_installed([package_name]))
 
-    def on_install_package(self, package_name, button):
-        """Handle package installation"""
-        button.setText("Installing...")
-        button.setEnabled(False)
+    def on_packages_installed(self, success, message, names):
+        """Handle the end of a parallel install"""
+        self.cache.delete(self.INSTALLED_CACHE_KEY)
+        for name in names:
+            self.packages_model.set_busy(name, False)
+        self.packages_model.set_installed(self.aur.query_installed(names))
 
-        worker = AURWorker(self.aur, "install_package", package_name)
-        worker.finished.connect(
-            lambda success, msg: self.on_package_operation_finished(success, msg, package_name, button, "install")
-        )
-        self.workers.append(worker)
-        worker.start()
+        if success:
+            QMessageBox.information(self, "Success", message)
+        else:
+            QMessageBox.warning(self, "Error", message)
 
-    def on_remove_package(self, package_name, button):
+    def on_remove_package(self, package_name):
         """Handle package removal"""
         reply = QMessageBox.question(
             self, "Remove Package",
@@ -541,37 +1110,22 @@ class AURInstallerPage(QWidget):
         )
 
         if reply == QMessageBox.StandardButton.Yes:
-            button.setText("Removing...")
-            button.setEnabled(False)
+            self.packages_model.set_busy(package_name, True)
 
-            worker = AURWorker(self.aur, "remove_package", package_name)
-            worker.finished.connect(
-                lambda success, msg: self.on_package_operation_finished(success, msg, package_name, button, "remove")
+            aur = self.aur
+            self.submit_operation(
+                f"Remove {package_name} (AUR)", lambda op: aur.remove_package(package_name),
+                lambda op: self.on_package_operation_finished(*self.outcome(op), package_name),
+                kind=MUTATION
             )
-            self.workers.append(worker)
-            worker.start()
 
-    def on_package_operation_finished(self, success, message, package_name, button, action):
+    def on_package_operation_finished(self, success, message, package_name):
         """Handle package operation completion"""
-        button.setEnabled(True)
+        self.cache.delete(self.INSTALLED_CACHE_KEY)
+        self.packages_model.set_busy(package_name, False)
+        self.packages_model.set_installed(self.aur.query_installed([package_name]))
 
         if success:
-            if action == "install":
-                button.setText("✓ Installed")
-                button.setObjectName("installedButton")
-                button.clicked.disconnect()
-                button.clicked.connect(lambda: self.on_remove_package(package_name, button))
-            else:
-                button.setText("Install")
-                button.setObjectName("installButton")
-                button.clicked.disconnect()
-                button.clicked.connect(lambda: self.on_install_package(package_name, button))
-
-            button.setStyle(button.style())
             QMessageBox.information(self, "Success", message)
         else:
-            if action == "install":
-                button.setText("Install")
-            else:
-                button.setText("✓ Installed")
             QMessageBox.warning(self, "Error", message)
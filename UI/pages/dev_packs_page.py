@@ -2,72 +2,29 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
                              QLabel, QPushButton, QFrame, QScrollArea,
                              QMessageBox, QProgressBar)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt
 import sys
 import os
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
-from core.package_manager import PackageManager
-
-
-class PackInstallWorker(QThread):
-    """Worker thread for installing/removing pack packages"""
-    progress = pyqtSignal(int, str)
-    finished = pyqtSignal(bool, str)
-
-    def __init__(self, package_manager, packages, action="install"):
-        super().__init__()
-        self.pm = package_manager
-        self.packages = packages
-        self.action = action
-
-    def run(self):
-        try:
-            total = len(self.packages)
-            success_count = 0
-            failed_packages = []
-
-            for i, package in enumerate(self.packages):
-                self.progress.emit(int((i / total) * 100), package)
-
-                if self.action == "install":
-                    if not self.pm.is_installed(package):
-                        if self.pm.install(package):
-                            success_count += 1
-                        else:
-                            failed_packages.append(package)
-                    else:
-                        success_count += 1
-                elif self.action == "remove":
-                    if self.pm.is_installed(package):
-                        if self.pm.remove(package):
-                            success_count += 1
-                        else:
-                            failed_packages.append(package)
-                    else:
-                        success_count += 1
-
-            self.progress.emit(100, "Done")
-
-            if failed_packages:
-                msg = f"Completed with {len(failed_packages)} failures: {', '.join(failed_packages)}"
-                self.finished.emit(False, msg)
-            else:
-                action_word = "installed" if self.action == "install" else "removed"
-                self.finished.emit(True, f"Successfully {action_word} {success_count} packages")
-
-        except Exception as e:
-            self.finished.emit(False, str(e))
+from core.package_manager import get_package_manager
+from core.cache import get_disk_cache
+from core.scheduler import get_scheduler, submit_install, submit_remove, PRIORITY_LOW
+from .operation_queue import watch, transaction_result
 
 
 class DevPacksPage(QWidget):
     """Dev Packs page - Install curated sets of development tools"""
 
+    STATUS_CACHE_KEY = "packs.status"
+    STATUS_CACHE_TTL = 60
+
     def __init__(self):
         super().__init__()
-        self.pm = PackageManager()
+        self.pm = get_package_manager()
+        self.cache = get_disk_cache()
         self.pack_buttons = {}
-        self.workers = []
+        self.installed = {}
         self.init_ui()
 
     def get_packs_data(self):
@@ -188,6 +145,20 @@ class DevPacksPage(QWidget):
         grid.setSpacing(20)
 
         packs_data = self.get_packs_data()
+        all_packages = list(dict.fromkeys(pkg for pack in packs_data for pkg in pack["packages"]))
+
+        # render from the cached status and revalidate in the background when it is stale
+        cached = self.cache.get(self.STATUS_CACHE_KEY)
+        if cached is not None and set(cached.value) == set(all_packages):
+            self.installed = cached.value
+            if not cached.fresh:
+                operation = get_scheduler().submit_query(
+                    "Check installed pack tools", lambda op: self.pm.query_many(all_packages), PRIORITY_LOW)
+                watch(operation, self, self.on_status_revalidated)
+        else:
+            # one bulk query for every package shown on the page
+            self.installed = self.pm.query_many(all_packages)
+            self.cache.set(self.STATUS_CACHE_KEY, self.installed, self.STATUS_CACHE_TTL)
 
         row, col = 0, 0
         for pack in packs_data:
@@ -256,7 +227,7 @@ class DevPacksPage(QWidget):
         layout.addWidget(progress_bar)
 
         buttons_layout = QHBoxLayout()
-        installed_count = sum(1 for pkg in pack["packages"] if self.pm.is_installed(pkg))
+        installed_count = sum(1 for pkg in pack["packages"] if self.installed.get(pkg) is not None)
         total_count = len(pack["packages"])
 
         if installed_count == total_count:
@@ -285,6 +256,7 @@ class DevPacksPage(QWidget):
             "install": install_btn,
             "remove": remove_btn,
             "progress": progress_bar,
+            "tools_list": tools_list,
             "packages": pack["packages"]
         }
 
@@ -294,17 +266,48 @@ class DevPacksPage(QWidget):
 
         return card
 
+    def on_status_revalidated(self, operation):
+        """Apply freshly queried install state to every idle pack card"""
+        if operation.result is None:
+            return
+        self.installed.update(operation.result)
+        self.cache.set(self.STATUS_CACHE_KEY, self.installed, self.STATUS_CACHE_TTL)
+        for pack_name, pack_data in self.pack_buttons.items():
+            if pack_data["install"].isEnabled():
+                self.update_pack_status(pack_name)
+
+    def update_pack_status(self, pack_name):
+        """Refresh a pack card's package list and install button from self.installed"""
+        pack_data = self.pack_buttons[pack_name]
+        button = pack_data["install"]
+        packages = pack_data["packages"]
+        installed_count = sum(1 for pkg in packages if self.installed.get(pkg) is not None)
+        total_count = len(packages)
+
+        pack_data["tools_list"].setText(self.format_packages_list(packages))
+        if installed_count == total_count:
+            button.setText("✓ All Installed")
+            button.setObjectName("installedButton")
+        elif installed_count > 0:
+            button.setText(f"Install ({total_count - installed_count} remaining)")
+            button.setObjectName("installButton")
+        else:
+            button.setText("Install Pack")
+            button.setObjectName("installButton")
+        button.setStyle(button.style())
+
     def format_packages_list(self, packages):
         formatted = []
         for pkg in packages:
-            if self.pm.is_installed(pkg):
+            if self.installed.get(pkg) is not None:
                 formatted.append(f"✓ {pkg}")
             else:
                 formatted.append(f"○ {pkg}")
         return "  •  ".join(formatted)
 
     def on_install_pack(self, pack_name, packages, button, progress_bar):
-        to_install = [pkg for pkg in packages if not self.pm.is_installed(pkg)]
+        installed = self.pm.query_many(packages)
+        to_install = [pkg for pkg in packages if installed[pkg] is None]
         if not to_install:
             QMessageBox.information(self, "Already Installed", f"All packages in {pack_name} are already installed.")
             return
@@ -319,14 +322,14 @@ class DevPacksPage(QWidget):
             progress_bar.setVisible(True)
             progress_bar.setValue(0)
 
-            worker = PackInstallWorker(self.pm, to_install, "install")
-            worker.progress.connect(lambda val, pkg: self.on_progress(val, pkg, progress_bar))
-            worker.finished.connect(lambda success, msg: self.on_pack_finished(success, msg, pack_name, button, progress_bar))
-            self.workers.append(worker)
-            worker.start()
+            operation = submit_install(to_install, f"Install {pack_name}")
+            watch(operation, self,
+                  lambda op: self.on_pack_finished(op, to_install, "install", pack_name, button, progress_bar),
+                  lambda op: self.on_progress(op, progress_bar))
 
     def on_remove_pack(self, pack_name, packages, button, progress_bar):
-        to_remove = [pkg for pkg in packages if self.pm.is_installed(pkg)]
+        installed = self.pm.query_many(packages)
+        to_remove = [pkg for pkg in packages if installed[pkg] is not None]
         if not to_remove:
             QMessageBox.information(self, "Not Installed", f"No packages from {pack_name} are installed.")
             return
@@ -341,38 +344,35 @@ class DevPacksPage(QWidget):
             progress_bar.setVisible(True)
             progress_bar.setValue(0)
 
-            worker = PackInstallWorker(self.pm, to_remove, "remove")
-            worker.progress.connect(lambda val, pkg: self.on_progress(val, pkg, progress_bar))
-            worker.finished.connect(lambda success, msg: self.on_pack_finished(success, msg, pack_name, button, progress_bar))
-            self.workers.append(worker)
-            worker.start()
+            operation = submit_remove(to_remove, f"Remove {pack_name}")
+            watch(operation, self,
+                  lambda op: self.on_pack_finished(op, to_remove, "remove", pack_name, button, progress_bar),
+                  lambda op: self.on_progress(op, progress_bar))
 
-    def on_progress(self, value, package, progress_bar):
+    def on_progress(self, operation, progress_bar):
+        value = int((operation.progress or 0) * 100)
         progress_bar.setValue(value)
-        progress_bar.setFormat(f"{value}% - {package}")
+        progress_bar.setFormat(f"{value}% - {operation.message}")
 
-    def on_pack_finished(self, success, message, pack_name, button, progress_bar):
+    def on_pack_finished(self, operation, packages, action, pack_name, button, progress_bar):
         button.setEnabled(True)
         progress_bar.setVisible(False)
 
         pack_data = self.pack_buttons.get(pack_name)
         if pack_data:
-            packages = pack_data["packages"]
-            installed_count = sum(1 for pkg in packages if self.pm.is_installed(pkg))
-            total_count = len(packages)
-
-            if installed_count == total_count:
-                button.setText("✓ All Installed")
-                button.setObjectName("installedButton")
-            elif installed_count > 0:
-                button.setText(f"Install ({total_count - installed_count} remaining)")
-                button.setObjectName("installButton")
-            else:
-                button.setText("Install Pack")
-                button.setObjectName("installButton")
-            button.setStyle(button.style())
+            self.installed.update(self.pm.query_many(pack_data["packages"]))
+            self.cache.set(self.STATUS_CACHE_KEY, self.installed, self.STATUS_CACHE_TTL)
+            self.update_pack_status(pack_name)
 
+        if operation.cancelled:
+            return
+        # a merged operation reports on every pack in it; only this pack's packages count here
+        success, failed_packages = transaction_result(operation, packages)
         if success:
-            QMessageBox.information(self, "Success", message)
+            action_word = "installed" if action == "install" else "removed"
+            QMessageBox.information(self, "Success", f"Successfully {action_word} {len(packages)} packages")
+        elif operation.error:
+            QMessageBox.warning(self, "Warning", operation.error)
         else:
-            QMessageBox.warning(self, "Warning", message)
+            QMessageBox.warning(self, "Warning", f"Completed with {len(failed_packages)} failures: "
+                                                 f"{', '.join(failed_packages)}")
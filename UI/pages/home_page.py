@@ -1,20 +1,46 @@
 # UI/pages/home_page.py
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout,
                              QLabel, QPushButton, QFrame, QScrollArea, QLineEdit, QSizePolicy)
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QPixmap
 import subprocess
 import shutil
 import os
 import platform
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from core.package_manager import get_package_manager
+from core.cache import get_disk_cache
+from core.metadata import format_age
+from core.scheduler import get_scheduler, PRIORITY_LOW
+from .operation_queue import watch
 
 
 class HomePage(QWidget):
     """Home page - Dashboard with modern fluid layout"""
 
+    # how long each statistic may take before its card shows an error (ms)
+    STAT_TIMEOUTS = {"installed": 10000, "updates": 60000, "aur": 10000}
+
+    # how long a cached statistic counts as fresh before it is recomputed (s)
+    STAT_TTLS = {"installed": 60, "updates": 1800, "aur": 60}
+
     def __init__(self):
         super().__init__()
+        self.cache = get_disk_cache()
+        self.last_stats = {}
+        self.fresh_stats = set()
+        for key in self.STAT_TTLS:
+            entry = self.cache.get(f"home.{key}")
+            if entry is not None:
+                self.last_stats[key] = entry.value
+                if entry.fresh:
+                    self.fresh_stats.add(key)
+        self.stat_labels = {}
+        self.pending_stats = set()
         self.init_ui()
+        self.load_stats()
 
     def init_ui(self):
         """Initialize the home page UI"""
@@ -138,17 +164,81 @@ class HomePage(QWidget):
         layout.setSpacing(16)
 
         stats = [
-            ("📦", "Installed Packages", self.get_installed_packages_count(), "#3B82F6"),
-            ("🔄", "Available Updates", self.get_available_updates_count(), "#F59E0B"),
-            ("⭐", "AUR Packages", self.get_aur_packages_count(), "#8B5CF6"),
+            ("installed", "📦", "Installed Packages", "#3B82F6"),
+            ("updates", "🔄", "Available Updates", "#F59E0B"),
+            ("aur", "⭐", "AUR Packages", "#8B5CF6"),
         ]
 
-        for icon, title, value, color in stats:
-            card = self.create_stat_card(icon, title, value, color)
+        # cards render straight away with the cached value or a placeholder
+        for key, icon, title, color in stats:
+            card = self.create_stat_card(icon, title, self.last_stats.get(key, "…"), color)
+            self.stat_labels[key] = card.findChild(QLabel, "statValue")
+            if key == "updates":
+                # how old the package lists the count comes from are
+                self.metadata_label = QLabel()
+                self.metadata_label.setObjectName("statTitle")
+                card.layout().insertWidget(card.layout().count() - 1, self.metadata_label)
+                self.update_metadata_age()
             layout.addWidget(card)
 
         return container
 
+    def load_stats(self):
+        """Revalidate stale statistics in parallel, off the GUI thread"""
+        stat_functions = {
+            "installed": self.get_installed_packages_count,
+            "updates": self.get_available_updates_count,
+            "aur": self.get_aur_packages_count,
+        }
+        for key, func in stat_functions.items():
+            if key in self.pending_stats or key in self.fresh_stats:
+                continue
+            self.pending_stats.add(key)
+            operation = get_scheduler().submit_query(f"Dashboard: {key}", lambda op, f=func: f(), PRIORITY_LOW)
+            watch(operation, self, lambda op, k=key: self.on_stat_finished(k, op))
+            QTimer.singleShot(self.STAT_TIMEOUTS[key], lambda k=key: self.on_stat_timeout(k))
+
+    def on_stat_finished(self, key, operation):
+        if operation.error is not None:
+            self.on_stat_failed(key, operation.error)
+        elif not operation.cancelled:
+            self.on_stat_result(key, operation.result)
+
+    def update_metadata_age(self):
+        try:
+            age = get_package_manager().metadata_age()
+        except EnvironmentError:
+            self.metadata_label.setText("")
+            return
+        if age is None:
+            self.metadata_label.setText("Package lists never refreshed")
+        else:
+            self.metadata_label.setText(f"Package lists refreshed {format_age(age)} ago")
+
+    def on_stat_result(self, key, value):
+        if key == "updates":
+            self.update_metadata_age()
+        self.pending_stats.discard(key)
+        self.last_stats[key] = value
+        self.cache.set(f"home.{key}", value, self.STAT_TTLS[key])
+        label = self.stat_labels[key]
+        label.setText(str(value))
+        label.setToolTip("")
+
+    def on_stat_failed(self, key, message):
+        self.pending_stats.discard(key)
+        self.show_stat_error(key, f"Could not load: {message}")
+
+    def on_stat_timeout(self, key):
+        # a late result still replaces the error when it arrives
+        if key in self.pending_stats:
+            self.show_stat_error(key, "Timed out while loading")
+
+    def show_stat_error(self, key, message):
+        label = self.stat_labels[key]
+        label.setText(f"{self.last_stats[key]} ⚠" if key in self.last_stats else "—")
+        label.setToolTip(message)
+
     def create_stat_card(self, icon, title, value, color):
         """Create a single stat card"""
         card = QFrame()
@@ -304,6 +394,12 @@ class HomePage(QWidget):
         return "Unknown"
 
     def get_installed_packages_count(self):
+        try:
+            installed = get_package_manager().state.snapshot()
+            if installed is not None:
+                return len(installed)
+        except EnvironmentError:
+            pass
         try:
             if shutil.which("pacman"):
                 result = subprocess.run(["pacman", "-Q"], capture_output=True, text=True)
@@ -319,16 +415,11 @@ class HomePage(QWidget):
         return 0
 
     def get_available_updates_count(self):
+        # counted from the package lists already on disk; refreshing them is "Check Updates"
         try:
-            if shutil.which("pacman"):
-                result = subprocess.run(["pacman", "-Qu"], capture_output=True, text=True)
-                return len([l for l in result.stdout.strip().split('\n') if l]) if result.stdout.strip() else 0
-            elif shutil.which("apt"):
-                result = subprocess.run(["apt", "list", "--upgradable"], capture_output=True, text=True)
-                return len([l for l in result.stdout.split('\n') if '/' in l])
-        except:
-            pass
-        return 0
+            return len(get_package_manager().list_updates())
+        except EnvironmentError:
+            return 0
 
     def get_aur_packages_count(self):
         try:
@@ -346,4 +437,16 @@ class HomePage(QWidget):
         pass
 
     def on_check_updates(self):
-        pass
\ No newline at end of file
+        """Refresh the package lists and recount; an explicit check ignores the freshness window"""
+        try:
+            pm = get_package_manager()
+        except EnvironmentError:
+            return
+        operation = get_scheduler().submit_mutation("Refresh package lists", lambda op: pm.update(force=True),
+                                                    backend=pm.manager, merge_key=("refresh", pm.manager))
+        watch(operation, self, self.on_updates_checked)
+
+    def on_updates_checked(self, operation):
+        self.update_metadata_age()
+        self.fresh_stats.discard("updates")
+        self.load_stats()
\ No newline at end of file
@@ -1,48 +1,202 @@
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
-                             QLabel, QPushButton, QFrame, QLineEdit, QScrollArea,
-                             QMessageBox, QSizePolicy)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+                             QPushButton, QLineEdit, QListView, QMessageBox,
+                             QStyledItemDelegate, QStyle)
+from PyQt6.QtCore import (Qt, QTimer, QSize, QRect, QRectF, QEvent, pyqtSignal,
+                          QAbstractListModel, QModelIndex, QSortFilterProxyModel)
+from PyQt6.QtGui import QColor, QFont, QPainter, QPainterPath
 import sys
 import os
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
-from core.package_manager import PackageManager
-
-
-class InstallWorker(QThread):
-    """Worker thread for installing/removing packages"""
-    finished = pyqtSignal(bool, str)
+from core.package_manager import get_package_manager
+from core.scheduler import get_scheduler, submit_install, submit_remove, PRIORITY_HIGH
+from .operation_queue import watch, transaction_result
+
+
+class ToolsModel(QAbstractListModel):
+    """Tools catalog; install state lives in a role and is updated in place"""
+    DescriptionRole = Qt.ItemDataRole.UserRole + 1
+    IconRole = Qt.ItemDataRole.UserRole + 2
+    PackageRole = Qt.ItemDataRole.UserRole + 3
+    CategoryRole = Qt.ItemDataRole.UserRole + 4
+    InstalledRole = Qt.ItemDataRole.UserRole + 5   # True / False, None while unknown
+    BusyRole = Qt.ItemDataRole.UserRole + 6        # an install/remove is running
+    SearchTextRole = Qt.ItemDataRole.UserRole + 7
+
+    def __init__(self, tools):
+        super().__init__()
+        self.tools = list(tools)
+        self.search_text = [f"{name}\n{description}".lower() for name, description, *_ in self.tools]
+        self.installed = [None] * len(self.tools)
+        self.busy = [False] * len(self.tools)
+        self.rows_by_package = {}
+        for row, tool in enumerate(self.tools):
+            self.rows_by_package.setdefault(tool[3], []).append(row)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.tools)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        display_name, description, icon, package_name, category = self.tools[row]
+        return {
+            Qt.ItemDataRole.DisplayRole: display_name,
+            self.DescriptionRole: description,
+            self.IconRole: icon,
+            self.PackageRole: package_name,
+            self.CategoryRole: category,
+            self.InstalledRole: self.installed[row],
+            self.BusyRole: self.busy[row],
+            self.SearchTextRole: self.search_text[row],
+        }.get(role)
+
+    def packages(self):
+        return list(self.rows_by_package)
+
+    def set_installed(self, states):
+        """Apply package -> installed version (or None) and repaint only changed rows"""
+        for package_name, version in states.items():
+            for row in self.rows_by_package.get(package_name, []):
+                installed = version is not None
+                if self.installed[row] != installed:
+                    self.installed[row] = installed
+                    index = self.index(row)
+                    self.dataChanged.emit(index, index, [self.InstalledRole])
+
+    def set_busy(self, package_name, busy):
+        for row in self.rows_by_package.get(package_name, []):
+            self.busy[row] = busy
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [self.BusyRole])
+
+
+class ToolsFilterProxy(QSortFilterProxyModel):
+    """Filters the catalog by category and search text"""
 
-    def __init__(self, package_manager, package_name, action="install"):
+    def __init__(self):
         super().__init__()
-        self.pm = package_manager
-        self.package_name = package_name
-        self.action = action
-
-    def run(self):
-        try:
-            if self.action == "install":
-                success = self.pm.install(self.package_name)
-                msg = f"Installed {self.package_name}" if success else f"Failed to install {self.package_name}"
-            elif self.action == "remove":
-                success = self.pm.remove(self.package_name)
-                msg = f"Removed {self.package_name}" if success else f"Failed to remove {self.package_name}"
-            else:
-                success = False
-                msg = "Unknown action"
-            self.finished.emit(success, msg)
-        except Exception as e:
-            self.finished.emit(False, str(e))
+        self.category = "All"
+        self.search_text = ""
+
+    def set_filter(self, category, search_text):
+        self.category = category
+        self.search_text = search_text
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        # Read the model's lists directly; going through data() per row is the slow part
+        model = self.sourceModel()
+        if self.category != "All" and model.tools[source_row][4] != self.category:
+            return False
+        return not self.search_text or self.search_text in model.search_text[source_row]
+
+
+class ToolCardDelegate(QStyledItemDelegate):
+    """Paints a tool card and turns clicks on its button into a signal"""
+    button_clicked = pyqtSignal(str, bool)
+
+    MIN_CARD_WIDTH = 250
+    CARD_HEIGHT = 180
+    COLUMNS = 3
+    MARGIN = 10
+    PADDING = 20
+    BUTTON_HEIGHT = 40
+
+    def sizeHint(self, option, index):
+        # Cards share the view's width, up to three per row like the old grid
+        view = self.parent()
+        available = view.viewport().width() - 8 if view is not None else 0
+        cell = self.MIN_CARD_WIDTH + 2 * self.MARGIN
+        columns = max(1, min(self.COLUMNS, available // cell))
+        return QSize(max(cell, available // columns), self.CARD_HEIGHT + 2 * self.MARGIN)
+
+    def card_rect(self, option):
+        return option.rect.adjusted(self.MARGIN, self.MARGIN, -self.MARGIN, -self.MARGIN)
+
+    def button_rect(self, option):
+        card = self.card_rect(option)
+        return QRect(card.left() + self.PADDING, card.bottom() - self.PADDING - self.BUTTON_HEIGHT,
+                     card.width() - 2 * self.PADDING, self.BUTTON_HEIGHT)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        card = self.card_rect(option)
+        hovered = bool(option.state & QStyle.StateFlag.State_MouseOver)
+
+        # Card background, same colors as #toolCard
+        path = QPainterPath()
+        path.addRoundedRect(QRectF(card).adjusted(0.5, 0.5, -0.5, -0.5), 10, 10)
+        painter.fillPath(path, QColor("#1F2430" if hovered else "#1A1F2E"))
+        painter.setPen(QColor("#3A3F4E" if hovered else "#2A2F3E"))
+        painter.drawPath(path)
+
+        # Icon and name
+        font = QFont(option.font)
+        font.setPixelSize(32)
+        painter.setFont(font)
+        painter.setPen(QColor("#FFFFFF"))
+        icon_rect = QRect(card.left() + self.PADDING, card.top() + self.PADDING, 44, 40)
+        painter.drawText(icon_rect, Qt.AlignmentFlag.AlignVCenter, index.data(ToolsModel.IconRole))
+
+        font.setPixelSize(16)
+        font.setWeight(QFont.Weight.DemiBold)
+        painter.setFont(font)
+        name_rect = QRect(icon_rect.right() + 8, icon_rect.top(), card.right() - icon_rect.right() - 8 - self.PADDING, 40)
+        painter.drawText(name_rect, Qt.AlignmentFlag.AlignVCenter, index.data(Qt.ItemDataRole.DisplayRole))
+
+        # Description
+        font.setPixelSize(13)
+        font.setWeight(QFont.Weight.Normal)
+        painter.setFont(font)
+        painter.setPen(QColor("#8B92A8"))
+        button = self.button_rect(option)
+        desc_rect = QRect(card.left() + self.PADDING, icon_rect.bottom() + 8,
+                          card.width() - 2 * self.PADDING, button.top() - icon_rect.bottom() - 16)
+        painter.drawText(desc_rect, Qt.TextFlag.TextWordWrap, index.data(ToolsModel.DescriptionRole))
+
+        # Button, same colors as #installButton / #installedButton
+        installed = index.data(ToolsModel.InstalledRole)
+        busy = index.data(ToolsModel.BusyRole)
+        if busy:
+            text, color = ("Removing..." if installed else "Installing..."), "#4B5563"
+        elif installed is None:
+            text, color = "…", "#2A2F3E"
+        elif installed:
+            text, color = "✓ Installed", "#059669" if hovered else "#10B981"
+        else:
+            text, color = "Install", "#1D4ED8" if hovered else "#2563EB"
+        button_path = QPainterPath()
+        button_path.addRoundedRect(QRectF(button), 6, 6)
+        painter.fillPath(button_path, QColor(color))
+        font.setPixelSize(14)
+        font.setWeight(QFont.Weight.DemiBold)
+        painter.setFont(font)
+        painter.setPen(QColor("#FFFFFF"))
+        painter.drawText(button, Qt.AlignmentFlag.AlignCenter, text)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QEvent.Type.MouseButtonRelease
+                and event.button() == Qt.MouseButton.LeftButton
+                and self.button_rect(option).contains(event.position().toPoint())):
+            installed = index.data(ToolsModel.InstalledRole)
+            if installed is not None and not index.data(ToolsModel.BusyRole):
+                self.button_clicked.emit(index.data(ToolsModel.PackageRole), installed)
+            return True
+        return super().editorEvent(event, model, option, index)
 
 
 class IndividualToolsPage(QWidget):
     """Individual Tools page - Browse and install development tools one by one"""
 
+    SEARCH_DEBOUNCE_MS = 150
+
     def __init__(self):
         super().__init__()
-        self.pm = PackageManager()
-        self.tool_buttons = {}
-        self.workers = []
+        self.pm = get_package_manager()
         self.current_filter = "All"
         self.search_text = ""
         self.init_ui()
@@ -72,18 +226,7 @@ class IndividualToolsPage(QWidget):
 
     def init_ui(self):
         """Initialize the individual tools page UI"""
-        page_layout = QVBoxLayout(self)
-        page_layout.setContentsMargins(0, 0, 0, 0)
-        page_layout.setSpacing(0)
-
-        # Main scroll area wrapping everything
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        scroll.setObjectName("scrollArea")
-        scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-
-        scroll_content = QWidget()
-        self.main_layout = QVBoxLayout(scroll_content)
+        self.main_layout = QVBoxLayout(self)
         self.main_layout.setContentsMargins(40, 40, 40, 40)
         self.main_layout.setSpacing(25)
 
@@ -102,16 +245,10 @@ class IndividualToolsPage(QWidget):
         # Category filters
         self.main_layout.addWidget(self.create_filters())
 
-        # Tools grid container
-        self.tools_container = QWidget()
-        self.tools_layout = QVBoxLayout(self.tools_container)
-        self.tools_layout.setContentsMargins(0, 0, 0, 0)
-        self.build_tools_grid()
-        self.main_layout.addWidget(self.tools_container)
+        # Tools grid - a virtualized list view, only visible cards are painted
+        self.main_layout.addWidget(self.create_tools_view(), 1)
 
-        self.main_layout.addStretch()
-        scroll.setWidget(scroll_content)
-        page_layout.addWidget(scroll)
+        self.load_install_state()
 
     def create_search_bar(self):
         search_container = QWidget()
@@ -127,9 +264,57 @@ class IndividualToolsPage(QWidget):
         search_layout.addWidget(self.search_input)
         return search_container
 
+    def create_tools_view(self):
+        """Create the catalog model, filter proxy and card view"""
+        self.tools_model = ToolsModel(self.get_tools_data())
+        self.tools_proxy = ToolsFilterProxy()
+        self.tools_proxy.setSourceModel(self.tools_model)
+
+        self.tools_view = QListView()
+        self.tools_view.setObjectName("toolsList")
+        self.tools_view.setViewMode(QListView.ViewMode.IconMode)
+        self.tools_view.setResizeMode(QListView.ResizeMode.Adjust)
+        self.tools_view.setMovement(QListView.Movement.Static)
+        self.tools_view.setUniformItemSizes(True)
+        self.tools_view.setSelectionMode(QListView.SelectionMode.NoSelection)
+        self.tools_view.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.tools_view.setMouseTracking(True)
+        self.tools_view.setVerticalScrollMode(QListView.ScrollMode.ScrollPerPixel)
+        self.tools_view.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+
+        self.tools_delegate = ToolCardDelegate(self.tools_view)
+        self.tools_delegate.button_clicked.connect(self.on_card_button_clicked)
+        self.tools_view.setItemDelegate(self.tools_delegate)
+        self.tools_view.setModel(self.tools_proxy)
+        self.tools_view.viewport().installEventFilter(self)
+
+        # Typing restarts this timer; the filter only runs once typing pauses
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.apply_filter)
+
+        return self.tools_view
+
+    def eventFilter(self, obj, event):
+        # Card widths depend on the view width, so lay the cards out again on resize
+        if obj is self.tools_view.viewport() and event.type() == QEvent.Type.Resize:
+            self.tools_view.scheduleDelayedItemsLayout()
+        return super().eventFilter(obj, event)
+
+    def load_install_state(self):
+        """Query install state for the whole catalog in the background"""
+        packages = self.tools_model.packages()
+        operation = get_scheduler().submit_query("Check installed tools",
+                                                 lambda op: self.pm.query_many(packages), PRIORITY_HIGH)
+        watch(operation, self, lambda op: self.tools_model.set_installed(op.result or {}))
+
     def on_search_changed(self, text):
         self.search_text = text.lower()
-        self.refresh_tools_grid()
+        self.search_timer.start()
+
+    def apply_filter(self):
+        self.tools_proxy.set_filter(self.current_filter, self.search_text)
 
     def create_filters(self):
         filter_container = QWidget()
@@ -156,125 +341,37 @@ class IndividualToolsPage(QWidget):
         for cat, btn in self.filter_buttons.items():
             btn.setObjectName("filterButtonActive" if cat == category else "filterButton")
             btn.setStyle(btn.style())
-        self.refresh_tools_grid()
-
-    def refresh_tools_grid(self):
-        # Clear existing grid
-        while self.tools_layout.count():
-            item = self.tools_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-        self.build_tools_grid()
-
-    def build_tools_grid(self):
-        """Build the tools grid widget"""
-        grid_widget = QWidget()
-        grid = QGridLayout(grid_widget)
-        grid.setSpacing(20)
-
-        tools_data = self.get_tools_data()
-        filtered_tools = []
-
-        for tool in tools_data:
-            display_name, description, icon, package_name, category = tool
-            if self.current_filter != "All" and category != self.current_filter:
-                continue
-            if self.search_text and self.search_text not in display_name.lower() and self.search_text not in description.lower():
-                continue
-            filtered_tools.append(tool)
-
-        row, col = 0, 0
-        for display_name, description, icon, package_name, category in filtered_tools:
-            installed = self.pm.is_installed(package_name)
-            tool_card = self.create_tool_card(display_name, description, icon, package_name, installed)
-            grid.addWidget(tool_card, row, col)
-            col += 1
-            if col > 2:
-                col = 0
-                row += 1
-
-        self.tools_layout.addWidget(grid_widget)
-
-    def create_tool_card(self, name, description, icon, package_name, installed):
-        card = QFrame()
-        card.setObjectName("toolCard")
-        card.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
-
-        layout = QVBoxLayout(card)
-        layout.setContentsMargins(20, 20, 20, 20)
-        layout.setSpacing(12)
-
-        header = QHBoxLayout()
-        icon_label = QLabel(icon)
-        icon_label.setStyleSheet("font-size: 32px;")
-        name_label = QLabel(name)
-        name_label.setObjectName("toolName")
-        header.addWidget(icon_label)
-        header.addWidget(name_label)
-        header.addStretch()
-        layout.addLayout(header)
-
-        desc_label = QLabel(description)
-        desc_label.setObjectName("toolDescription")
-        desc_label.setWordWrap(True)
-        layout.addWidget(desc_label)
+        self.search_timer.stop()
+        self.apply_filter()
 
+    def on_card_button_clicked(self, package_name, installed):
         if installed:
-            btn = QPushButton("✓ Installed")
-            btn.setObjectName("installedButton")
-            btn.clicked.connect(lambda: self.on_remove_clicked(package_name, btn))
+            self.on_remove_clicked(package_name)
         else:
-            btn = QPushButton("Install")
-            btn.setObjectName("installButton")
-            btn.clicked.connect(lambda: self.on_install_clicked(package_name, btn))
-
-        btn.setCursor(Qt.CursorShape.PointingHandCursor)
-        self.tool_buttons[package_name] = btn
-        layout.addWidget(btn)
-
-        return card
+            self.on_install_clicked(package_name)
 
-    def on_install_clicked(self, package_name, button):
-        button.setText("Installing...")
-        button.setEnabled(False)
-        worker = InstallWorker(self.pm, package_name, "install")
-        worker.finished.connect(lambda success, msg: self.on_install_finished(success, msg, package_name, button))
-        self.workers.append(worker)
-        worker.start()
+    def on_install_clicked(self, package_name):
+        self.tools_model.set_busy(package_name, True)
+        operation = submit_install([package_name])
+        watch(operation, self, lambda op: self.on_operation_finished(op, package_name, "install"))
 
-    def on_remove_clicked(self, package_name, button):
+    def on_remove_clicked(self, package_name):
         reply = QMessageBox.question(self, "Confirm Removal", f"Are you sure you want to remove {package_name}?",
                                      QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
-            button.setText("Removing...")
-            button.setEnabled(False)
-            worker = InstallWorker(self.pm, package_name, "remove")
-            worker.finished.connect(lambda success, msg: self.on_remove_finished(success, msg, package_name, button))
-            self.workers.append(worker)
-            worker.start()
-
-    def on_install_finished(self, success, message, package_name, button):
-        button.setEnabled(True)
-        if success:
-            button.setText("✓ Installed")
-            button.setObjectName("installedButton")
-            button.setStyle(button.style())
-            button.clicked.disconnect()
-            button.clicked.connect(lambda: self.on_remove_clicked(package_name, button))
-            QMessageBox.information(self, "Success", message)
-        else:
-            button.setText("Install")
-            QMessageBox.warning(self, "Error", message)
-
-    def on_remove_finished(self, success, message, package_name, button):
-        button.setEnabled(True)
+            self.tools_model.set_busy(package_name, True)
+            operation = submit_remove([package_name])
+            watch(operation, self, lambda op: self.on_operation_finished(op, package_name, "remove"))
+
+    def on_operation_finished(self, operation, package_name, action):
+        # the operation may have been merged with other queued ones; only this package matters here
+        success, _ = transaction_result(operation, [package_name])
+        self.tools_model.set_busy(package_name, False)
+        self.tools_model.set_installed(self.pm.query_many([package_name]))
+        if operation.cancelled:
+            return
         if success:
-            button.setText("Install")
-            button.setObjectName("installButton")
-            button.setStyle(button.style())
-            button.clicked.disconnect()
-            button.clicked.connect(lambda: self.on_install_clicked(package_name, button))
-            QMessageBox.information(self, "Success", message)
+            verb = "Installed" if action == "install" else "Removed"
+            QMessageBox.information(self, "Success", f"{verb} {package_name}")
         else:
-            button.setText("✓ Installed")
-            QMessageBox.warning(self, "Error", message)
+            QMessageBox.warning(self, "Error", operation.error or f"Failed to {action} {package_name}")
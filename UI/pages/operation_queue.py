@@ -0,0 +1,187 @@
+# UI/pages/operation_queue.py
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                             QFrame, QScrollArea, QProgressBar, QDialog)
+from PyQt6.QtCore import Qt, QObject, QTimer, pyqtSignal
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from core.scheduler import (get_scheduler, QUEUED, RUNNING, DONE, FAILED, CANCELLED)
+
+
+class OperationWatcher(QObject):
+    """Delivers a scheduler operation's progress and completion on the GUI thread.
+
+    The scheduler calls back from its worker threads; re-emitting through
+    Qt signals queues the calls onto the thread the watcher lives in.
+    """
+    progressed = pyqtSignal(object)
+    finished = pyqtSignal(object)
+
+    def __init__(self, operation, parent=None):
+        super().__init__(parent)
+        self.operation = operation
+        self.finished.connect(self.deleteLater)
+
+    def attach(self):
+        self.operation.add_progress_callback(self.progressed.emit)
+        self.operation.add_done_callback(self.finished.emit)
+
+
+def watch(operation, parent, on_done=None, on_progress=None):
+    """Call on_done(operation) / on_progress(operation) on the GUI thread.
+
+    The watcher is parented to `parent`, so it lives as long as the widget
+    waiting for the result, and deletes itself once the operation ends.
+    """
+    watcher = OperationWatcher(operation, parent)
+    if on_progress:
+        watcher.progressed.connect(on_progress)
+    if on_done:
+        watcher.finished.connect(on_done)
+    watcher.attach()
+    return watcher
+
+
+def transaction_result(operation, packages):
+    """(success, failed) for `packages` out of a possibly merged install/remove operation"""
+    if operation.status != DONE or operation.result is None:
+        return False, list(packages)
+    _, failed = operation.result
+    failed = [name for name in packages if name in failed]
+    return not failed, failed
+
+
+class OperationQueueView(QWidget):
+    """Running, queued and recently finished operations, with progress and cancel"""
+    changed = pyqtSignal()
+
+    STATUS_TEXT = {
+        QUEUED: ("Queued", "#8B92A8"),
+        RUNNING: ("Running", "#2563EB"),
+        DONE: ("Done", "#10B981"),
+        FAILED: ("Failed", "#EF4444"),
+        CANCELLED: ("Cancelled", "#F59E0B"),
+    }
+    REFRESH_MS = 150
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.scheduler = get_scheduler()
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        scroll = QScrollArea()
+        scroll.setObjectName("scrollArea")
+        scroll.setWidgetResizable(True)
+        scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        content = QWidget()
+        self.rows_layout = QVBoxLayout(content)
+        self.rows_layout.setContentsMargins(0, 0, 0, 0)
+        self.rows_layout.setSpacing(8)
+        self.rows_layout.addStretch()
+        scroll.setWidget(content)
+        layout.addWidget(scroll)
+
+        # the scheduler notifies from any thread and often; repaint at most every REFRESH_MS
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(self.REFRESH_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.changed.connect(self.refresh_timer.start)
+        listener = self.changed.emit
+        self.scheduler.subscribe(listener)
+        self.destroyed.connect(lambda: self.scheduler.unsubscribe(listener))
+
+        self.refresh()
+
+    def refresh(self):
+        while self.rows_layout.count() > 1:
+            item = self.rows_layout.takeAt(0)
+            item.widget().deleteLater()
+
+        operations = self.scheduler.snapshot()
+        if not operations:
+            empty = QLabel("No operations yet")
+            empty.setObjectName("toolDescription")
+            self.rows_layout.insertWidget(0, empty)
+            return
+        for position, operation in enumerate(operations):
+            self.rows_layout.insertWidget(position, self.create_row(operation))
+
+    def create_row(self, operation):
+        row = QFrame()
+        row.setObjectName("operationRow")
+        layout = QHBoxLayout(row)
+        layout.setContentsMargins(15, 10, 15, 10)
+        layout.setSpacing(12)
+
+        text_layout = QVBoxLayout()
+        title = QLabel(" + ".join([operation.title] + operation.merged))
+        title.setObjectName("packToolsLabel")
+        title.setWordWrap(True)
+        text_layout.addWidget(title)
+
+        status, color = self.STATUS_TEXT[operation.status]
+        details = [status]
+        if operation.status == RUNNING and operation.started_at:
+            details.append(f"{time.time() - operation.started_at:.0f}s")
+        elif operation.finished and operation.started_at:
+            details.append(f"took {operation.finished_at - operation.started_at:.1f}s")
+        if operation.message:
+            details.append(operation.message)
+        if operation.error:
+            details.append(operation.error)
+        detail = QLabel(" · ".join(details))
+        detail.setObjectName("aurStatLabel")
+        detail.setStyleSheet(f"color: {color};")
+        detail.setWordWrap(True)
+        text_layout.addWidget(detail)
+        layout.addLayout(text_layout, 1)
+
+        if operation.status == RUNNING:
+            progress = QProgressBar()
+            progress.setFixedWidth(140)
+            if operation.progress is None:
+                progress.setRange(0, 0)   # busy indicator
+            else:
+                progress.setValue(int(operation.progress * 100))
+            layout.addWidget(progress)
+
+        if not operation.finished:
+            cancel = QPushButton("Cancel")
+            cancel.setObjectName("cancelButton")
+            cancel.setCursor(Qt.CursorShape.PointingHandCursor)
+            cancel.clicked.connect(lambda checked, op=operation: self.scheduler.cancel(op))
+            layout.addWidget(cancel)
+
+        return row
+
+
+class OperationQueueDialog(QDialog):
+    """Window showing the operation queue"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setObjectName("operationQueue")
+        self.setWindowTitle("Operations")
+        self.resize(560, 480)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(15)
+
+        title = QLabel("Operations")
+        title.setObjectName("packName")
+        layout.addWidget(title)
+
+        desc = QLabel("Installs and removals run one at a time per package manager; "
+                      "queued installs are merged into one transaction and start "
+                      "downloading while they wait.")
+        desc.setObjectName("toolDescription")
+        desc.setWordWrap(True)
+        layout.addWidget(desc)
+
+        layout.addWidget(OperationQueueView(self), 1)
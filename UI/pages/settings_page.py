@@ -3,54 +3,31 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QPushButton, QFrame, QCheckBox, QComboBox,
                              QLineEdit, QScrollArea, QMessageBox, QFileDialog)
 from PyQt6.QtCore import Qt
-import json
+import sys
 import os
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from core.aur_build import read_build_times
+from core.downloads import read_download_times
+from core.settings import SETTINGS_FILE, load_settings, save_settings
+
 
 class SettingsPage(QWidget):
     """Settings page - Configure application preferences"""
 
     def __init__(self):
         super().__init__()
-        self.settings_file = os.path.expanduser("~/.config/dev_manager/settings.json")
+        self.settings_file = SETTINGS_FILE
         self.settings = self.load_settings()
         self.init_ui()
 
     def load_settings(self):
         """Load settings from file"""
-        default_settings = {
-            "theme": "Dark",
-            "auto_update_check": True,
-            "confirm_installations": True,
-            "confirm_removals": True,
-            "keep_logs_days": 30,
-            "default_helper": "yay",
-            "parallel_downloads": 5,
-            "show_aur_warnings": True,
-            "log_level": "Info",
-            "custom_install_path": "",
-            "auto_clean_cache": False,
-        }
-
-        try:
-            if os.path.exists(self.settings_file):
-                with open(self.settings_file, 'r') as f:
-                    loaded = json.load(f)
-                    default_settings.update(loaded)
-        except Exception:
-            pass
-
-        return default_settings
+        return load_settings(self.settings_file)
 
     def save_settings(self):
         """Save settings to file"""
-        try:
-            os.makedirs(os.path.dirname(self.settings_file), exist_ok=True)
-            with open(self.settings_file, 'w') as f:
-                json.dump(self.settings, f, indent=2)
-            return True
-        except Exception:
-            return False
+        return save_settings(self.settings, self.settings_file)
 
     def init_ui(self):
         """Initialize the settings page UI"""
@@ -132,6 +109,12 @@ class SettingsPage(QWidget):
         self.auto_update_check.setChecked(self.settings.get("auto_update_check", True))
         layout.addWidget(self.auto_update_check)
 
+        # Background page loading
+        self.preload_pages = QCheckBox("Load the other pages in the background after startup")
+        self.preload_pages.setObjectName("settingsCheckbox")
+        self.preload_pages.setChecked(self.settings.get("preload_pages", True))
+        layout.addWidget(self.preload_pages)
+
         return section
 
     def create_package_section(self):
@@ -165,6 +148,12 @@ class SettingsPage(QWidget):
         self.auto_clean.setChecked(self.settings.get("auto_clean_cache", False))
         layout.addWidget(self.auto_clean)
 
+        # Persistent privileged helper
+        self.persistent_privileges = QCheckBox("Keep administrator access for the session (ask for the password once)")
+        self.persistent_privileges.setObjectName("settingsCheckbox")
+        self.persistent_privileges.setChecked(self.settings.get("persistent_privileges", False))
+        layout.addWidget(self.persistent_privileges)
+
         # Parallel downloads
         parallel_row = QHBoxLayout()
         parallel_label = QLabel("Parallel downloads")
@@ -179,6 +168,46 @@ class SettingsPage(QWidget):
         parallel_row.addWidget(self.parallel_combo)
         layout.addLayout(parallel_row)
 
+        # Average download phase per parallel setting, from the recorded installs
+        times = {}
+        for entry in read_download_times():
+            times.setdefault(entry["parallel"], []).append(entry["seconds"] / max(1, entry["packages"]))
+        if times:
+            averages = "  ·  ".join(f"{parallel} parallel: {sum(values) / len(values):.1f}s per package over {len(values)}"
+                                    for parallel, values in sorted(times.items()))
+            times_label = QLabel(f"Average download time — {averages}")
+            times_label.setObjectName("aurStatLabel")
+            times_label.setWordWrap(True)
+            layout.addWidget(times_label)
+
+        # How long to wait for another program (e.g. unattended upgrades) to release the package database
+        lock_row = QHBoxLayout()
+        lock_label = QLabel("Wait for a busy package manager (seconds)")
+        lock_label.setObjectName("settingsLabel")
+        self.lock_combo = QComboBox()
+        self.lock_combo.setObjectName("settingsCombo")
+        self.lock_combo.addItems(["30", "120", "300", "900", "1800"])
+        self.lock_combo.setCurrentText(str(self.settings.get("lock_wait_timeout", 300)))
+        self.lock_combo.setFixedWidth(200)
+        lock_row.addWidget(lock_label)
+        lock_row.addStretch()
+        lock_row.addWidget(self.lock_combo)
+        layout.addLayout(lock_row)
+
+        # Package lists refreshed more recently than this aren't downloaded again
+        metadata_row = QHBoxLayout()
+        metadata_label = QLabel("Refresh package lists older than (minutes)")
+        metadata_label.setObjectName("settingsLabel")
+        self.metadata_combo = QComboBox()
+        self.metadata_combo.setObjectName("settingsCombo")
+        self.metadata_combo.addItems(["0", "15", "60", "180", "720", "1440"])
+        self.metadata_combo.setCurrentText(str(self.settings.get("metadata_max_age_minutes", 60)))
+        self.metadata_combo.setFixedWidth(200)
+        metadata_row.addWidget(metadata_label)
+        metadata_row.addStretch()
+        metadata_row.addWidget(self.metadata_combo)
+        layout.addLayout(metadata_row)
+
         return section
 
     def create_aur_section(self):
@@ -208,6 +237,47 @@ class SettingsPage(QWidget):
         helper_row.addWidget(self.helper_combo)
         layout.addLayout(helper_row)
 
+        # makepkg build profile
+        profile_row = QHBoxLayout()
+        profile_label = QLabel("Build profile")
+        profile_label.setObjectName("settingsLabel")
+        profile_label.setToolTip("Fast: parallel make, tmpfs build directory, fast zstd packages, ccache/sccache if installed")
+        self.profile_combo = QComboBox()
+        self.profile_combo.setObjectName("settingsCombo")
+        self.profile_combo.addItems(["Default", "Fast"])
+        self.profile_combo.setCurrentText(self.settings.get("aur_build_profile", "default").capitalize())
+        self.profile_combo.setFixedWidth(200)
+        profile_row.addWidget(profile_label)
+        profile_row.addStretch()
+        profile_row.addWidget(self.profile_combo)
+        layout.addLayout(profile_row)
+
+        # Prebuilt -bin packages instead of compiling
+        bin_row = QHBoxLayout()
+        bin_label = QLabel("Use prebuilt -bin packages")
+        bin_label.setObjectName("settingsLabel")
+        self.bin_combo = QComboBox()
+        self.bin_combo.setObjectName("settingsCombo")
+        self.bin_combo.addItems(["Auto", "Ask", "Never"])
+        self.bin_combo.setCurrentText(self.settings.get("aur_bin_substitution", "ask").capitalize())
+        self.bin_combo.setFixedWidth(200)
+        bin_row.addWidget(bin_label)
+        bin_row.addStretch()
+        bin_row.addWidget(self.bin_combo)
+        layout.addLayout(bin_row)
+
+        # Average makepkg time per profile, from the recorded builds
+        times = {}
+        for entry in read_build_times():
+            times.setdefault(entry["profile"], []).append(entry["seconds"])
+        if times:
+            averages = "  ·  ".join(f"{profile}: {sum(values) / len(values):.0f}s over {len(values)}"
+                                    for profile, values in sorted(times.items()))
+            times_label = QLabel(f"Average build time — {averages}")
+            times_label.setObjectName("aurStatLabel")
+            times_label.setWordWrap(True)
+            layout.addWidget(times_label)
+
         # Show AUR warnings
         self.show_warnings = QCheckBox("Show AUR safety warnings")
         self.show_warnings.setObjectName("settingsCheckbox")
@@ -297,12 +367,18 @@ class SettingsPage(QWidget):
         """Save all settings changes"""
         self.settings["theme"] = self.theme_combo.currentText()
         self.settings["auto_update_check"] = self.auto_update_check.isChecked()
+        self.settings["preload_pages"] = self.preload_pages.isChecked()
         self.settings["confirm_installations"] = self.confirm_install.isChecked()
         self.settings["confirm_removals"] = self.confirm_remove.isChecked()
         self.settings["auto_clean_cache"] = self.auto_clean.isChecked()
+        self.settings["persistent_privileges"] = self.persistent_privileges.isChecked()
         self.settings["parallel_downloads"] = int(self.parallel_combo.currentText())
+        self.settings["lock_wait_timeout"] = int(self.lock_combo.currentText())
+        self.settings["metadata_max_age_minutes"] = int(self.metadata_combo.currentText())
         self.settings["default_helper"] = self.helper_combo.currentText()
         self.settings["show_aur_warnings"] = self.show_warnings.isChecked()
+        self.settings["aur_build_profile"] = self.profile_combo.currentText().lower()
+        self.settings["aur_bin_substitution"] = self.bin_combo.currentText().lower()
         self.settings["log_level"] = self.level_combo.currentText()
         self.settings["keep_logs_days"] = int(self.days_combo.currentText())
 
@@ -316,12 +392,18 @@ class SettingsPage(QWidget):
         self.settings = self.load_settings()
         self.theme_combo.setCurrentText(self.settings.get("theme", "Dark"))
         self.auto_update_check.setChecked(self.settings.get("auto_update_check", True))
+        self.preload_pages.setChecked(self.settings.get("preload_pages", True))
         self.confirm_install.setChecked(self.settings.get("confirm_installations", True))
         self.confirm_remove.setChecked(self.settings.get("confirm_removals", True))
         self.auto_clean.setChecked(self.settings.get("auto_clean_cache", False))
+        self.persistent_privileges.setChecked(self.settings.get("persistent_privileges", False))
         self.parallel_combo.setCurrentText(str(self.settings.get("parallel_downloads", 5)))
+        self.lock_combo.setCurrentText(str(self.settings.get("lock_wait_timeout", 300)))
+        self.metadata_combo.setCurrentText(str(self.settings.get("metadata_max_age_minutes", 60)))
         self.helper_combo.setCurrentText(self.settings.get("default_helper", "yay"))
         self.show_warnings.setChecked(self.settings.get("show_aur_warnings", True))
+        self.profile_combo.setCurrentText(self.settings.get("aur_build_profile", "default").capitalize())
+        self.bin_combo.setCurrentText(self.settings.get("aur_bin_substitution", "ask").capitalize())
         self.level_combo.setCurrentText(self.settings.get("log_level", "Info"))
         self.days_combo.setCurrentText(str(self.settings.get("keep_logs_days", 30)))
 
@@ -0,0 +1,361 @@
+# core/aur_build.py
+import atexit
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shutil
+import stat
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import NamedTuple
+
+from core.cache import CACHE_DIR
+from core.package_manager import get_package_manager
+from core.scheduler import run_mutation
+
+
+AUR_GIT_URL = "https://aur.archlinux.org/{base}.git"
+BUILD_LOG_DIR = os.path.join(CACHE_DIR, "aur", "logs")
+CLONE_DIR = os.path.join(CACHE_DIR, "aur", "clones")
+PACKAGE_CACHE_DIR = os.path.join(CACHE_DIR, "aur", "packages")
+LOCAL_REPO_DIR = os.path.join(CACHE_DIR, "aur", "repo")
+LOCAL_REPO_NAME = "dev_manager_aur"
+BUILD_TIMES_FILE = os.path.join(CACHE_DIR, "aur", "build_times.jsonl")
+
+# "default" leaves makepkg.conf alone; "fast" layers makepkg_config_text() over it
+BUILD_PROFILES = ("default", "fast")
+TMPFS_MIN_FREE = 2 * 1024 ** 3
+
+
+# a clone is updated and built by one thread at a time, across pipelines: dependency
+# resolution (a query) may check out a base while a build of it is running
+_clone_locks = {}
+_clone_locks_guard = threading.Lock()
+
+
+def _clone_lock(build_dir: str) -> threading.RLock:
+    with _clone_locks_guard:
+        return _clone_locks.setdefault(build_dir, threading.RLock())
+
+
+# one repo-add at a time per local repository, across pipelines; another process
+# publishing to it is kept out by a file lock (repo-add gives up rather than wait)
+_repo_locks = {}
+_repo_locks_guard = threading.Lock()
+
+
+def _repo_lock(repo_dir: str) -> threading.Lock:
+    with _repo_locks_guard:
+        return _repo_locks.setdefault(os.path.abspath(repo_dir), threading.Lock())
+
+
+class BuildResult(NamedTuple):
+    name: str
+    success: bool
+    package_files: list
+    log_path: str
+    duration: float
+    error: str = ""
+
+
+# this session's build directory on a tmpfs, see tmpfs_build_dir()
+_tmpfs_dir = None
+_tmpfs_lock = threading.Lock()
+
+
+def _tmpfs_mount() -> str | None:
+    """/tmp or /dev/shm, whichever is a tmpfs with room for a build"""
+    try:
+        with open("/proc/mounts") as f:
+            tmpfs_mounts = {line.split()[1] for line in f if line.split()[2:3] == ["tmpfs"]}
+    except OSError:
+        return None
+    for mount in ("/tmp", "/dev/shm"):
+        if mount in tmpfs_mounts:
+            fs = os.statvfs(mount)
+            if fs.f_bavail * fs.f_frsize >= TMPFS_MIN_FREE:
+                return mount
+    return None
+
+
+def _is_private_dir(path: str) -> bool:
+    """A real directory (not a symlink) owned by us and closed to everyone else"""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid() and stat.S_IMODE(st.st_mode) == 0o700
+
+
+def tmpfs_build_dir() -> str | None:
+    """A private directory on a tmpfs with room for a build, if the system has one.
+
+    /tmp and /dev/shm are writable by every user, so the directory is made
+    with mkdtemp once per session, at a name nobody can claim first, checked
+    again before each reuse and removed at exit.
+    """
+    global _tmpfs_dir
+    mount = _tmpfs_mount()
+    if mount is None:
+        return None
+    with _tmpfs_lock:
+        if _tmpfs_dir and os.path.dirname(_tmpfs_dir) == mount and _is_private_dir(_tmpfs_dir):
+            return _tmpfs_dir
+        _tmpfs_dir = tempfile.mkdtemp(prefix="dev_manager-build-", dir=mount)
+        atexit.register(shutil.rmtree, _tmpfs_dir, True)
+        return _tmpfs_dir
+
+
+def makepkg_config_text(profile: str) -> str | None:
+    """makepkg.conf contents for a build profile, None for the system defaults"""
+    if profile != "fast":
+        return None
+    jobs = os.cpu_count() or 1
+    lines = [
+        "# Generated by Dev Manager: the system configuration, then the fast-build overrides",
+        "source /etc/makepkg.conf",
+        "for conf in /etc/makepkg.conf.d/*.conf; do [[ -r $conf ]] && source \"$conf\"; done",
+        # -l keeps parallel builds from oversubscribing the CPUs together
+        f'MAKEFLAGS="-j{jobs} -l{jobs}"',
+        "PKGEXT='.pkg.tar.zst'",
+        "COMPRESSZST=(zstd -c -T0 --fast -)",
+    ]
+    build_dir = tmpfs_build_dir()
+    if build_dir:
+        lines.append(f'BUILDDIR="{build_dir}"')
+    if shutil.which("ccache"):
+        lines.append('BUILDENV=("${BUILDENV[@]/!ccache/ccache}")')
+    if shutil.which("sccache"):
+        lines.append("export RUSTC_WRAPPER=sccache")
+    return "\n".join(lines) + "\n"
+
+
+def makepkg_config(profile: str) -> str | None:
+    """Write the profile's makepkg.conf and return its path, None for the system defaults"""
+    text = makepkg_config_text(profile)
+    if text is None:
+        return None
+    path = os.path.join(CACHE_DIR, "aur", f"makepkg-{profile}.conf")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+    return path
+
+
+def record_build_time(base: str, profile: str, seconds: float, path: str = BUILD_TIMES_FILE):
+    """Append one makepkg run's wall time, for comparing profiles"""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a") as f:
+            f.write(json.dumps({"base": base, "profile": profile, "seconds": round(seconds, 2),
+                                "at": int(time.time())}) + "\n")
+    except OSError:
+        pass
+
+
+def read_build_times(path: str = BUILD_TIMES_FILE) -> list[dict]:
+    """Every recorded build time, oldest first"""
+    try:
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except (OSError, ValueError):
+        return []
+
+
+class AURBuildPipeline:
+    """Builds several AUR packages concurrently and installs them one at a time.
+
+    Package bases are built with makepkg up to `max_jobs` at once. Finished
+    builds are installed with `pacman -U` one at a time, queued with the
+    system package manager's other transactions on the scheduler, since only
+    one transaction can hold the pacman database; the builds themselves
+    don't hold up that queue. Clone, makepkg and pacman output go to one log
+    file per package base.
+
+    Nothing is rebuilt that doesn't have to be: AUR repositories stay cloned
+    under `clone_dir` and are updated with a shallow fetch, and built
+    packages are kept under `package_dir/<base>/<PKGBUILD sha256>`, so an
+    unchanged PKGBUILD is installed straight from the cache. Built packages
+    are also published to a local repository with repo-add, which pacman on
+    this or another machine can use with
+
+        [dev_manager_aur]
+        SigLevel = Optional TrustAll
+        Server = file:///home/<user>/.cache/dev_manager/aur/repo
+
+    `profile` picks a makepkg configuration (see BUILD_PROFILES); every
+    makepkg run's duration is recorded per profile in build_times.jsonl.
+    """
+
+    def __init__(self, max_jobs: int | None = None, log_dir: str = BUILD_LOG_DIR, base_for=None,
+                 clone_dir: str = CLONE_DIR, package_dir: str = PACKAGE_CACHE_DIR,
+                 repo_dir: str = LOCAL_REPO_DIR, profile: str = "default"):
+        self.max_jobs = max_jobs or os.cpu_count() or 1
+        self.profile = profile
+        config = makepkg_config(profile)
+        self.makepkg_args = ["--config", config] if config else []
+        self.log_dir = log_dir
+        self.base_for = base_for or (lambda name: name)
+        self.clone_dir = clone_dir
+        self.package_dir = package_dir
+        self.repo_dir = repo_dir
+
+    def run(self, names: list[str], on_result=None, as_deps=()) -> dict[str, BuildResult]:
+        """Build and install every package; on_result is called as each one finishes.
+
+        Bases whose packages are all in `as_deps` are installed as dependencies.
+        """
+        # split packages share a base, which is cloned and built once
+        bases = {}
+        for name in dict.fromkeys(names):
+            bases.setdefault(self.base_for(name), []).append(name)
+
+        results = {}
+        os.makedirs(self.log_dir, exist_ok=True)
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.max_jobs, len(bases) or 1)) as pool:
+                futures = [pool.submit(self._build_and_install, base, base_names,
+                                       all(name in as_deps for name in base_names))
+                           for base, base_names in bases.items()]
+                for future in as_completed(futures):
+                    for result in future.result():
+                        results[result.name] = result
+                        if on_result:
+                            on_result(result)
+        finally:
+            get_package_manager().state.refresh(list(dict.fromkeys(names)))
+
+        return results
+
+    def _build_and_install(self, base: str, names: list[str], as_deps: bool = False) -> list[BuildResult]:
+        started = time.monotonic()
+        log_path = os.path.join(self.log_dir, f"{base}-{time.strftime('%Y%m%d-%H%M%S')}.log")
+
+        def results(success, package_files, error=""):
+            return [BuildResult(name, success, package_files, log_path, time.monotonic() - started, error)
+                    for name in names]
+
+        with open(log_path, "w") as log:
+            try:
+                package_files = self.build(base, log)
+            except (subprocess.CalledProcessError, OSError) as e:
+                return results(False, [], f"Build failed: {e}")
+
+            package_files = self._files_for(names, package_files)
+            if not package_files:
+                return results(False, [], "makepkg produced no package files")
+
+            # builds run in parallel, installs queue with every other transaction
+            try:
+                result = run_mutation(
+                    f"Install built {', '.join(names)}",
+                    lambda: get_package_manager().run_privileged(
+                        ["pacman", "-U", "--noconfirm"] + (["--asdeps"] if as_deps else []) + package_files,
+                        capture_output=True
+                    )
+                )
+                log.write(f"==> Installed {' '.join(package_files)}\n")
+                log.write(result.stdout + result.stderr)
+            except Exception as e:
+                return results(False, package_files, f"Install failed: {e}")
+
+        if result.returncode != 0:
+            return results(False, package_files, f"pacman -U exited with {result.returncode}")
+        return results(True, package_files)
+
+    @staticmethod
+    def _files_for(names: list[str], package_files: list[str]) -> list[str]:
+        """The package files of the requested split packages (all of them if none match)"""
+        pattern = re.compile(r"^(%s)-[^-]+-[^-]+-[^-]+\.pkg\.tar" % "|".join(re.escape(n) for n in names))
+        wanted = [path for path in package_files if pattern.match(os.path.basename(path))]
+        return wanted or package_files
+
+    def build(self, base: str, log) -> list[str]:
+        """Update the clone of a package base and build it unless it's cached, returning its package files"""
+        with _clone_lock(os.path.join(self.clone_dir, base)):
+            return self._build(base, log)
+
+    def _build(self, base: str, log) -> list[str]:
+        build_dir = self.checkout(base, log)
+        with open(os.path.join(build_dir, "PKGBUILD"), "rb") as f:
+            pkgbuild_hash = hashlib.sha256(f.read()).hexdigest()
+
+        # makepkg writes into (and --packagelist reports) PKGDEST
+        package_dest = os.path.join(self.package_dir, base, pkgbuild_hash)
+        env = dict(os.environ, PKGDEST=package_dest)
+        cached = self._package_list(build_dir, env, self.makepkg_args)
+        if cached and all(os.path.exists(path) for path in cached):
+            log.write(f"==> Using cached build of {base} ({pkgbuild_hash[:12]})\n")
+            return cached
+
+        os.makedirs(package_dest, exist_ok=True)
+        log.write(f"==> Building {base} ({self.profile} profile)\n")
+        log.flush()
+        started = time.monotonic()
+        subprocess.run(["makepkg", "--noconfirm", "--force"] + self.makepkg_args, cwd=build_dir, env=env,
+                       stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, check=True)
+        duration = time.monotonic() - started
+        record_build_time(base, self.profile, duration)
+        log.write(f"==> Built {base} in {duration:.1f}s\n")
+
+        package_files = [path for path in self._package_list(build_dir, env, self.makepkg_args)
+                         if os.path.exists(path)]
+        try:
+            self.publish(package_files, log)
+        except OSError as e:
+            log.write(f"==> Could not publish to the local repository: {e}\n")
+        return package_files
+
+    def checkout(self, base: str, log) -> str:
+        """Clone a package base, or fetch into the existing clone"""
+        build_dir = os.path.join(self.clone_dir, base)
+        with _clone_lock(build_dir):
+            self._checkout(base, build_dir, log)
+        return build_dir
+
+    def _checkout(self, base: str, build_dir: str, log):
+        if os.path.isdir(os.path.join(build_dir, ".git")):
+            log.write(f"==> Updating {base}\n")
+            log.flush()
+            subprocess.run(["git", "fetch", "--depth", "1", "origin"], cwd=build_dir,
+                           stdout=log, stderr=subprocess.STDOUT, check=True)
+            subprocess.run(["git", "reset", "--hard", "FETCH_HEAD"], cwd=build_dir,
+                           stdout=log, stderr=subprocess.STDOUT, check=True)
+        else:
+            log.write(f"==> Cloning {base}\n")
+            log.flush()
+            os.makedirs(self.clone_dir, exist_ok=True)
+            subprocess.run(["git", "clone", "--depth", "1", AUR_GIT_URL.format(base=base), build_dir],
+                           stdout=log, stderr=subprocess.STDOUT, check=True)
+
+    @staticmethod
+    def _package_list(build_dir: str, env: dict, makepkg_args: list[str]) -> list[str]:
+        result = subprocess.run(["makepkg", "--packagelist"] + makepkg_args, cwd=build_dir, env=env,
+                                capture_output=True, text=True, check=True)
+        return result.stdout.split()
+
+    def publish(self, package_files: list[str], log):
+        """Add freshly built packages to the local repository"""
+        if not package_files or not shutil.which("repo-add"):
+            return
+        os.makedirs(self.repo_dir, exist_ok=True)
+        with _repo_lock(self.repo_dir), open(os.path.join(self.repo_dir, ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            published = []
+            for path in package_files:
+                target = os.path.join(self.repo_dir, os.path.basename(path))
+                if not os.path.exists(target):
+                    shutil.copy2(path, target)
+                published.append(target)
+            # -R drops the files of versions the new ones replace
+            result = subprocess.run(
+                ["repo-add", "-q", "-R", os.path.join(self.repo_dir, f"{LOCAL_REPO_NAME}.db.tar.gz")] + published,
+                stdout=log, stderr=subprocess.STDOUT
+            )
+            if result.returncode != 0:
+                log.write(f"==> repo-add exited with {result.returncode}, local repository not updated\n")
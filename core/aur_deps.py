@@ -0,0 +1,209 @@
+# core/aur_deps.py
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from core.package_db import read_pacman_sync_names
+
+
+# needed before anything can be cloned or built; not listed in any .SRCINFO
+BUILD_TOOLS = ["git", "base-devel"]
+
+DEPENDENCY_KEYS = ("depends", "makedepends", "checkdepends")
+
+
+class SrcInfo(NamedTuple):
+    """The parts of a .SRCINFO the resolver needs"""
+    pkgbase: str
+    version: str
+    pkgnames: list
+    depends: list       # runtime, build and check dependencies of every package in the base
+    provides: list
+
+
+class BuildPlan(NamedTuple):
+    """What installing a set of AUR packages involves, in order"""
+    targets: list       # the packages that were asked for
+    repo_deps: list     # installed from the sync repositories, in one transaction
+    levels: list        # lists of AUR package names; each level only depends on earlier ones
+    aur_deps: list      # AUR packages pulled in as dependencies (installed --asdeps)
+    bases: dict         # AUR package name -> package base
+    unresolved: list    # dependencies found nowhere
+
+    def describe(self) -> str:
+        lines = []
+        if self.repo_deps:
+            lines.append(f"Repository dependencies ({len(self.repo_deps)}): {', '.join(self.repo_deps)}")
+        for number, level in enumerate(self.levels, 1):
+            lines.append(f"Build step {number}: {', '.join(level)}")
+        if self.unresolved:
+            lines.append(f"Not found: {', '.join(self.unresolved)}")
+        return "\n".join(lines)
+
+
+def strip_version(dependency: str) -> str:
+    """"foo>=1.2" -> "foo" """
+    return re.split(r"[<>=]", dependency, maxsplit=1)[0].strip()
+
+
+def parse_srcinfo(text: str, arch: str | None = None) -> SrcInfo:
+    """Parse .SRCINFO text; depends_<arch> entries count for the given architecture"""
+    arch = arch or os.uname().machine
+    fields = {"pkgbase": "", "pkgver": "", "pkgrel": "", "epoch": ""}
+    pkgnames = []
+    depends = []
+    provides = []
+    for line in text.splitlines():
+        key, sep, value = line.strip().partition(" = ")
+        if not sep:
+            continue
+        if key in fields and not fields[key]:
+            fields[key] = value
+        elif key == "pkgname":
+            pkgnames.append(value)
+        elif key in DEPENDENCY_KEYS or any(key == f"{k}_{arch}" for k in DEPENDENCY_KEYS):
+            depends.append(value)
+        elif key in ("provides", f"provides_{arch}"):
+            provides.append(value)
+
+    version = f"{fields['pkgver']}-{fields['pkgrel']}"
+    if fields["epoch"]:
+        version = f"{fields['epoch']}:{version}"
+    return SrcInfo(fields["pkgbase"], version, pkgnames, list(dict.fromkeys(depends)), provides)
+
+
+class AURDependencyResolver:
+    """Works out the build plan for a set of AUR packages.
+
+    Each package base's .SRCINFO is read from its clone (fetched through
+    `checkout`, the build pipeline's clone cache). Dependencies already
+    satisfied on the system are dropped using `pacman -T`, which also
+    understands versions and provides; the rest go to the sync repositories
+    when a repository has them and to the AUR otherwise. AUR packages are
+    then ordered into levels so that each level only needs the ones before
+    it, and everything inside a level can build in parallel.
+    """
+
+    def __init__(self, checkout, find_aur_provider, max_jobs: int | None = None):
+        self.checkout = checkout                    # base -> clone directory
+        self.find_aur_provider = find_aur_provider  # dependency name -> (package, base) or None
+        self.max_jobs = max_jobs or os.cpu_count() or 1
+
+    def plan(self, targets: list[str]) -> BuildPlan:
+        targets = list(dict.fromkeys(targets))
+        repo_names = read_pacman_sync_names() or set()
+
+        srcinfos = {}       # base -> SrcInfo
+        bases = {}          # AUR package name -> base
+        graph = {}          # AUR package name -> AUR package names it needs
+        repo_deps = []
+        unresolved = []
+        not_in_aur = set()
+
+        frontier = []
+        for name in targets:
+            provider = self.find_aur_provider(name)
+            if provider is None:
+                unresolved.append(name)
+            else:
+                bases[name] = provider[1]
+                frontier.append(name)
+
+        with ThreadPoolExecutor(max_workers=self.max_jobs) as pool:
+            while frontier:
+                # read the .SRCINFO of every new base in this round in parallel
+                new_bases = list(dict.fromkeys(bases[name] for name in frontier if bases[name] not in srcinfos))
+                for base, srcinfo in zip(new_bases, pool.map(self.read_srcinfo, new_bases)):
+                    srcinfos[base] = srcinfo
+
+                next_frontier = []
+                missing = self.unsatisfied(
+                    dep for name in frontier if srcinfos[bases[name]] for dep in srcinfos[bases[name]].depends
+                )
+                for name in frontier:
+                    srcinfo = srcinfos[bases[name]]
+                    if srcinfo is None:
+                        if name in targets:
+                            unresolved.append(name)
+                        else:
+                            # guessed to be in the AUR but isn't; pacman may still find a provider
+                            not_in_aur.add(name)
+                        continue
+                    needs = set()
+                    for dep in srcinfo.depends:
+                        dep_name = strip_version(dep)
+                        if dep not in missing:
+                            continue
+                        if dep_name in repo_names:
+                            repo_deps.append(dep_name)
+                            continue
+                        if dep_name in bases:
+                            needs.add(dep_name)
+                            continue
+                        provider = self.find_aur_provider(dep_name)
+                        if provider is None:
+                            # not in the AUR either; let pacman look for a repository provider
+                            repo_deps.append(dep_name)
+                            continue
+                        provided_name, base = provider
+                        if base == bases[name]:
+                            continue  # provided by a sibling in the same split package
+                        needs.add(provided_name)
+                        if provided_name not in bases:
+                            bases[provided_name] = base
+                            next_frontier.append(provided_name)
+                    graph[name] = needs
+                frontier = next_frontier
+
+        for needs in graph.values():
+            repo_deps.extend(needs & not_in_aur)
+            needs.difference_update(not_in_aur)
+        levels = self.levels(graph)
+        aur_deps = [name for level in levels for name in level if name not in targets]
+        return BuildPlan(targets, list(dict.fromkeys(repo_deps)), levels, aur_deps,
+                         bases, list(dict.fromkeys(unresolved)))
+
+    def read_srcinfo(self, base: str) -> SrcInfo | None:
+        """The parsed .SRCINFO of a package base, None if it can't be fetched"""
+        try:
+            build_dir = self.checkout(base)
+            path = os.path.join(build_dir, ".SRCINFO")
+            if os.path.exists(path):
+                with open(path) as f:
+                    return parse_srcinfo(f.read())
+            result = subprocess.run(["makepkg", "--printsrcinfo"], cwd=build_dir,
+                                    capture_output=True, text=True, check=True)
+            return parse_srcinfo(result.stdout)
+        except (subprocess.CalledProcessError, OSError):
+            return None
+
+    @staticmethod
+    def unsatisfied(dependencies) -> set[str]:
+        """The dependencies the installed system doesn't satisfy, in one pacman -T call"""
+        dependencies = list(dict.fromkeys(dependencies))
+        if not dependencies:
+            return set()
+        result = subprocess.run(["pacman", "-T"] + dependencies, capture_output=True, text=True)
+        if result.returncode not in (0, 127):
+            # pacman -T failed outright; treat everything as missing
+            return set(dependencies)
+        return set(result.stdout.split())
+
+    @staticmethod
+    def levels(graph: dict) -> list[list[str]]:
+        """Group a dependency graph into build levels (Kahn's algorithm)"""
+        remaining = {name: set(needs) & graph.keys() for name, needs in graph.items()}
+        levels = []
+        while remaining:
+            ready = sorted(name for name, needs in remaining.items() if not needs)
+            if not ready:
+                raise ValueError(f"Dependency cycle between: {', '.join(sorted(remaining))}")
+            levels.append(ready)
+            for name in ready:
+                del remaining[name]
+            for needs in remaining.values():
+                needs.difference_update(ready)
+        return levels
+
@@ -0,0 +1,256 @@
+# core/aur_index.py
+import difflib
+import gzip
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import urllib.request
+
+from core.cache import CACHE_DIR
+
+
+AUR_META_URL = "https://aur.archlinux.org/packages-meta-ext-v1.json.gz"
+DEFAULT_INDEX_PATH = os.path.join(CACHE_DIR, "aur", "index.sqlite")
+
+# score tiers; popularity only orders results inside a tier
+EXACT_SCORE = 4
+PREFIX_SCORE = 3
+SUBSTRING_SCORE = 2
+TEXT_SCORE = 1
+FUZZY_SCORE = 0
+
+
+class AURIndex:
+    """Offline index of the AUR metadata dump with ranked search.
+
+    `ingest` builds a sqlite database from packages-meta-ext-v1.json(.gz),
+    either downloaded by `update` or given as a local file. `search` ranks
+    exact name matches first, then name prefixes, name substrings, full-text
+    matches on description/keywords (FTS5) and finally fuzzy name matches
+    (FTS5 trigram), each tier ordered by popularity.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._names = None
+
+    # ------------------------------------------------------------ building
+
+    def update(self, url: str = AUR_META_URL, timeout: int = 60) -> int:
+        """Download the metadata dump and re-index; returns the package count"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(self.path), suffix=".json.gz", delete=False) as tmp:
+            try:
+                with urllib.request.urlopen(url, timeout=timeout) as response:
+                    shutil.copyfileobj(response, tmp)
+                tmp.close()
+                return self.ingest(tmp.name)
+            finally:
+                os.unlink(tmp.name)
+
+    def ingest(self, dump_path: str) -> int:
+        """Build the index from a local metadata dump (.json or .json.gz)"""
+        opener = gzip.open if dump_path.endswith(".gz") else open
+        with opener(dump_path, "rt", encoding="utf-8") as f:
+            records = json.load(f)
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        build_path = f"{self.path}.{os.getpid()}.building"
+        if os.path.exists(build_path):
+            os.remove(build_path)
+
+        conn = sqlite3.connect(build_path)
+        try:
+            conn.executescript("""
+                CREATE TABLE packages (
+                    name TEXT COLLATE NOCASE PRIMARY KEY,
+                    base TEXT,
+                    version TEXT,
+                    description TEXT,
+                    keywords TEXT,
+                    votes INTEGER,
+                    popularity REAL,
+                    provides TEXT,
+                    depends TEXT,
+                    makedepends TEXT
+                );
+                CREATE VIRTUAL TABLE packages_fts USING fts5(
+                    name, description, keywords, content='packages', prefix='2 3'
+                );
+                CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+            """)
+            conn.executemany(
+                "INSERT OR REPLACE INTO packages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        record["Name"],
+                        record.get("PackageBase") or record["Name"],
+                        record.get("Version") or "",
+                        record.get("Description") or "",
+                        " ".join(record.get("Keywords") or []),
+                        int(record.get("NumVotes") or 0),
+                        float(record.get("Popularity") or 0.0),
+                        " ".join(record.get("Provides") or []),
+                        " ".join(record.get("Depends") or []),
+                        " ".join(record.get("MakeDepends") or []),
+                    )
+                    for record in records if record.get("Name")
+                ),
+            )
+            conn.execute("INSERT INTO packages_fts(packages_fts) VALUES ('rebuild')")
+            try:
+                conn.executescript("""
+                    CREATE VIRTUAL TABLE names_trigram USING fts5(name, tokenize='trigram');
+                    INSERT INTO names_trigram(rowid, name) SELECT rowid, name FROM packages;
+                """)
+            except sqlite3.OperationalError:
+                # sqlite older than 3.34 has no trigram tokenizer; fuzzy search falls back to difflib
+                pass
+            count = conn.execute("SELECT COUNT(*) FROM packages").fetchone()[0]
+            conn.executemany("INSERT INTO meta VALUES (?, ?)",
+                             [("updated_at", str(time.time())), ("count", str(count))])
+            conn.commit()
+        finally:
+            conn.close()
+
+        os.replace(build_path, self.path)
+        self._local = threading.local()
+        self._names = None
+        return count
+
+    # ------------------------------------------------------------ querying
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite connections can't be shared between threads, keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def is_available(self) -> bool:
+        return os.path.exists(self.path)
+
+    def info(self) -> dict:
+        """Package count and last update time of the index"""
+        if not self.is_available():
+            return {"count": 0, "updated_at": None}
+        try:
+            meta = dict(self._conn().execute("SELECT key, value FROM meta").fetchall())
+        except sqlite3.Error:
+            return {"count": 0, "updated_at": None}
+        return {"count": int(meta.get("count", 0)), "updated_at": float(meta.get("updated_at", 0))}
+
+    def get(self, name: str) -> dict | None:
+        """Full record of one package"""
+        row = self._conn().execute("SELECT * FROM packages WHERE name = ?", (name,)).fetchone()
+        return dict(row) if row else None
+
+    def find_provider(self, dependency: str) -> dict | None:
+        """The package named `dependency`, else the most popular one that provides it"""
+        record = self.get(dependency)
+        if record is not None:
+            return record
+        row = self._conn().execute(
+            "SELECT * FROM packages WHERE ' ' || provides || ' ' LIKE ? OR ' ' || provides || ' ' LIKE ? "
+            "ORDER BY popularity DESC LIMIT 1",
+            (f"% {dependency} %", f"% {dependency}=%"),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def find_binary_variant(self, name: str) -> dict | None:
+        """The prebuilt "-bin" package standing in for `name`, if the AUR has one"""
+        record = self.get(f"{name}-bin")
+        if record is not None:
+            return record
+        row = self._conn().execute(
+            "SELECT * FROM packages WHERE name LIKE '%-bin' "
+            "AND (' ' || provides || ' ' LIKE ? OR ' ' || provides || ' ' LIKE ?) "
+            "ORDER BY popularity DESC LIMIT 1",
+            (f"% {name} %", f"% {name}=%"),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def search(self, query: str, limit: int = 500) -> list[dict]:
+        """Ranked search over names, descriptions and keywords"""
+        query = query.strip()
+        if not query or not self.is_available():
+            return []
+
+        conn = self._conn()
+        scores = {}
+
+        def collect(score, sql, params):
+            for row in conn.execute(sql, params):
+                if row["name"] not in scores:
+                    scores[row["name"]] = (score, row)
+
+        like = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        columns = "name, version, description, votes, popularity"
+        collect(EXACT_SCORE, f"SELECT {columns} FROM packages WHERE name = ?", (query,))
+        collect(PREFIX_SCORE, f"SELECT {columns} FROM packages WHERE name LIKE ? ESCAPE '\\' "
+                              f"ORDER BY popularity DESC LIMIT ?", (like + "%", limit))
+        collect(SUBSTRING_SCORE, f"SELECT {columns} FROM packages WHERE name LIKE ? ESCAPE '\\' "
+                                 f"ORDER BY popularity DESC LIMIT ?", ("%" + like + "%", limit))
+
+        tokens = re.findall(r"\w+", query)
+        if tokens and len(scores) < limit:
+            match = " AND ".join(f'"{token}"*' for token in tokens)
+            collect(TEXT_SCORE,
+                    f"SELECT {', '.join('p.' + c.strip() for c in columns.split(','))} "
+                    f"FROM packages_fts JOIN packages p ON p.rowid = packages_fts.rowid "
+                    f"WHERE packages_fts MATCH ? ORDER BY bm25(packages_fts), p.popularity DESC LIMIT ?",
+                    (match, limit))
+
+        if len(scores) < 10:
+            for name in self._fuzzy_names(query):
+                collect(FUZZY_SCORE, f"SELECT {columns} FROM packages WHERE name = ?", (name,))
+
+        ranked = sorted(scores.values(), key=lambda item: (-item[0], -item[1]["popularity"]))
+        return [
+            {
+                "name": row["name"],
+                "version": row["version"],
+                "description": row["description"],
+                "votes": row["votes"],
+                "popularity": row["popularity"],
+            }
+            for _, row in ranked[:limit]
+        ]
+
+    def _fuzzy_names(self, query: str, count: int = 20) -> list[str]:
+        """Names close to the query, for typos"""
+        conn = self._conn()
+        lowered = query.lower()
+        trigrams = {lowered[i:i + 3] for i in range(len(lowered) - 2)}
+        try:
+            if not trigrams:
+                raise sqlite3.OperationalError("query too short for trigrams")
+            match = " OR ".join('"' + t.replace('"', '""') + '"' for t in trigrams)
+            candidates = [row[0] for row in conn.execute(
+                "SELECT name FROM names_trigram WHERE names_trigram MATCH ? ORDER BY rank LIMIT 200", (match,))]
+        except sqlite3.OperationalError:
+            if self._names is None:
+                self._names = [row[0] for row in conn.execute("SELECT name FROM packages")]
+            candidates = [name for name in self._names if name[:1].lower() == lowered[:1]]
+        return difflib.get_close_matches(lowered, candidates, n=count, cutoff=0.6)
+
+
+_shared_index = None
+_shared_lock = threading.Lock()
+
+
+def get_aur_index() -> AURIndex:
+    """The process-wide AUR metadata index"""
+    global _shared_index
+    with _shared_lock:
+        if _shared_index is None:
+            _shared_index = AURIndex()
+        return _shared_index
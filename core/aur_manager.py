@@ -2,7 +2,37 @@
 import subprocess
 import shutil
 import os
-import tempfile
+import json
+import time
+import urllib.parse
+import urllib.request
+from typing import NamedTuple
+
+from core.aur_build import (BUILD_LOG_DIR, BUILD_PROFILES, AURBuildPipeline, BuildResult,
+                            makepkg_config, read_build_times, record_build_time)
+from core.aur_deps import BUILD_TOOLS, AURDependencyResolver, BuildPlan, strip_version
+from core.aur_index import AUR_META_URL, get_aur_index
+from core.package_db import read_pacman_local, read_pacman_sync_names
+from core.package_lock import PackageLockError
+from core.package_manager import get_package_manager
+from core.scheduler import run_mutation
+from core.settings import load_settings
+
+
+AUR_RPC_INFO_URL = "https://aur.archlinux.org/rpc/v5/info"
+
+# rough makepkg times by toolchain, for packages we have never built ourselves
+BUILD_TIME_ESTIMATES = {"rust": 600, "cargo": 600, "go": 120, "cmake": 240, "meson": 180}
+DEFAULT_BUILD_TIME_ESTIMATE = 60
+
+SUBSTITUTION_POLICIES = ("auto", "ask", "never")
+
+
+class BinarySubstitute(NamedTuple):
+    """A prebuilt AUR package that can be installed instead of building one from source"""
+    package: str
+    binary: str
+    seconds_saved: float
 
 
 class AURManager:
@@ -12,26 +42,25 @@ class AURManager:
         "yay": {
             "name": "yay",
             "description": "Yet Another Yogurt - An AUR Helper written in Go",
-            "git_url": "https://aur.archlinux.org/yay.git",
-            "deps": ["git", "base-devel"]
+            "git_url": "https://aur.archlinux.org/yay.git"
         },
         "paru": {
             "name": "paru",
             "description": "Feature packed AUR helper written in Rust",
-            "git_url": "https://aur.archlinux.org/paru.git",
-            "deps": ["git", "base-devel", "rust"]
+            "git_url": "https://aur.archlinux.org/paru.git"
         },
         "trizen": {
             "name": "trizen",
             "description": "Lightweight AUR Package Manager written in Perl",
-            "git_url": "https://aur.archlinux.org/trizen.git",
-            "deps": ["git", "base-devel", "perl"]
+            "git_url": "https://aur.archlinux.org/trizen.git"
         }
     }
 
     def __init__(self):
         self.active_helper = self._detect_aur_helper()
         self.is_arch_based = self._check_arch_based()
+        self.index = get_aur_index()
+        self.build_log_dir = BUILD_LOG_DIR
 
     def _check_arch_based(self) -> bool:
         """Check if the system is Arch-based"""
@@ -57,46 +86,35 @@ class AURManager:
         """Get list of installed AUR helpers"""
         return [h for h in self.SUPPORTED_HELPERS.keys() if self.is_helper_installed(h)]
 
-    def install_helper(self, helper_name: str) -> tuple[bool, str]:
-        """Install an AUR helper from source"""
+    def install_helper(self, helper_name: str, use_binary: bool | None = None) -> tuple[bool, str]:
+        """Install an AUR helper, from source or from its prebuilt -bin package
+
+        use_binary=None follows the substitution policy in settings.
+        """
         if helper_name not in self.SUPPORTED_HELPERS:
             return False, f"Unknown AUR helper: {helper_name}"
 
         if not self.is_arch_based:
             return False, "AUR helpers are only available on Arch-based systems"
 
-        helper_info = self.SUPPORTED_HELPERS[helper_name]
-
         try:
-            # Install dependencies first
-            for dep in helper_info["deps"]:
-                subprocess.run(
-                    ["sudo", "pacman", "-S", "--noconfirm", "--needed", dep],
-                    check=True,
-                    capture_output=True
-                )
-
-            # Clone and build in temp directory
-            with tempfile.TemporaryDirectory() as tmpdir:
-                # Clone the repository
-                subprocess.run(
-                    ["git", "clone", helper_info["git_url"]],
-                    cwd=tmpdir,
-                    check=True,
-                    capture_output=True
-                )
-
-                build_dir = os.path.join(tmpdir, helper_name)
-
-                # Build and install
-                subprocess.run(
-                    ["makepkg", "-si", "--noconfirm"],
-                    cwd=build_dir,
-                    check=True
-                )
+            package = helper_name
+            substitute = None
+            if use_binary or (use_binary is None and self.substitution_policy() == "auto"):
+                substitute = self.binary_substitutes([helper_name]).get(helper_name)
+                if substitute:
+                    package = substitute.binary
+
+            # Resolve dependencies from the .SRCINFO, then build (or reuse a cached build)
+            success, failed = self.install_packages([package])
+            if not success:
+                return False, f"Failed to build {package}, see the log in {self.build_log_dir}"
 
             # Update active helper
             self.active_helper = self._detect_aur_helper()
+            if substitute:
+                return True, (f"Successfully installed {helper_name} as {package} "
+                              f"(saved about {format_duration(substitute.seconds_saved)} of build time)")
             return True, f"Successfully installed {helper_name}"
 
         except subprocess.CalledProcessError as e:
@@ -109,84 +127,286 @@ class AURManager:
         if not self.is_helper_installed(helper_name):
             return False, f"{helper_name} is not installed"
 
+        # the helper may have been installed from its -bin package
+        installed = self.query_installed([helper_name, f"{helper_name}-bin"])
+        package = helper_name if installed.get(helper_name) or not installed.get(f"{helper_name}-bin") \
+            else f"{helper_name}-bin"
+
         try:
-            subprocess.run(
-                ["sudo", "pacman", "-Rns", "--noconfirm", helper_name],
+            get_package_manager().run_privileged(
+                ["pacman", "-Rns", "--noconfirm", package],
                 check=True,
                 capture_output=True
             )
             self.active_helper = self._detect_aur_helper()
             return True, f"Successfully removed {helper_name}"
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, PackageLockError, ConnectionError) as e:
             return False, f"Failed to remove {helper_name}: {e}"
 
+    def update_index(self) -> tuple[bool, str]:
+        """Download the AUR metadata dump and rebuild the offline index"""
+        # DEV_MANAGER_AUR_META may point at a local dump (or another URL), e.g. for offline testing
+        source = os.environ.get("DEV_MANAGER_AUR_META", AUR_META_URL)
+        try:
+            if os.path.exists(source):
+                count = self.index.ingest(source)
+            else:
+                count = self.index.update(source)
+            return True, f"AUR index updated ({count} packages)"
+        except Exception as e:
+            return False, f"Failed to update AUR index: {str(e)}"
+
     def search_aur(self, query: str) -> list[dict]:
-        """Search AUR packages"""
+        """Search AUR packages, from the offline index when there is one"""
+        return list(self.iter_search_aur(query))
+
+    def iter_search_aur(self, query: str, timeout: float = 30, on_process=None):
+        """Yield search results one at a time, as the helper prints them
+
+        on_process, if given, is called with the helper's Popen so another
+        thread can kill it to cancel the search.
+        """
+        if self.index.is_available():
+            try:
+                results = self.index.search(query)
+            except Exception:
+                results = None
+            if results is not None:
+                yield from results
+                return
+
         if not self.active_helper:
-            return []
+            return
 
         try:
-            result = subprocess.run(
+            process = subprocess.Popen(
                 [self.active_helper, "-Ss", query],
-                capture_output=True,
-                text=True,
-                timeout=30
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                stdin=subprocess.DEVNULL,
+                text=True
             )
+        except OSError:
+            return
+        if on_process:
+            on_process(process)
 
-            packages = []
-            lines = result.stdout.strip().split('\n')
-            i = 0
-            while i < len(lines):
-                if lines[i].startswith('aur/'):
-                    parts = lines[i].split()
-                    if len(parts) >= 2:
-                        name_part = parts[0].replace('aur/', '')
-                        version = parts[1] if len(parts) > 1 else "unknown"
-
-                        # Get description from next line if available
-                        description = ""
-                        if i + 1 < len(lines) and not lines[i + 1].startswith('aur/'):
-                            description = lines[i + 1].strip()
-                            i += 1
-
-                        # Extract votes and popularity if present
-                        votes = "0"
-                        popularity = "0"
-                        for part in parts:
-                            if part.startswith('(+'):
-                                votes = part.strip('()+')
-                            elif part.endswith('%'):
-                                popularity = part.strip('%')
-
-                        packages.append({
-                            "name": name_part,
-                            "version": version,
-                            "description": description,
-                            "votes": votes,
-                            "popularity": popularity
-                        })
-                i += 1
-
-            return packages
-
-        except subprocess.TimeoutExpired:
-            return []
-        except Exception:
-            return []
+        # the deadline is checked per line; a silent helper is still bounded by the kill below
+        deadline = time.monotonic() + timeout
+        try:
+            package = None
+            for line in process.stdout:
+                if time.monotonic() > deadline:
+                    break
+                if line[:1].isspace():
+                    # description line belonging to the record above
+                    if package is not None and not package["description"]:
+                        package["description"] = line.strip()
+                    continue
+                if package is not None:
+                    yield package
+                package = self._parse_search_header(line)
+            if package is not None:
+                yield package
+        finally:
+            # also runs when the consumer closes the generator early
+            if process.poll() is None:
+                process.kill()
+            process.stdout.close()
+            process.wait()
+
+    @staticmethod
+    def _parse_search_header(line: str) -> dict | None:
+        """Parse an "aur/name version (+votes popularity%)" line; None for other repositories"""
+        if not line.startswith('aur/'):
+            return None
+        parts = line.split()
+        if len(parts) < 2:
+            return None
+
+        # Extract votes and popularity if present
+        votes = "0"
+        popularity = "0"
+        for i, part in enumerate(parts):
+            if part.startswith('(+'):
+                votes = part.strip('()+')
+                # yay/paru print "(+votes popularity)"
+                if i + 1 < len(parts) and part[-1] != ')':
+                    popularity = parts[i + 1].strip('%()')
+            elif part.endswith('%'):
+                popularity = part.strip('%')
+
+        return {
+            "name": parts[0].replace('aur/', ''),
+            "version": parts[1],
+            "description": "",
+            "votes": votes,
+            "popularity": popularity
+        }
 
     def install_package(self, package_name: str) -> tuple[bool, str]:
         """Install a package from AUR"""
         if not self.active_helper:
             return False, "No AUR helper installed"
 
+        profile = self.build_profile()
+        cmd = [self.active_helper, "-S", "--noconfirm", package_name]
+        config = makepkg_config(profile)
+        if config and self.active_helper in ("yay", "paru"):
+            cmd[2:2] = ["--makepkgconf", config]
+
         try:
-            subprocess.run(
-                [self.active_helper, "-S", "--noconfirm", package_name],
-                check=True
-            )
+            # the helper runs pacman itself, past run_privileged's lock handling
+            get_package_manager().wait_for_lock()
+            started = time.monotonic()
+            subprocess.run(cmd, check=True)
+            record_build_time(package_name, f"{profile} ({self.active_helper})", time.monotonic() - started)
             return True, f"Successfully installed {package_name}"
         except subprocess.CalledProcessError:
             return False, f"Failed to install {package_name}"
+        except PackageLockError as e:
+            return False, f"Failed to install {package_name}: {e}"
+
+    @staticmethod
+    def substitution_policy() -> str:
+        """"auto", "ask" or "never" use prebuilt -bin packages, from settings"""
+        policy = load_settings().get("aur_bin_substitution", "ask")
+        return policy if policy in SUBSTITUTION_POLICIES else "ask"
+
+    def binary_substitutes(self, package_names: list[str]) -> dict[str, BinarySubstitute]:
+        """Prebuilt -bin variants of source packages, with the build time they would save"""
+        substitutes = {}
+        for name in package_names:
+            if name.endswith("-bin"):
+                continue
+            variant = self._find_binary_variant(name)
+            if variant:
+                substitutes[name] = BinarySubstitute(name, variant, self.estimated_build_time(name))
+        return substitutes
+
+    def _find_binary_variant(self, name: str) -> str | None:
+        if self.index.is_available():
+            try:
+                record = self.index.find_binary_variant(name)
+                return record["name"] if record else None
+            except Exception:
+                pass
+
+        # no local metadata, ask the AUR directly
+        query = urllib.parse.urlencode({"arg[]": f"{name}-bin"})
+        try:
+            with urllib.request.urlopen(f"{AUR_RPC_INFO_URL}?{query}", timeout=10) as response:
+                results = json.load(response).get("results", [])
+        except (OSError, ValueError):
+            return None
+        return results[0]["Name"] if results else None
+
+    def estimated_build_time(self, name: str) -> float:
+        """Seconds a source build of `name` takes: measured if we built it before, else guessed from its toolchain"""
+        record = None
+        if self.index.is_available():
+            try:
+                record = self.index.get(name)
+            except Exception:
+                record = None
+        base = record["base"] if record else name
+
+        measured = [entry["seconds"] for entry in read_build_times() if entry["base"] in (base, name)]
+        if measured:
+            return sum(measured) / len(measured)
+
+        makedepends = {strip_version(dep) for dep in (record or {}).get("makedepends", "").split()}
+        return max((BUILD_TIME_ESTIMATES[dep] for dep in makedepends if dep in BUILD_TIME_ESTIMATES),
+                   default=DEFAULT_BUILD_TIME_ESTIMATE)
+
+    def plan_install(self, package_names: list[str]) -> BuildPlan:
+        """Resolve the dependencies of AUR packages into a build plan, without installing anything"""
+        self._ensure_build_tools()
+        pipeline = AURBuildPipeline(log_dir=self.build_log_dir)
+        os.makedirs(self.build_log_dir, exist_ok=True)
+        with open(os.path.join(self.build_log_dir, f"resolve-{time.strftime('%Y%m%d-%H%M%S')}.log"), "w") as log:
+            resolver = AURDependencyResolver(
+                checkout=lambda base: pipeline.checkout(base, log),
+                find_aur_provider=self._find_aur_provider
+            )
+            return resolver.plan(package_names)
+
+    def install_packages(self, package_names: list[str], on_result=None,
+                         plan: BuildPlan | None = None) -> tuple[bool, list[str]]:
+        """Build several AUR packages and their dependencies and install them, returns (success, failed packages)
+
+        Repository dependencies go in one pacman transaction; AUR packages are
+        built level by level, the packages of a level in parallel.
+        """
+        if not self.is_arch_based:
+            return False, list(package_names)
+
+        try:
+            plan = plan or self.plan_install(package_names)
+        except (ValueError, subprocess.CalledProcessError, OSError, PackageLockError):
+            return False, list(package_names)
+        if plan.unresolved:
+            return False, plan.unresolved
+
+        if plan.repo_deps:
+            try:
+                result = run_mutation(
+                    f"Install dependencies of {', '.join(plan.targets)}",
+                    lambda: get_package_manager().run_privileged(
+                        ["pacman", "-S", "--noconfirm", "--needed", "--asdeps"] + plan.repo_deps,
+                        capture_output=True
+                    )
+                )
+            except (PackageLockError, ConnectionError):
+                return False, list(plan.targets)
+            if result.returncode != 0:
+                return False, list(plan.targets)
+
+        pipeline = AURBuildPipeline(log_dir=self.build_log_dir, base_for=lambda name: plan.bases.get(name, name),
+                                    profile=self.build_profile())
+        failed = []
+        for number, level in enumerate(plan.levels):
+            results = pipeline.run(level, on_result, as_deps=set(plan.aur_deps))
+            failed += [name for name, result in results.items() if not result.success]
+            if failed:
+                # everything in later levels depends on something that didn't build
+                skipped = [name for later in plan.levels[number + 1:] for name in later]
+                for name in skipped:
+                    if on_result:
+                        on_result(BuildResult(name, False, [], "", 0.0, "A dependency failed to build"))
+                failed += skipped
+                break
+        return not failed, failed
+
+    @staticmethod
+    def build_profile() -> str:
+        """The makepkg build profile chosen in settings"""
+        profile = load_settings().get("aur_build_profile", "default")
+        return profile if profile in BUILD_PROFILES else "default"
+
+    def _ensure_build_tools(self):
+        """Install git and base-devel if missing; cloning and makepkg need them"""
+        missing = AURDependencyResolver.unsatisfied(BUILD_TOOLS)
+        if missing:
+            run_mutation(
+                f"Install {', '.join(sorted(missing))}",
+                lambda: get_package_manager().run_privileged(
+                    ["pacman", "-S", "--noconfirm", "--needed"] + sorted(missing),
+                    check=True,
+                    capture_output=True
+                )
+            )
+
+    def _find_aur_provider(self, dependency: str) -> tuple[str, str] | None:
+        """(package, base) of the AUR package satisfying a dependency"""
+        if not self.index.is_available():
+            # without the index, assume a same-named AUR package; the resolver drops it if it doesn't exist
+            return dependency, dependency
+        try:
+            record = self.index.find_provider(dependency)
+        except Exception:
+            return dependency, dependency
+        return (record["name"], record["base"]) if record else None
 
     def remove_package(self, package_name: str) -> tuple[bool, str]:
         """Remove an AUR package"""
@@ -194,6 +414,7 @@ class AURManager:
             return False, "No AUR helper installed"
 
         try:
+            get_package_manager().wait_for_lock()
             subprocess.run(
                 [self.active_helper, "-Rns", "--noconfirm", package_name],
                 check=True
@@ -201,21 +422,26 @@ class AURManager:
             return True, f"Successfully removed {package_name}"
         except subprocess.CalledProcessError:
             return False, f"Failed to remove {package_name}"
+        except PackageLockError as e:
+            return False, f"Failed to remove {package_name}: {e}"
 
     def is_package_installed(self, package_name: str) -> bool:
         """Check if a package is installed"""
-        try:
-            subprocess.run(
-                ["pacman", "-Qi", package_name],
-                check=True,
-                capture_output=True
-            )
-            return True
-        except subprocess.CalledProcessError:
-            return False
+        return self.query_installed([package_name])[package_name] is not None
+
+    def query_installed(self, package_names: list[str]) -> dict[str, str | None]:
+        """Installed version (or None) for each package, in one bulk lookup"""
+        return get_package_manager().query_many(package_names)
 
     def get_installed_aur_packages(self) -> list[dict]:
         """Get list of installed foreign (AUR) packages"""
+        # foreign packages are the installed ones that no sync repository provides
+        local = read_pacman_local()
+        repo_names = read_pacman_sync_names() if local is not None else None
+        if local is not None and repo_names is not None:
+            return [{"name": name, "version": info.version}
+                    for name, info in sorted(local.items()) if name not in repo_names]
+
         try:
             result = subprocess.run(
                 ["pacman", "-Qm"],
@@ -235,3 +461,10 @@ class AURManager:
             return packages
         except Exception:
             return []
+
+
+def format_duration(seconds: float) -> str:
+    """Short duration for messages, like 45 s or 12 min"""
+    if seconds < 90:
+        return f"{int(seconds)} s"
+    return f"{round(seconds / 60)} min"
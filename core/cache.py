@@ -0,0 +1,183 @@
+# core/cache.py
+import marshal
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+
+CACHE_DIR = os.path.expanduser("~/.cache/dev_manager")
+DEFAULT_CACHE_FILE = os.path.join(CACHE_DIR, "cache.bin")
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    stored_at: float
+    fresh: bool
+
+
+class DiskCache:
+    """Small persistent stale-while-revalidate cache.
+
+    Entries carry a TTL that only decides whether they are fresh; stale
+    entries are still returned so the UI can render them while the caller
+    revalidates. Entries are evicted once older than `max_stale` or, oldest
+    first, when the file would grow past `max_bytes`.
+
+    File layout: magic, format version, then for each entry
+    key length (u16), key, stored_at (f64), ttl (f64), payload length (u32)
+    and the marshal-encoded payload. Keys are stored as "name@vN" so a
+    change in a value's shape only needs a version bump.
+    """
+
+    MAGIC = b"DMC\0"
+    FORMAT_VERSION = 1
+    HEADER = struct.Struct(">4sH")
+    ENTRY = struct.Struct(">H")
+    ENTRY_META = struct.Struct(">ddI")
+
+    def __init__(self, path: str = DEFAULT_CACHE_FILE, max_bytes: int = 4 * 1024 * 1024,
+                 max_stale: float = 30 * 24 * 3600):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_stale = max_stale
+        self._lock = threading.Lock()
+        self._entries = None  # key -> (stored_at, ttl, payload bytes)
+
+    def get(self, key: str, version: int = 1) -> CacheEntry | None:
+        with self._lock:
+            entries = self._load()
+            item = entries.get(f"{key}@v{version}")
+        if item is None:
+            return None
+        stored_at, ttl, payload = item
+        try:
+            value = marshal.loads(payload)
+        except (EOFError, ValueError, TypeError):
+            return None
+        return CacheEntry(value, stored_at, time.time() - stored_at < ttl)
+
+    def set(self, key: str, value, ttl: float, version: int = 1):
+        payload = marshal.dumps(value)
+        with self._lock:
+            entries = self._load()
+            entries[f"{key}@v{version}"] = (time.time(), ttl, payload)
+            self._save(entries)
+
+    def delete(self, key: str, version: int = 1):
+        with self._lock:
+            entries = self._load()
+            if entries.pop(f"{key}@v{version}", None) is not None:
+                self._save(entries)
+
+    def _load(self) -> dict:
+        """Read the cache file once; call with the lock held"""
+        if self._entries is not None:
+            return self._entries
+
+        self._entries = {}
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return self._entries
+
+        try:
+            magic, version = self.HEADER.unpack_from(data, 0)
+            if magic != self.MAGIC or version != self.FORMAT_VERSION:
+                return self._entries
+            pos = self.HEADER.size
+            while pos < len(data):
+                (key_length,) = self.ENTRY.unpack_from(data, pos)
+                pos += self.ENTRY.size
+                key = data[pos:pos + key_length].decode()
+                pos += key_length
+                stored_at, ttl, payload_length = self.ENTRY_META.unpack_from(data, pos)
+                pos += self.ENTRY_META.size
+                self._entries[key] = (stored_at, ttl, data[pos:pos + payload_length])
+                pos += payload_length
+        except (struct.error, UnicodeDecodeError):
+            # a truncated or corrupt file only costs us the cache
+            self._entries = {}
+        return self._entries
+
+    def _save(self, entries: dict):
+        """Evict, then atomically rewrite the file; call with the lock held"""
+        now = time.time()
+        for key in [k for k, (stored_at, _, _) in entries.items() if now - stored_at > self.max_stale]:
+            del entries[key]
+
+        def entry_size(item):
+            key, (_, _, payload) = item
+            return self.ENTRY.size + len(key.encode()) + self.ENTRY_META.size + len(payload)
+
+        total = self.HEADER.size + sum(entry_size(item) for item in entries.items())
+        for item in sorted(entries.items(), key=lambda item: item[1][0]):
+            if total <= self.max_bytes:
+                break
+            total -= entry_size(item)
+            del entries[item[0]]
+
+        parts = [self.HEADER.pack(self.MAGIC, self.FORMAT_VERSION)]
+        for key, (stored_at, ttl, payload) in entries.items():
+            encoded_key = key.encode()
+            parts.append(self.ENTRY.pack(len(encoded_key)))
+            parts.append(encoded_key)
+            parts.append(self.ENTRY_META.pack(stored_at, ttl, len(payload)))
+            parts.append(payload)
+
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(b"".join(parts))
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+
+class MemoryCache:
+    """In-memory LRU cache whose entries expire `ttl` seconds after being stored"""
+
+    def __init__(self, max_entries: int = 32, ttl: float = 300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if time.monotonic() - item[0] >= self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_disk_cache() -> DiskCache:
+    """The process-wide dashboard/page data cache"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = DiskCache()
+        return _shared_cache
@@ -0,0 +1,183 @@
+# core/downloads.py
+import hashlib
+import json
+import os
+import re
+import subprocess
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from core.cache import CACHE_DIR
+
+
+# the privileged helper copies what is prefetched here into apt's own cache
+# before an install, and pacman gets its directory as an extra cache
+# directory, so the archives prefetched here are the ones they install
+APT_ARCHIVES_DIR = os.path.join(CACHE_DIR, "apt", "archives")
+APT_SYSTEM_ARCHIVES_DIR = "/var/cache/apt/archives"
+PACMAN_CACHE_DIR = os.path.join(CACHE_DIR, "pacman", "pkg")
+PACMAN_SYSTEM_CACHE_DIR = "/var/cache/pacman/pkg"
+DOWNLOAD_TIMES_FILE = os.path.join(CACHE_DIR, "download_times.jsonl")
+
+# 'http://deb.debian.org/debian/pool/main/h/htop/htop_3.2.2-2_amd64.deb' htop_3.2.2-2_amd64.deb 152532 SHA256:5f1c...
+APT_URI_PATTERN = re.compile(
+    r"^'(?P<url>[^']+)'\s+(?P<filename>\S+)\s+(?P<size>\d+)(?:\s+(?P<algorithm>[\w-]+):(?P<digest>[0-9a-fA-F]+))?"
+)
+HASH_NAMES = {"MD5Sum": "md5", "MD5": "md5", "SHA1": "sha1", "SHA256": "sha256", "SHA512": "sha512"}
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ArchiveURI(NamedTuple):
+    url: str
+    filename: str
+    size: int
+    algorithm: str | None
+    digest: str | None
+
+
+class DownloadTiming(NamedTuple):
+    """How long the download phase of one transaction took"""
+    manager: str
+    parallel: int
+    packages: int
+    seconds: float
+    bytes: int | None = None
+
+    def describe(self) -> str:
+        size = f", {self.bytes / 1_000_000:.1f} MB" if self.bytes else ""
+        return (f"Downloaded {self.packages} package{'s' if self.packages != 1 else ''} "
+                f"in {self.seconds:.1f}s ({self.parallel} parallel{size})")
+
+
+def apt_print_uris(names: list[str], archives_dir: str = APT_ARCHIVES_DIR,
+                   cache_dirs: tuple[str, ...] = ()) -> list[ArchiveURI]:
+    """The archives apt would download to install `names`, leaving out those already in archives_dir or cache_dirs"""
+    try:
+        result = subprocess.run(
+            ["apt-get", "install", "--print-uris", "-qq", "-y", "-oDebug::NoLocking=1",
+             f"-oDir::Cache::archives={archives_dir}/"] + names,
+            capture_output=True, text=True,
+        )
+    except OSError:
+        return []
+    uris = []
+    for line in result.stdout.splitlines():
+        match = APT_URI_PATTERN.match(line)
+        if match and not any(os.path.exists(os.path.join(d, match["filename"])) for d in cache_dirs):
+            uris.append(ArchiveURI(match["url"], match["filename"], int(match["size"]),
+                                   match["algorithm"], match["digest"]))
+    return uris
+
+
+def _fetch(uri: ArchiveURI, archives_dir: str, timeout: float) -> int:
+    """Download one archive into archives_dir, through partial/ like apt does; returns its size"""
+    partial = os.path.join(archives_dir, "partial", uri.filename)
+    digest = hashlib.new(HASH_NAMES.get(uri.algorithm, uri.algorithm.lower())) if uri.algorithm else None
+    size = 0
+    try:
+        with urllib.request.urlopen(uri.url, timeout=timeout) as response, open(partial, "wb") as f:
+            while chunk := response.read(CHUNK_SIZE):
+                f.write(chunk)
+                size += len(chunk)
+                if digest:
+                    digest.update(chunk)
+        if digest and digest.hexdigest() != uri.digest.lower():
+            raise ValueError(f"{uri.filename}: checksum mismatch")
+    except BaseException:
+        try:
+            os.unlink(partial)
+        except OSError:
+            pass
+        raise
+    os.replace(partial, os.path.join(archives_dir, uri.filename))
+    return size
+
+
+def pacman_print_uris(names: list[str], cache_dirs: tuple[str, ...] = ()) -> list[ArchiveURI]:
+    """The packages pacman would download to install `names`, leaving out those already in cache_dirs.
+
+    `pacman -Sp` only reads the sync databases: it needs neither root nor
+    the database lock, so it runs fine while another transaction applies.
+    """
+    try:
+        result = subprocess.run(["pacman", "-Sp", "--needed", "--noconfirm"] + names,
+                                capture_output=True, text=True)
+    except OSError:
+        return []
+    uris = []
+    for line in result.stdout.splitlines():
+        url = line.strip()
+        filename = urllib.parse.unquote(url.rsplit("/", 1)[-1])
+        if "://" not in url or any(os.path.exists(os.path.join(d, filename)) for d in cache_dirs):
+            continue
+        uris.append(ArchiveURI(url, filename, 0, None, None))
+    return uris
+
+
+def prefetch_archives(uris: list[ArchiveURI], parallel: int, archives_dir: str,
+                      timeout: float = 60, cancelled=None) -> tuple[int, int]:
+    """Download archives into archives_dir `parallel` at a time; returns (archives, bytes) fetched.
+
+    apt and pacman fetch one archive at a time per mirror (pacman a few
+    mirrors at once at best). Archives that fail here are simply left for
+    the package manager to download during the install.
+    """
+    os.makedirs(os.path.join(archives_dir, "partial"), exist_ok=True)
+    uris = [uri for uri in uris if uri.url.startswith(("http://", "https://", "ftp://"))]
+    if not uris:
+        return 0, 0
+
+    def fetch(uri):
+        if cancelled and cancelled():
+            return None
+        return _fetch(uri, archives_dir, timeout)
+
+    fetched = total = 0
+    with ThreadPoolExecutor(max_workers=max(1, parallel)) as pool:
+        for future in [pool.submit(fetch, uri) for uri in uris]:
+            try:
+                size = future.result()
+            except (OSError, ValueError):
+                continue
+            if size is not None:
+                total += size
+                fetched += 1
+    return fetched, total
+
+
+def clear_archives(archives_dir: str):
+    """Delete prefetched archives; packages installed from a private directory are left behind in it"""
+    try:
+        entries = os.listdir(archives_dir)
+    except OSError:
+        return
+    for entry in entries:
+        if entry.endswith(".deb") or ".pkg.tar" in entry:
+            try:
+                os.unlink(os.path.join(archives_dir, entry))
+            except OSError:
+                pass
+
+
+def record_download_time(timing: DownloadTiming, path: str = DOWNLOAD_TIMES_FILE):
+    """Append one download phase's wall time, for comparing parallel settings"""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a") as f:
+            f.write(json.dumps({**timing._asdict(), "seconds": round(timing.seconds, 2),
+                                "at": int(time.time())}) + "\n")
+    except OSError:
+        pass
+
+
+def read_download_times(path: str = DOWNLOAD_TIMES_FILE) -> list[dict]:
+    """Every recorded download time, oldest first"""
+    try:
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except (OSError, ValueError):
+        return []
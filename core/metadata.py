@@ -0,0 +1,78 @@
+# core/metadata.py
+import glob
+import json
+import os
+import time
+
+from core.cache import CACHE_DIR
+
+
+# files a metadata refresh rewrites; the newest of them dates the last refresh
+METADATA_FILES = {
+    "apt": ["/var/lib/apt/periodic/update-success-stamp", "/var/lib/apt/lists/*Release",
+            "/var/lib/apt/lists/*_Packages*"],
+    "pacman": ["/var/lib/pacman/sync/*.db"],
+    "dnf": ["/var/cache/dnf/last_makecache", "/var/cache/dnf/*/repodata/repomd.xml",
+            "/var/cache/libdnf5/*/repodata/repomd.xml"],
+    "yum": ["/var/cache/yum/*/*/repomd.xml", "/var/cache/yum/*/*/*/repomd.xml"],
+    "zypper": ["/var/cache/zypp/raw/*/repodata/repomd.xml", "/var/cache/zypp/solv/*/cookie"],
+}
+
+# refreshes we ran ourselves; pacman and apt leave unchanged files untouched,
+# so a refresh that found nothing new doesn't show in the mtimes
+REFRESH_STAMPS_FILE = os.path.join(CACHE_DIR, "metadata_refreshed.json")
+
+
+def _read_stamps(path: str) -> dict:
+    try:
+        with open(path) as f:
+            stamps = json.load(f)
+        return stamps if isinstance(stamps, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def record_refresh(manager: str, path: str = REFRESH_STAMPS_FILE):
+    """Remember that the manager's metadata was refreshed just now"""
+    stamps = _read_stamps(path)
+    stamps[manager] = time.time()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(stamps, f)
+    except OSError:
+        pass
+
+
+def metadata_mtime(manager: str, stamps_path: str = REFRESH_STAMPS_FILE) -> float | None:
+    """When the manager's repository metadata was last refreshed, None if it never was"""
+    times = []
+    for pattern in METADATA_FILES.get(manager, []):
+        for path in glob.glob(pattern):
+            try:
+                times.append(os.stat(path).st_mtime)
+            except OSError:
+                continue
+    stamp = _read_stamps(stamps_path).get(manager)
+    if isinstance(stamp, (int, float)):
+        times.append(stamp)
+    return max(times) if times else None
+
+
+def metadata_age(manager: str, stamps_path: str = REFRESH_STAMPS_FILE) -> float | None:
+    """Seconds since the last metadata refresh, None if it never happened"""
+    mtime = metadata_mtime(manager, stamps_path)
+    if mtime is None:
+        return None
+    return max(0.0, time.time() - mtime)
+
+
+def format_age(seconds: float) -> str:
+    """Metadata age for display, like 45 s, 5 min or 3 days"""
+    if seconds < 60:
+        return f"{int(seconds)} s"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min"
+    if seconds < 2 * 86400:
+        return f"{int(seconds // 3600)} h"
+    return f"{int(seconds // 86400)} days"
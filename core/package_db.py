@@ -0,0 +1,329 @@
+# core/package_db.py
+import mmap
+import os
+import re
+import sqlite3
+import struct
+import tarfile
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
+
+
+PACMAN_LOCAL_DIR = "/var/lib/pacman/local"
+PACMAN_SYNC_DIR = "/var/lib/pacman/sync"
+DPKG_STATUS_FILE = "/var/lib/dpkg/status"
+APT_EXTENDED_STATES = "/var/lib/apt/extended_states"
+RPMDB_PATHS = ["/var/lib/rpm/rpmdb.sqlite", "/usr/lib/sysimage/rpm/rpmdb.sqlite"]
+
+# which on-disk database backs each package manager
+DATABASE_FOR_MANAGER = {
+    "apt": "dpkg",
+    "yum": "rpm",
+    "dnf": "rpm",
+    "zypper": "rpm",
+    "pacman": "pacman",
+}
+
+
+class InstalledPackage(NamedTuple):
+    """One installed package as recorded in the local package database"""
+    version: str
+    size: int | None = None          # installed size in bytes
+    install_date: int | None = None  # unix timestamp
+    reason: str | None = None        # "explicit" or "dependency"
+    depends: tuple = ()              # names it depends on, version constraints dropped
+
+
+def read_installed(manager: str) -> Mapping[str, InstalledPackage] | None:
+    """Read the installed-package database for a package manager without a subprocess.
+
+    Returns None when the database is missing or in a format we can't read,
+    so callers can fall back to the package manager's own tools.
+    """
+    reader = _READERS.get(DATABASE_FOR_MANAGER.get(manager, ""))
+    if reader is None:
+        return None
+    try:
+        return reader()
+    except (OSError, ValueError, sqlite3.Error, struct.error):
+        return None
+
+
+def read_installed_entries(manager: str, names: list[str]) -> dict[str, InstalledPackage | None] | None:
+    """Read only the given packages' entries; None for each that isn't installed.
+
+    Returns None, like read_installed(), when the database can't be read.
+    """
+    reader = _READERS.get(DATABASE_FOR_MANAGER.get(manager, ""))
+    if reader is None:
+        return None
+    try:
+        packages = reader(names=set(names))
+    except (OSError, ValueError, sqlite3.Error, struct.error):
+        return None
+    if packages is None:
+        return None
+    return {name: packages.get(name) for name in names}
+
+
+def read_pacman_local(local_dir: str = PACMAN_LOCAL_DIR,
+                      names: set[str] | None = None) -> Mapping[str, InstalledPackage] | None:
+    """Read every /var/lib/pacman/local/*/desc file, or only those of `names`"""
+    if not os.path.isdir(local_dir):
+        return None
+
+    packages = {}
+    with os.scandir(local_dir) as entries:
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+            # the directories are named name-pkgver-pkgrel
+            if names is not None and entry.name.rsplit("-", 2)[0] not in names:
+                continue
+            try:
+                with open(os.path.join(entry.path, "desc"), encoding="utf-8", errors="replace") as f:
+                    fields = _parse_pacman_desc(f.read())
+            except FileNotFoundError:
+                continue
+            name = fields.get("NAME")
+            if not name:
+                continue
+            packages[name] = InstalledPackage(
+                version=fields.get("VERSION", ""),
+                size=_to_int(fields.get("SIZE")),
+                install_date=_to_int(fields.get("INSTALLDATE")),
+                reason="dependency" if fields.get("REASON") == "1" else "explicit",
+                depends=tuple(_PACMAN_DEPENDENCY_NAME.match(dep).group(0) for dep in fields.get("DEPENDS", [])),
+            )
+    return MappingProxyType(packages)
+
+
+# "glibc>=2.38" -> "glibc"
+_PACMAN_DEPENDENCY_NAME = re.compile(r"[^<>=:]*")
+_PACMAN_LIST_FIELDS = {"DEPENDS"}
+
+
+def _parse_pacman_desc(text: str) -> dict[str, str | list[str]]:
+    """Parse the %FIELD%\\nvalue blocks of a pacman desc file (first value only, every value for list fields)"""
+    fields = {}
+    for block in text.split("\n\n"):
+        lines = block.strip("\n").split("\n")
+        if len(lines) >= 2 and lines[0].startswith("%") and lines[0].endswith("%"):
+            field = lines[0].strip("%")
+            fields[field] = lines[1:] if field in _PACMAN_LIST_FIELDS else lines[1]
+    return fields
+
+
+def read_pacman_sync_db(path: str) -> dict[str, str] | None:
+    """Read name -> version from a pacman sync database tarball.
+
+    Only the member names are needed: each package is a "name-pkgver-pkgrel/"
+    directory. Returns None for compressions tarfile can't open (e.g. zstd).
+    """
+    packages = {}
+    try:
+        with tarfile.open(path) as tar:
+            for member in tar:
+                if not member.isdir():
+                    continue
+                parts = member.name.rstrip("/").rsplit("-", 2)
+                if len(parts) == 3:
+                    packages[parts[0]] = f"{parts[1]}-{parts[2]}"
+    except (tarfile.TarError, OSError, EOFError):
+        return None
+    return packages
+
+
+def read_pacman_sync_names(sync_dir: str = PACMAN_SYNC_DIR) -> set[str] | None:
+    """Names of every package available in the synced repositories"""
+    if not os.path.isdir(sync_dir):
+        return None
+
+    names = set()
+    for filename in os.listdir(sync_dir):
+        if not filename.endswith(".db"):
+            continue
+        packages = read_pacman_sync_db(os.path.join(sync_dir, filename))
+        if packages is None:
+            return None
+        names.update(packages)
+    return names
+
+
+_DPKG_FIELD = re.compile(rb"^(Package|Status|Version|Installed-Size|Depends|Pre-Depends): ?(.*)$", re.MULTILINE)
+# "libc6 (>= 2.34), libtinfo6:amd64 | libncurses6" -> libc6, libtinfo6, libncurses6
+_DPKG_DEPENDENCY_NAME = re.compile(rb"^\s*([^\s(:\[]+)")
+
+
+def read_dpkg_status(path: str = DPKG_STATUS_FILE, extended_states: str = APT_EXTENDED_STATES,
+                     names: set[str] | None = None) -> Mapping[str, InstalledPackage] | None:
+    """Read /var/lib/dpkg/status in one pass through mmap, keeping every package or only `names`.
+
+    dpkg doesn't record install dates; the install reason comes from apt's
+    extended_states file when it exists.
+    """
+    if not os.path.isfile(path):
+        return None
+
+    auto_installed = _read_apt_auto_installed(extended_states)
+    packages = {}
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return MappingProxyType(packages)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            fields = {}
+            # fields of one stanza arrive in order; a new Package field starts the next stanza
+            for match in _DPKG_FIELD.finditer(mm):
+                key = match.group(1)
+                if key == b"Package":
+                    _add_dpkg_package(packages, fields, auto_installed, names)
+                    fields = {}
+                fields[key] = match.group(2)
+            _add_dpkg_package(packages, fields, auto_installed, names)
+    return MappingProxyType(packages)
+
+
+def _add_dpkg_package(packages, fields, auto_installed, names=None):
+    status = fields.get(b"Status", b"")
+    if not status.endswith(b" installed") or b"Package" not in fields:
+        return
+    name = fields[b"Package"].decode()
+    if name in packages or (names is not None and name not in names):
+        # another architecture of a multi-arch package, or one we weren't asked for
+        return
+    size = _to_int(fields.get(b"Installed-Size"))
+    depends = []
+    for key in (b"Pre-Depends", b"Depends"):
+        for alternative in re.split(rb"[,|]", fields.get(key, b"")):
+            match = _DPKG_DEPENDENCY_NAME.match(alternative)
+            if match:
+                depends.append(match.group(1).decode())
+    packages[name] = InstalledPackage(
+        version=fields.get(b"Version", b"").decode(),
+        size=size * 1024 if size is not None else None,
+        reason="dependency" if name in auto_installed else "explicit",
+        depends=tuple(dict.fromkeys(depends)),
+    )
+
+
+def _read_apt_auto_installed(path: str) -> set[str]:
+    auto = set()
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            name = None
+            for line in f:
+                if line.startswith("Package:"):
+                    name = line.split(":", 1)[1].strip()
+                elif line.startswith("Auto-Installed:") and line.split(":", 1)[1].strip() == "1":
+                    auto.add(name)
+    except OSError:
+        pass
+    return auto
+
+
+# rpm header tags and types we need
+RPMTAG_NAME = 1000
+RPMTAG_VERSION = 1001
+RPMTAG_RELEASE = 1002
+RPMTAG_EPOCH = 1003
+RPMTAG_INSTALLTIME = 1008
+RPMTAG_SIZE = 1009
+RPMTAG_ARCH = 1022
+RPMTAG_LONGSIZE = 5009
+
+RPM_INT32_TYPE = 4
+RPM_INT64_TYPE = 5
+RPM_STRING_TYPE = 6
+
+_RPM_WANTED_TAGS = {RPMTAG_NAME, RPMTAG_VERSION, RPMTAG_RELEASE, RPMTAG_EPOCH,
+                    RPMTAG_INSTALLTIME, RPMTAG_SIZE, RPMTAG_ARCH, RPMTAG_LONGSIZE}
+
+
+# the installed packages providing what each package requires, from rpm's index tables
+_RPM_DEPENDS_QUERY = (
+    "SELECT DISTINCT r.hnum, n.key FROM Requirename r "
+    "JOIN Providename p ON p.key = r.key JOIN Name n ON n.hnum = p.hnum "
+    "WHERE n.hnum != r.hnum"
+)
+
+
+def read_rpmdb(path: str | None = None, names: set[str] | None = None) -> Mapping[str, InstalledPackage] | None:
+    """Read the rpm sqlite database (rpm >= 4.16) and decode each package header, or only those of `names`.
+
+    Requirements are resolved to the installed packages providing them.
+    Older Berkeley DB databases aren't supported and return None.
+    """
+    if path is None:
+        path = next((p for p in RPMDB_PATHS if os.path.isfile(p)), None)
+        if path is None:
+            return None
+
+    packages = {}
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        if names is None:
+            rows = conn.execute("SELECT hnum, blob FROM Packages")
+            depends_rows = conn.execute(_RPM_DEPENDS_QUERY).fetchall()
+        else:
+            placeholders = ", ".join("?" * len(names))
+            selected = f"(SELECT hnum FROM Name WHERE key IN ({placeholders}))"
+            rows = conn.execute(f"SELECT hnum, blob FROM Packages WHERE hnum IN {selected}", tuple(names))
+            depends_rows = conn.execute(f"{_RPM_DEPENDS_QUERY} AND r.hnum IN {selected}", tuple(names)).fetchall()
+        depends = {}
+        for hnum, provider in depends_rows:
+            depends.setdefault(hnum, []).append(provider)
+
+        for hnum, blob in rows:
+            header = parse_rpm_header(blob)
+            name = header.get(RPMTAG_NAME)
+            if not name:
+                continue
+            version = f"{header.get(RPMTAG_VERSION, '')}-{header.get(RPMTAG_RELEASE, '')}"
+            if header.get(RPMTAG_EPOCH):
+                version = f"{header[RPMTAG_EPOCH]}:{version}"
+            packages[name] = InstalledPackage(
+                version=version,
+                size=header.get(RPMTAG_LONGSIZE, header.get(RPMTAG_SIZE)),
+                install_date=header.get(RPMTAG_INSTALLTIME),
+                depends=tuple(sorted(depends.get(hnum, ()))),
+            )
+    finally:
+        conn.close()
+    return MappingProxyType(packages)
+
+
+def parse_rpm_header(blob: bytes) -> dict[int, str | int]:
+    """Decode the scalar tags we care about from an rpm header blob"""
+    index_count, data_length = struct.unpack_from(">II", blob, 0)
+    data_start = 8 + index_count * 16
+    if data_start + data_length > len(blob):
+        raise ValueError("truncated rpm header")
+
+    values = {}
+    for i in range(index_count):
+        tag, tag_type, offset, _count = struct.unpack_from(">IIiI", blob, 8 + i * 16)
+        if tag not in _RPM_WANTED_TAGS:
+            continue
+        pos = data_start + offset
+        if tag_type == RPM_STRING_TYPE:
+            end = blob.index(b"\0", pos)
+            values[tag] = blob[pos:end].decode("utf-8", "replace")
+        elif tag_type == RPM_INT32_TYPE:
+            values[tag] = struct.unpack_from(">I", blob, pos)[0]
+        elif tag_type == RPM_INT64_TYPE:
+            values[tag] = struct.unpack_from(">Q", blob, pos)[0]
+    return values
+
+
+_READERS = {
+    "dpkg": read_dpkg_status,
+    "rpm": read_rpmdb,
+    "pacman": read_pacman_local,
+}
+
+
+def _to_int(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,278 @@
+# core/package_lock.py
+import ctypes
+import ctypes.util
+import os
+import re
+import select
+import struct
+import time
+from typing import NamedTuple
+
+
+# how each package manager locks its database: "fcntl" files are held with a
+# POSIX/flock lock, "exists" files are locks for as long as they exist and
+# "pidfile" files hold the PID of the process that owns the lock
+LOCK_FILES = {
+    "apt": [("/var/lib/dpkg/lock-frontend", "fcntl"), ("/var/lib/dpkg/lock", "fcntl"),
+            ("/var/lib/apt/lists/lock", "fcntl"), ("/var/cache/apt/archives/lock", "fcntl")],
+    "pacman": [("/var/lib/pacman/db.lck", "exists")],
+    "dnf": [("/var/lib/rpm/.rpm.lock", "fcntl")],
+    "yum": [("/var/run/yum.pid", "pidfile"), ("/var/lib/rpm/.rpm.lock", "fcntl")],
+    "zypper": [("/run/zypp.pid", "pidfile"), ("/var/lib/rpm/.rpm.lock", "fcntl")],
+}
+
+# processes that take the lock when nothing else identifies the owner
+LOCK_OWNERS = {
+    "apt": ("apt", "apt-get", "aptitude", "dpkg", "unattended-upgr", "packagekitd", "synaptic"),
+    "pacman": ("pacman", "yay", "paru", "pamac", "pamac-daemon", "packagekitd"),
+    "dnf": ("dnf", "dnf-automatic", "yum", "rpm", "packagekitd"),
+    "yum": ("yum", "rpm", "packagekitd"),
+    "zypper": ("zypper", "rpm", "packagekitd", "purge-kernels"),
+}
+
+# what a command prints when it lost a race for the lock
+LOCK_ERROR_PATTERN = re.compile(
+    r"Could not get lock|Unable to acquire the dpkg frontend lock|unable to lock database"
+    r"|can't create transaction lock|System management is locked",
+    re.IGNORECASE,
+)
+
+PROC_LOCKS_PATTERN = re.compile(
+    r"^\d+:\s+(?P<waiting>->\s+)?\S+\s+\S+\s+\S+\s+(?P<pid>-?\d+)\s+"
+    r"(?P<major>[0-9a-f]+):(?P<minor>[0-9a-f]+):(?P<inode>\d+)\s"
+)
+
+IN_CLOSE_WRITE = 0x08
+IN_CLOSE_NOWRITE = 0x10
+IN_MOVED_FROM = 0x40
+IN_DELETE = 0x200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+# notifications can be missed (no inotify, no pidfd, an unreadable directory);
+# the lock is looked at again at least this often regardless
+RECHECK_INTERVAL = 2.0
+
+STALE_LOCK = "stale lock file"
+
+
+class PackageLockError(RuntimeError):
+    """The package database is locked and waiting won't (or didn't) help"""
+
+
+class PackageLockTimeout(PackageLockError, TimeoutError):
+    """The package database stayed locked for longer than the configured wait"""
+
+
+class LockHolder(NamedTuple):
+    path: str
+    pid: int | None
+    name: str
+
+    def describe(self) -> str:
+        if self.pid is None:
+            return f"{self.name or 'another process'} ({self.path})"
+        return f"{self.name or 'process'} (pid {self.pid})"
+
+
+def _process_name(pid: int) -> str:
+    try:
+        with open(f"/proc/{pid}/comm") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def _posix_lock_owners(path: str) -> list[int] | None:
+    """PIDs holding a lock on `path` according to /proc/locks; None if unknown.
+
+    /proc/locks is world readable, unlike the lock files themselves, so this
+    works without root. OFD locks report pid -1, which is returned as-is.
+    """
+    try:
+        st = os.stat(path)
+        with open("/proc/locks") as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+    owners = []
+    for line in lines:
+        match = PROC_LOCKS_PATTERN.match(line)
+        if (match and not match["waiting"] and int(match["inode"]) == st.st_ino
+                and int(match["major"], 16) == os.major(st.st_dev)
+                and int(match["minor"], 16) == os.minor(st.st_dev)):
+            owners.append(int(match["pid"]))
+    return owners
+
+
+def _open_file_owner(path: str) -> int | None:
+    """A process with `path` open, found through /proc/*/fd (only visible for our own processes unless root)"""
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        fd_dir = f"/proc/{entry}/fd"
+        try:
+            for fd in os.listdir(fd_dir):
+                if os.readlink(os.path.join(fd_dir, fd)) == path:
+                    return int(entry)
+        except OSError:
+            continue
+    return None
+
+
+def _running_owner(manager: str) -> int | None:
+    """A running process of a known lock-taking program"""
+    names = LOCK_OWNERS.get(manager, ())
+    for entry in os.listdir("/proc"):
+        if entry.isdigit() and int(entry) != os.getpid() and _process_name(int(entry)) in names:
+            return int(entry)
+    return None
+
+
+def lock_holders(manager: str) -> list[LockHolder]:
+    """Who currently holds the package manager's locks; empty when it is free"""
+    holders = []
+    for path, kind in LOCK_FILES.get(manager, []):
+        if not os.path.exists(path):
+            continue
+        if kind == "fcntl":
+            pids = [pid for pid in (_posix_lock_owners(path) or []) if pid != os.getpid()]
+            if not pids:
+                continue
+            pid = pids[0] if pids[0] > 0 else _open_file_owner(path) or _running_owner(manager)
+            if pid is None:
+                holders.append(LockHolder(path, None, "another process"))
+                continue
+        elif kind == "pidfile":
+            try:
+                with open(path) as f:
+                    pid = int(f.read().split()[0])
+            except (OSError, ValueError, IndexError):
+                continue
+            if not os.path.exists(f"/proc/{pid}"):
+                continue  # left behind by a process that has exited
+        else:
+            pid = _open_file_owner(path) or _running_owner(manager)
+            if pid is None:
+                # nothing that takes the lock is running; a crashed run left it behind
+                holders.append(LockHolder(path, None, STALE_LOCK))
+                continue
+        holders.append(LockHolder(path, pid, _process_name(pid)))
+    return holders
+
+
+class _Inotify:
+    """Just enough of inotify(7), through libc, to be woken when lock files change"""
+
+    def __init__(self):
+        self.fd = None
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            return
+        try:
+            self.libc = ctypes.CDLL(libc_name, use_errno=True)
+            fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return
+        if fd >= 0:
+            self.fd = fd
+
+    def watch(self, directory: str, mask: int) -> bool:
+        if self.fd is None:
+            return False
+        return self.libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) >= 0
+
+    def names(self) -> set[str]:
+        """Names of the files the pending events are about"""
+        names = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return names
+        offset = 0
+        while offset + 16 <= len(data):
+            _, _, _, length = struct.unpack_from("iIII", data, offset)
+            names.add(data[offset + 16:offset + 16 + length].rstrip(b"\0").decode(errors="replace"))
+            offset += 16 + length
+        return names
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def wait_for_locks(manager: str, timeout: float, on_wait=None, cancelled=None) -> float:
+    """Block until nothing holds the package manager's locks; returns the seconds waited.
+
+    Waiting is notification based: a pidfd (readable once the owner exits)
+    and an inotify watch on the lock directories (a lock file closed or
+    deleted) wake the wait, so release is noticed immediately without
+    polling. on_wait(holder) is called whenever the owner changes, and
+    cancelled() is checked between wake-ups. Raises PackageLockTimeout
+    when the lock is still held after `timeout` seconds, naming the owner.
+    """
+    started = time.monotonic()
+    holders = lock_holders(manager)
+    if not holders:
+        return 0.0
+
+    inotify = _Inotify()
+    lock_names = set()
+    for path, _ in LOCK_FILES.get(manager, []):
+        inotify.watch(os.path.dirname(path), IN_CLOSE_WRITE | IN_CLOSE_NOWRITE | IN_DELETE | IN_MOVED_FROM)
+        lock_names.add(os.path.basename(path))
+
+    last_holder = None
+    pidfd = None
+    try:
+        while holders:
+            holder = holders[0]
+            if holder.name == STALE_LOCK:
+                raise PackageLockError(
+                    f"{holder.path} is locked but no package manager is running; "
+                    f"if nothing else is installing, remove the stale lock file"
+                )
+            if holder != last_holder:
+                last_holder = holder
+                if on_wait:
+                    on_wait(holder)
+                if pidfd is not None:
+                    os.close(pidfd)
+                    pidfd = None
+                if holder.pid and hasattr(os, "pidfd_open"):
+                    try:
+                        pidfd = os.pidfd_open(holder.pid)
+                    except OSError:
+                        pidfd = None
+
+            remaining = timeout - (time.monotonic() - started)
+            if remaining <= 0:
+                raise PackageLockTimeout(
+                    f"Timed out after {int(timeout)}s waiting for {holder.describe()} "
+                    f"to release {holder.path}"
+                )
+
+            poller = select.poll()
+            if pidfd is not None:
+                poller.register(pidfd, select.POLLIN)
+            if inotify.fd is not None:
+                poller.register(inotify.fd, select.POLLIN)
+            events = poller.poll(min(remaining, RECHECK_INTERVAL) * 1000)
+            changed = not events
+            for fd, _ in events:
+                if fd == inotify.fd:
+                    # events on other files in /var/lib/dpkg and the like don't count
+                    changed |= bool(inotify.names() & lock_names)
+                else:
+                    changed = True
+
+            if cancelled and cancelled():
+                break
+            if changed:
+                holders = lock_holders(manager)
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+        inotify.close()
+    return time.monotonic() - started
@@ -1,11 +1,72 @@
+import html
+import logging
 import subprocess
 import shutil
 import platform
+import threading
+import re
+import os
+import time
+
+from core.cache import CACHE_DIR
+from core.downloads import (APT_ARCHIVES_DIR, APT_SYSTEM_ARCHIVES_DIR, PACMAN_CACHE_DIR, PACMAN_SYSTEM_CACHE_DIR,
+                            DownloadTiming, apt_print_uris, clear_archives, pacman_print_uris, prefetch_archives,
+                            record_download_time)
+from core.metadata import metadata_age, record_refresh
+from core.package_lock import LOCK_ERROR_PATTERN, PackageLockError, lock_holders, wait_for_locks
+from core.package_state import InstalledStateCache
+from core.privileged_helper import PrivilegedHelper, expand_options
+from core.progress import ProgressThrottle, TransactionProgress, with_status_option
+from core.settings import load_settings
+from core.updates import find_updates
+
+
+# output lines that name the package a failed transaction tripped over
+FAILURE_PATTERNS = {
+    "apt": [
+        re.compile(r"Unable to locate package (\S+)"),
+        re.compile(r"Package '(\S+)' has no installation candidate"),
+        re.compile(r"Couldn't find any package by (?:glob|regex) '(\S+)'"),
+    ],
+    "pacman": [
+        re.compile(r"target not found: (\S+)"),
+        re.compile(r"^(\S+): \S+ exists in filesystem", re.MULTILINE),
+        re.compile(r"removing (\S+) breaks dependency"),
+    ],
+    "dnf": [
+        re.compile(r"No match for argument: (\S+)"),
+        re.compile(r"Unable to find a match: (.+)"),
+        re.compile(r"No package (\S+) available"),
+    ],
+    "zypper": [
+        re.compile(r"Package '(\S+)' not found"),
+        re.compile(r"No provider of '(\S+)' found"),
+    ],
+}
+FAILURE_PATTERNS["yum"] = FAILURE_PATTERNS["dnf"]
+
+# fetch a transaction's packages without installing them, so downloading is timed on its own
+DOWNLOAD_COMMANDS = {
+    "yum": ["yum", "install", "-y", "--downloadonly"],
+    "dnf": ["dnf", "install", "-y", "--downloadonly"],
+    "zypper": ["zypper", "install", "-y", "--download-only"],
+}
+
+# managers whose archives can be fetched ahead without root or the database lock,
+# into a directory the install then reads them from
+PREFETCH_DIRS = {"apt": APT_ARCHIVES_DIR, "pacman": PACMAN_CACHE_DIR}
+
+# where --parallel-downloads=N is expanded into generated configs when no helper runs
+CONFIG_DIR = os.path.join(CACHE_DIR, "config")
+
+logger = logging.getLogger(__name__)
 
 class PackageManager:
     def __init__(self):
         self.manager = self._detect_package_manager()
         self.distro = self._detect_distro()
+        self.state = InstalledStateCache(self.manager, self._query_subprocess)
+        self.helper = None
 
     # linux_distribution detection
     def _detect_distro(self):
@@ -56,8 +117,95 @@ class PackageManager:
         else:
             raise EnvironmentError("No privilege escalation method found.")
 
-    # install a package
-    def install(self, package: str) -> bool:
+    # run a package-manager command as root, through the session helper when it's enabled;
+    # waits while another process holds the package database, and retries once if it lost the race.
+    # With on_progress the output is streamed and parsed into throttled ProgressEvents as it arrives.
+    # The output is always captured in the result; capture_output stays for the callers that pass it
+    def run_privileged(self, cmd: list[str], check: bool = False, capture_output: bool = False,
+                       on_progress=None) -> subprocess.CompletedProcess:
+        on_output = None
+        if on_progress is not None:
+            cmd = with_status_option(self.manager, cmd)
+            parser = TransactionProgress(self.manager)
+            throttle = ProgressThrottle(on_progress)
+
+            def on_output(line):
+                event = parser.feed(line)
+                if event is not None:
+                    throttle(event)
+
+        try:
+            self.wait_for_lock()
+            result = self._run_privileged(cmd, on_output)
+            if result.returncode != 0 and LOCK_ERROR_PATTERN.search((result.stdout or "") + (result.stderr or "")):
+                self.wait_for_lock()
+                result = self._run_privileged(cmd, on_output)
+        finally:
+            if on_progress is not None:
+                throttle.flush()
+        if check and result.returncode != 0:
+            raise subprocess.CalledProcessError(result.returncode, cmd, result.stdout, result.stderr)
+        return result
+
+    # the command's output always comes back in the result (and line by line through on_output),
+    # never on our own stdout
+    def _run_privileged(self, cmd: list[str], on_output=None) -> subprocess.CompletedProcess:
+        helper = self._get_helper()
+        if helper is not None:
+            return helper.run(cmd, on_output)
+        argv = self._get_privilege_command() + expand_options(cmd, CONFIG_DIR)
+        if on_output is None:
+            return subprocess.run(argv, capture_output=True, text=True)
+
+        # stream stdout and stderr together, line by line, like the helper does
+        lines = []
+        with subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              stdin=subprocess.DEVNULL, text=True) as process:
+            for line in process.stdout:
+                lines.append(line)
+                on_output(line.rstrip("\n"))
+            returncode = process.wait()
+        return subprocess.CompletedProcess(argv, returncode, "".join(lines), "")
+
+    # run a command for an API that answers True/False: a failing command, a package database that
+    # stayed locked and a privileged helper that went away all come back as False
+    def _run_checked(self, cmd: list[str], on_progress=None) -> bool:
+        try:
+            self.run_privileged(cmd, check=True, on_progress=on_progress)
+            return True
+        except subprocess.CalledProcessError:
+            return False
+        except (PackageLockError, ConnectionError) as e:
+            logger.warning("%s failed: %s", " ".join(cmd), e)
+            return False
+
+    # who holds the package database lock right now, None when it is free
+    def lock_holder(self):
+        holders = lock_holders(self.manager) if self.manager else []
+        return holders[0] if holders else None
+
+    # block until the package database is free; raises PackageLockTimeout after lock_wait_timeout seconds
+    def wait_for_lock(self, on_wait=None, cancelled=None) -> float:
+        if not self.manager:
+            return 0.0
+        timeout = load_settings().get("lock_wait_timeout", 300)
+        return wait_for_locks(self.manager, timeout, on_wait, cancelled)
+
+    # the persistent helper, started (and authorised) on first use when enabled in settings
+    def _get_helper(self) -> PrivilegedHelper | None:
+        fake = os.environ.get("DEV_MANAGER_FAKE_HELPER") == "1"
+        if not fake and not load_settings().get("persistent_privileges"):
+            return None
+        if self.helper is None:
+            privilege_command = [] if fake else self._get_privilege_command()
+            self.helper = PrivilegedHelper(privilege_command, fake=fake)
+        if not self.helper.is_running and not self.helper.start():
+            # authorisation refused or helper unavailable, fall back to per-operation escalation
+            return None
+        return self.helper
+
+    # install a package; on_progress(ProgressEvent) follows the transaction as it runs
+    def install(self, package: str, on_progress=None) -> bool:
         commands = {
             "apt": ["apt", "install", "-y", package],
             "yum": ["yum", "install", "-y", package],
@@ -67,15 +215,155 @@ class PackageManager:
         }
         if self.manager:
             try:
-                full_cmd = self._get_privilege_command() + commands[self.manager]
-                subprocess.run(full_cmd, check=True)
-                return True
-            except subprocess.CalledProcessError:
-                return False
+                return self._run_checked(commands[self.manager], on_progress=on_progress)
+            finally:
+                self.state.refresh([package])
         return False
 
-    # update package lists
-    def update(self) -> bool:
+    # the parallel_downloads setting
+    def parallel_downloads(self) -> int:
+        try:
+            return max(1, int(load_settings().get("parallel_downloads", 5)))
+        except (TypeError, ValueError):
+            return 5
+
+    # install several packages in one transaction; downloads first, on_download(DownloadTiming) reports how long it took.
+    # Prefetched archives are deleted afterwards unless keep_downloads, when more installs are on their way
+    def install_many(self, packages, on_download=None, keep_downloads: bool = False,
+                     on_progress=None) -> tuple[bool, list[str]]:
+        parallel = self.parallel_downloads()
+        option = f"--parallel-downloads={min(parallel, 99)}"
+        commands = {
+            "apt": ["apt", "install", "-y", option] + (["--import-prefetched"] if self._can_prefetch() else []),
+            "yum": ["yum", "install", "-y", option],
+            "dnf": ["dnf", "install", "-y", option],
+            "pacman": ["pacman", "-S", "--noconfirm", "--needed", option, f"--extra-cachedir={PACMAN_CACHE_DIR}/"],
+            "zypper": ["zypper", "install", "-y", option],
+        }
+        names = list(dict.fromkeys(packages))
+        if names and self.manager:
+            timing = self._download(names, parallel)
+            if timing is not None and on_download:
+                on_download(timing)
+        try:
+            return self._run_transaction(commands, names, on_progress)
+        finally:
+            if not keep_downloads:
+                self.clear_downloads()
+
+    # fetch a transaction's archives ahead of time, without root and without the package database lock,
+    # so it can run while another transaction applies; None when there was nothing left to fetch
+    def prefetch(self, packages, cancelled=None) -> DownloadTiming | None:
+        names = list(dict.fromkeys(packages))
+        if not names or not self._can_prefetch():
+            return None
+        started = time.monotonic()
+        parallel = self.parallel_downloads()
+        directory = PREFETCH_DIRS[self.manager]
+        if self.manager == "apt":
+            uris = apt_print_uris(names, directory, (APT_SYSTEM_ARCHIVES_DIR,))
+        else:
+            uris = pacman_print_uris(names, (PACMAN_SYSTEM_CACHE_DIR, directory))
+        fetched, size = prefetch_archives(uris, parallel, directory, cancelled=cancelled)
+        if not fetched:
+            return None
+        timing = DownloadTiming(self.manager, parallel, fetched, time.monotonic() - started, size)
+        record_download_time(timing)
+        return timing
+
+    # apt's prefetched archives reach its cache through the session helper (a root process
+    # copies them in), so without the helper apt downloads them itself
+    def _can_prefetch(self) -> bool:
+        if self.manager not in PREFETCH_DIRS:
+            return False
+        if self.manager != "apt":
+            return True
+        return os.environ.get("DEV_MANAGER_FAKE_HELPER") == "1" or bool(load_settings().get("persistent_privileges"))
+
+    # delete prefetched archives once nothing is waiting to install them
+    def clear_downloads(self):
+        if self.manager in PREFETCH_DIRS:
+            clear_archives(PREFETCH_DIRS[self.manager])
+
+    # fetch everything a transaction needs, `parallel` at a time, before it runs
+    def _download(self, names: list[str], parallel: int) -> DownloadTiming | None:
+        if self.manager in PREFETCH_DIRS:
+            # anything the download-ahead already fetched is skipped
+            return self.prefetch(names)
+        if self.manager not in DOWNLOAD_COMMANDS or self._get_helper() is None:
+            # without the session helper a separate download step would be a second password prompt
+            return None
+        started = time.monotonic()
+        option = f"--parallel-downloads={min(parallel, 99)}"
+        result = self.run_privileged(DOWNLOAD_COMMANDS[self.manager] + [option] + names, capture_output=True)
+        if result.returncode != 0:
+            # the install itself reports what went wrong
+            return None
+        timing = DownloadTiming(self.manager, parallel, len(names), time.monotonic() - started)
+        record_download_time(timing)
+        return timing
+
+    # remove several packages in one transaction
+    def remove_many(self, packages, on_progress=None) -> tuple[bool, list[str]]:
+        commands = {
+            "apt": ["apt", "remove", "-y"],
+            "yum": ["yum", "remove", "-y"],
+            "dnf": ["dnf", "remove", "-y"],
+            "pacman": ["pacman", "-R", "--noconfirm"],
+            "zypper": ["zypper", "remove", "-y"],
+        }
+        return self._run_transaction(commands, packages, on_progress)
+
+    # run one transaction for a package set, returns (success, failed packages)
+    def _run_transaction(self, commands, packages, on_progress=None) -> tuple[bool, list[str]]:
+        names = list(dict.fromkeys(packages))
+        if not names:
+            return True, []
+        if not self.manager:
+            return False, names
+
+        base_cmd = commands[self.manager]
+        try:
+            result = self.run_privileged(base_cmd + names, capture_output=True, on_progress=on_progress)
+            if result.returncode == 0:
+                return True, []
+
+            failed = self._attribute_failures(result.stdout + result.stderr, names)
+            if not failed or len(failed) == len(names):
+                return False, failed or names
+
+            # the whole transaction was aborted over these packages, retry the rest once
+            rest = [name for name in names if name not in failed]
+            result = self.run_privileged(base_cmd + rest, capture_output=True, on_progress=on_progress)
+            if result.returncode != 0:
+                failed += self._attribute_failures(result.stdout + result.stderr, rest) or rest
+            return False, failed
+        finally:
+            self.state.refresh(names)
+
+    # pick out the packages a failed transaction complained about
+    def _attribute_failures(self, output: str, names: list[str]) -> list[str]:
+        if self.manager == "zypper":
+            # zypper's --xmlout messages come XML-escaped
+            output = html.unescape(output)
+        mentioned = set()
+        for pattern in FAILURE_PATTERNS.get(self.manager, []):
+            for match in pattern.finditer(output):
+                mentioned.update(match.group(1).strip("'\"").split())
+        return [name for name in names if name in mentioned]
+
+    # seconds since the repository metadata was last refreshed, None when it never was
+    def metadata_age(self) -> float | None:
+        return metadata_age(self.manager) if self.manager else None
+
+    # whether the metadata is recent enough, per the metadata_max_age_minutes setting, to skip a refresh
+    def metadata_is_fresh(self) -> bool:
+        age = self.metadata_age()
+        max_age = load_settings().get("metadata_max_age_minutes", 60) * 60
+        return age is not None and age < max_age
+
+    # update package lists, unless they were refreshed within the freshness window
+    def update(self, force: bool = False) -> bool:
         commands = {
             "apt": ["apt", "update"],
             "yum": ["yum", "check-update"],
@@ -84,29 +372,102 @@ class PackageManager:
             "zypper": ["zypper", "refresh"],
         }
         if self.manager:
-            try:
-                full_cmd = self._get_privilege_command() + commands[self.manager]
-                subprocess.run(full_cmd, check=True)
+            if not force and self.metadata_is_fresh():
                 return True
-            except subprocess.CalledProcessError:
+            try:
+                result = self.run_privileged(commands[self.manager])
+            except (PackageLockError, ConnectionError) as e:
+                logger.warning("Refreshing package lists failed: %s", e)
                 return False
+            # check-update exits with 100 when it found updates
+            if result.returncode == 0 or (result.returncode == 100 and self.manager in ("dnf", "yum")):
+                record_refresh(self.manager)
+                return True
+            return False
         return False
 
+    # names of the installed packages with an update available, from the metadata already on disk:
+    # never refreshes it and needs no root. Computed in-process from the package databases when
+    # they can be read, otherwise asked of the package manager in cache-only mode
+    def list_updates(self) -> list[str]:
+        if not self.manager:
+            return []
+        updates = find_updates(self.manager)
+        if updates is not None:
+            return [update.name for update in updates]
+
+        commands = {
+            "apt": ["apt", "list", "--upgradable"],
+            "yum": ["yum", "-C", "-q", "check-update"],
+            "dnf": ["dnf", "-C", "-q", "check-update"],
+            "pacman": ["pacman", "-Qu"],
+            "zypper": ["zypper", "--no-refresh", "-q", "list-updates"],
+        }
+        try:
+            output = subprocess.run(commands[self.manager], capture_output=True, text=True).stdout
+        except OSError:
+            return []
+        names = []
+        for line in output.splitlines():
+            if self.manager == "apt":
+                # htop/stable 3.2.2-2 amd64 [upgradable from: 3.2.1-1]
+                if "/" in line and "[upgradable" in line:
+                    names.append(line.split("/", 1)[0])
+            elif self.manager == "pacman":
+                if line.strip():
+                    names.append(line.split()[0])
+            elif self.manager == "zypper":
+                # v | repository | name | current | available | arch
+                columns = [column.strip() for column in line.split("|")]
+                if len(columns) >= 6 and columns[0] == "v":
+                    names.append(columns[2])
+            else:
+                # htop.x86_64    3.3.0-1.fc39    updates; the "Obsoleting" section is indented
+                columns = line.split()
+                if len(columns) == 3 and not line[0].isspace() and "." in columns[0]:
+                    names.append(columns[0].rsplit(".", 1)[0])
+        return list(dict.fromkeys(names))
+
     # check if a package is installed
     def is_installed(self, package: str) -> bool:
+        return self.query_many([package]).get(package) is not None
+
+    # query install state and installed version for many packages in one call
+    def query_many(self, packages) -> dict[str, str | None]:
+        names = list(dict.fromkeys(packages))
+        if not names:
+            return {}
+
+        return self.state.query(names)
+
+    # ask the package manager's own query tool, one process for all names
+    def _query_subprocess(self, names: list[str]) -> dict[str, str | None]:
+        rpm_query = ["rpm", "-q", "--qf", "%{NAME}\tii\t%|EPOCH?{%{EPOCH}:}:{}|%{VERSION}-%{RELEASE}\n"]
         commands = {
-            "apt": ["dpkg", "-s", package],
-            "yum": ["rpm", "-q", package],
-            "dnf": ["rpm", "-q", package],
-            "pacman": ["pacman", "-Qi", package],
-            "zypper": ["rpm", "-q", package],
+            "apt": ["dpkg-query", "-W", "-f=${Package}\t${db:Status-Abbrev}\t${Version}\n"],
+            "yum": rpm_query,
+            "dnf": rpm_query,
+            "pacman": ["pacman", "-Q"],
+            "zypper": rpm_query,
         }
+        results = dict.fromkeys(names)
         try:
-            subprocess.run(commands[self.manager], check=True,
-                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            return True
-        except subprocess.CalledProcessError:
-            return False
+            # missing packages make these exit non-zero, the found ones are still printed
+            output = subprocess.run(commands[self.manager] + names, capture_output=True,
+                                    text=True).stdout
+        except OSError:
+            return results
+        for line in output.splitlines():
+            if self.manager == "pacman":
+                parts = line.split()
+                if len(parts) == 2 and parts[0] in results:
+                    results[parts[0]] = parts[1]
+                continue
+            parts = line.split("\t")
+            # dpkg status abbreviation: second letter "i" means installed (not just config files)
+            if len(parts) == 3 and parts[0] in results and parts[1][1:2] == "i":
+                results[parts[0]] = parts[2]
+        return results
 
     # update a specific package
     def upgrade(self, package: str) -> bool:
@@ -119,11 +480,9 @@ class PackageManager:
         }
         if self.manager:
             try:
-                full_cmd = self._get_privilege_command() + commands[self.manager]
-                subprocess.run(full_cmd, check=True)
-                return True
-            except subprocess.CalledProcessError:
-                return False
+                return self._run_checked(commands[self.manager])
+            finally:
+                self.state.refresh([package])
         return False
 
     # remove a package
@@ -137,11 +496,9 @@ class PackageManager:
         }
         if self.manager:
             try:
-                full_cmd = self._get_privilege_command() + commands[self.manager]
-                subprocess.run(full_cmd, check=True)
-                return True
-            except subprocess.CalledProcessError:
-                return False
+                return self._run_checked(commands[self.manager])
+            finally:
+                self.state.refresh([package])
         return False
 
     def cleanup(self, package: str) -> bool:
@@ -154,23 +511,21 @@ class PackageManager:
         }
         if self.manager:
             try:
-                full_cmd = self._get_privilege_command() + commands[self.manager]
-                subprocess.run(full_cmd, check=True)
-                return True
-            except subprocess.CalledProcessError:
-                return False
+                return self._run_checked(commands[self.manager])
+            finally:
+                # autoremove can take out any number of other packages
+                self.state.invalidate()
         return False
 
 
+_shared_manager = None
+_shared_lock = threading.Lock()
 
 
-
-
-
-
-
-
-
-
-
-
+# the process-wide PackageManager, so detection and the state cache happen once
+def get_package_manager() -> PackageManager:
+    global _shared_manager
+    with _shared_lock:
+        if _shared_manager is None:
+            _shared_manager = PackageManager()
+        return _shared_manager
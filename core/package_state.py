@@ -0,0 +1,158 @@
+# core/package_state.py
+import os
+import threading
+from types import MappingProxyType
+from typing import Callable, Mapping
+
+from core.package_db import (DATABASE_FOR_MANAGER, RPMDB_PATHS, InstalledPackage, read_installed,
+                             read_installed_entries)
+
+
+# the database directory and lock file whose mtimes tell us the installed set changed
+DB_WATCH_PATHS = {
+    "dpkg": ["/var/lib/dpkg", "/var/lib/dpkg/lock"],
+    "rpm": ["/var/lib/rpm", "/var/lib/rpm/.rpm.lock"] + RPMDB_PATHS,
+    "pacman": ["/var/lib/pacman/local", "/var/lib/pacman/db.lck"],
+}
+
+
+class InstalledStateCache:
+    """Caches installed-package snapshots until the package database changes.
+
+    The snapshot comes from the native database readers. When none can read
+    this system's database, answers from `fallback_query` are cached per
+    package instead. Both are dropped as soon as the mtime of the database
+    directory or lock file changes.
+    """
+
+    def __init__(self, manager: str, fallback_query: Callable[[list[str]], dict[str, str | None]]):
+        self.manager = manager
+        self.fallback_query = fallback_query
+        self.watch_paths = DB_WATCH_PATHS.get(DATABASE_FOR_MANAGER.get(manager, ""), [])
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._snapshot = None
+        self._native = True
+        self._entries = {}
+
+    def _current_stamp(self):
+        stamp = []
+        for path in self.watch_paths:
+            try:
+                stamp.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def _validate(self):
+        """Drop cached state if the database changed. Call with the lock held."""
+        stamp = self._current_stamp()
+        if stamp != self._stamp:
+            self._stamp = stamp
+            self._snapshot = None
+            self._native = True
+            self._entries = {}
+
+    def snapshot(self) -> Mapping[str, InstalledPackage] | None:
+        """The full installed-package map, or None when there's no native reader"""
+        with self._lock:
+            self._validate()
+            if self._snapshot is not None:
+                self.hits += 1
+                return self._snapshot
+            if not self._native:
+                return None
+            self.misses += 1
+            self._snapshot = read_installed(self.manager)
+            if self._snapshot is None:
+                self._native = False
+            return self._snapshot
+
+    def query(self, names: list[str]) -> dict[str, str | None]:
+        """Installed version (or None) for each name"""
+        snapshot = self.snapshot()
+        if snapshot is not None:
+            return {name: snapshot[name].version if name in snapshot else None for name in names}
+
+        with self._lock:
+            self._validate()
+            missing = [name for name in names if name not in self._entries]
+            self.hits += len(names) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            fetched = self.fallback_query(missing)
+            with self._lock:
+                self._entries.update(fetched)
+        with self._lock:
+            return {name: self._entries.get(name) for name in names}
+
+    def refresh(self, names: list[str]):
+        """Re-read only the entries an install/remove of `names` affected.
+
+        Starts from the named packages and follows the dependencies of every
+        entry that changed, before and after, so packages pulled in or taken
+        out with them are re-read too; an unchanged entry ends the walk. The
+        changes are patched into the current snapshot and the new database
+        mtimes accepted, so the rest stays cached. Without a native reader
+        there are no dependencies to follow and the cached answers are dropped.
+        """
+        stamp = self._current_stamp()
+        with self._lock:
+            self.refreshes += 1
+            snapshot, native = self._snapshot, self._native
+            if not native:
+                self._entries = {}
+                return
+        if snapshot is None:
+            # nothing cached yet, the next query reads it all
+            return
+
+        changed = {}
+        seen = set()
+        pending = list(dict.fromkeys(names))
+        while pending:
+            batch = [name for name in pending if name not in seen]
+            seen.update(batch)
+            pending = []
+            if not batch:
+                break
+            entries = read_installed_entries(self.manager, batch)
+            if entries is None:
+                self.invalidate()
+                return
+            for name, entry in entries.items():
+                previous = snapshot.get(name)
+                if entry == previous:
+                    continue
+                changed[name] = entry
+                for dependency in (entry.depends if entry else ()) + (previous.depends if previous else ()):
+                    if dependency not in seen:
+                        pending.append(dependency)
+
+        with self._lock:
+            if self._snapshot is not snapshot:
+                # reloaded meanwhile, which already includes the changes
+                return
+            packages = dict(snapshot)
+            for name, entry in changed.items():
+                if entry is None:
+                    packages.pop(name, None)
+                else:
+                    packages[name] = entry
+            self._snapshot = MappingProxyType(packages)
+            self._stamp = stamp
+
+    def invalidate(self):
+        """Forget everything, the next query reloads"""
+        with self._lock:
+            self._stamp = None
+            self._snapshot = None
+            self._native = True
+            self._entries = {}
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "refreshes": self.refreshes}
@@ -0,0 +1,472 @@
+# core/privileged_helper.py
+"""
+Long-lived privileged helper.
+
+The helper is started once per session through pkexec/sudo and then runs
+package operations sent to it over a Unix socket, so queued operations
+don't each need a new authentication. It only accepts a fixed set of
+package-manager commands with plain package names as arguments, and only
+from the user that started it.
+
+This file is also the helper's entry point and must not import from the
+rest of the project, since pkexec runs it as a standalone script:
+
+    pkexec python3 core/privileged_helper.py --uid UID [--fake]
+
+The helper creates its socket in a directory of its own and prints the
+socket's path as the first line on stdout. With --fake the helper runs unprivileged and only reports the commands it
+would run, for local testing.
+"""
+import argparse
+import json
+import os
+import pwd
+import re
+import select
+import shutil
+import socket
+import stat
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+# command prefixes the helper will run; everything after a prefix must be a package argument
+ALLOWED_COMMANDS = [
+    ("apt", "install", "-y"),
+    ("apt", "install", "--only-upgrade", "-y"),
+    ("apt", "remove", "-y"),
+    ("apt", "autoremove", "-y"),
+    ("apt", "update"),
+    ("yum", "install", "-y", "--downloadonly"),
+    ("yum", "install", "-y"),
+    ("yum", "update", "-y"),
+    ("yum", "remove", "-y"),
+    ("yum", "autoremove", "-y"),
+    ("yum", "check-update"),
+    ("dnf", "install", "-y", "--downloadonly"),
+    ("dnf", "install", "-y"),
+    ("dnf", "upgrade", "-y"),
+    ("dnf", "remove", "-y"),
+    ("dnf", "autoremove", "-y"),
+    ("dnf", "check-update"),
+    ("pacman", "-S", "--noconfirm", "--needed", "--asdeps"),
+    ("pacman", "-S", "--noconfirm", "--needed"),
+    ("pacman", "-S", "--noconfirm"),
+    ("pacman", "-Sy"),
+    ("pacman", "-R", "--noconfirm"),
+    ("pacman", "-Rns", "--noconfirm"),
+    ("pacman", "-U", "--noconfirm", "--asdeps"),
+    ("pacman", "-U", "--noconfirm"),
+    ("zypper", "install", "-y", "--download-only"),
+    ("zypper", "install", "-y"),
+    ("zypper", "update", "-y"),
+    ("zypper", "remove", "-y"),
+    ("zypper", "autoremove", "-y"),
+    ("zypper", "refresh"),
+]
+
+PACKAGE_NAME = re.compile(r"^[A-Za-z0-9@_+][A-Za-z0-9@._+:~-]*$")
+PACKAGE_FILE = re.compile(r"^/[^\0]+\.pkg\.tar(\.[a-z0-9]+)?$")
+
+# options allowed anywhere in a command. --parallel-downloads=N is ours: it is
+# turned into each package manager's own setting by expand_options(), so
+# callers never get to pass a configuration file of their choosing to a root process
+PARALLEL_DOWNLOADS_OPTION = re.compile(r"^--parallel-downloads=([1-9][0-9]?)$")
+# apt install only: copy the archives the application prefetched (see prefetch_dirs) into
+# apt's own cache first, so root apt never works in a directory the user controls
+IMPORT_ARCHIVES_OPTION = re.compile(r"^--import-prefetched$")
+# the directory of prefetched packages pacman looks in besides its own cache, likewise pinned
+EXTRA_CACHEDIR_OPTION = re.compile(r"^--extra-cachedir=(/[^\0]*/)$")
+# machine-readable progress: apt's status lines on stdout, zypper's XML output
+STATUS_OPTIONS = [re.compile(r"^-oAPT::Status-Fd=1$"), re.compile(r"^--xmlout$")]
+ALLOWED_OPTIONS = [PARALLEL_DOWNLOADS_OPTION, IMPORT_ARCHIVES_OPTION, EXTRA_CACHEDIR_OPTION] + STATUS_OPTIONS
+
+APT_SYSTEM_ARCHIVES_DIR = "/var/cache/apt/archives"
+# "htop_3.2.2-2_amd64.deb", epochs escaped as %3a
+DEB_FILE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9.+~%_-]*\.deb$")
+
+# upper bounds the package managers accept
+MAX_PARALLEL_DOWNLOADS = {"dnf": 20, "yum": 20}
+
+
+def prefetch_dirs(uid: int) -> dict[str, str]:
+    """The user's prefetch directories, as core.downloads lays them out under ~/.cache/dev_manager"""
+    cache_dir = os.path.join(pwd.getpwuid(uid).pw_dir, ".cache", "dev_manager")
+    return {"apt": os.path.join(cache_dir, "apt", "archives"), "pacman": os.path.join(cache_dir, "pacman", "pkg")}
+
+
+def validate_command(argv: list[str], uid: int) -> bool:
+    """Check a command against the allow-list"""
+    pinned_cache_dir = f"--extra-cachedir={prefetch_dirs(uid)['pacman']}/"
+    if any(EXTRA_CACHEDIR_OPTION.match(arg) and (argv[0] != "pacman" or arg != pinned_cache_dir) for arg in argv):
+        return False
+    if any(IMPORT_ARCHIVES_OPTION.match(arg) for arg in argv) and argv[:2] != ["apt", "install"]:
+        return False
+    argv = [arg for arg in argv if not any(option.match(arg) for option in ALLOWED_OPTIONS)]
+    for prefix in sorted(ALLOWED_COMMANDS, key=len, reverse=True):
+        if tuple(argv[:len(prefix)]) != prefix:
+            continue
+        args = argv[len(prefix):]
+        pattern = PACKAGE_FILE if prefix[:2] == ("pacman", "-U") else PACKAGE_NAME
+        return all(pattern.match(arg) and ".." not in arg for arg in args)
+    return False
+
+
+def import_archives(source: str, target: str = APT_SYSTEM_ARCHIVES_DIR) -> int:
+    """Copy prefetched .deb files into apt's cache; returns how many were copied.
+
+    Only regular files with plain archive names are taken, opened without
+    following symlinks. apt checks every cached archive's size and hash
+    against its index before using it and downloads it again on a mismatch.
+    """
+    try:
+        names = [name for name in os.listdir(source) if DEB_FILE.match(name)]
+    except OSError:
+        return 0
+    copied = 0
+    for name in names:
+        destination = os.path.join(target, name)
+        if os.path.exists(destination):
+            continue
+        try:
+            fd = os.open(os.path.join(source, name), os.O_RDONLY | os.O_NOFOLLOW | os.O_NONBLOCK)
+        except OSError:
+            continue
+        with os.fdopen(fd, "rb") as src:
+            if not stat.S_ISREG(os.fstat(fd).st_mode):
+                continue
+            temporary_fd, temporary = tempfile.mkstemp(dir=target, prefix=".import-")
+            try:
+                with os.fdopen(temporary_fd, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                os.chmod(temporary, 0o644)
+                os.replace(temporary, destination)
+                copied += 1
+            except OSError:
+                os.unlink(temporary)
+    return copied
+
+
+def _write_config(source: str, section: str, key: str, value, path: str) -> str:
+    """Copy an ini-style config with `key = value` set in `section`"""
+    try:
+        with open(source) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        lines = []
+    setting_pattern = re.compile(r"^\s*#?\s*%s\s*(=|$)" % re.escape(key))
+    output = []
+    current = None
+    found_section = False
+    for line in lines:
+        header = re.match(r"^\s*\[([^]]+)\]", line)
+        if header:
+            current = header.group(1)
+            output.append(line)
+            if current == section:
+                found_section = True
+                output.append(f"{key} = {value}")
+            continue
+        if current == section and setting_pattern.match(line):
+            continue
+        output.append(line)
+    if not found_section:
+        output = [f"[{section}]", f"{key} = {value}"] + output
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write("\n".join(output) + "\n")
+    return path
+
+
+def _config_values(source: str, section: str, key: str) -> list[str]:
+    """Every value of `key` in `section` of an ini-style config, split on whitespace"""
+    values = []
+    current = None
+    try:
+        with open(source) as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                header = re.match(r"^\[([^]]+)\]", line)
+                if header:
+                    current = header.group(1)
+                elif current == section and "=" in line:
+                    name, value = (part.strip() for part in line.split("=", 1))
+                    if name == key:
+                        values.extend(value.split())
+    except OSError:
+        pass
+    return values
+
+
+def expand_options(argv: list[str], config_dir: str) -> list[str]:
+    """Replace our pseudo-options with the package manager's own way of setting them.
+
+    --parallel-downloads=N: pacman gets a copy of /etc/pacman.conf with
+    ParallelDownloads set, dnf a --setopt, zypper a copy of zypp.conf
+    through ZYPP_CONF. apt has no per-host concurrency setting; its
+    archives are prefetched in parallel by the application instead, so the
+    option is just dropped.
+
+    --import-prefetched is handled by the helper before the command runs
+    (see import_archives) and just dropped here.
+
+    --extra-cachedir=DIR: pacman gets its configured cache directories
+    followed by DIR, so prefetched packages are found there while anything
+    still missing is downloaded to the usual place.
+    """
+    parallel = None
+    cache_dirs = []
+    rest = []
+    for arg in argv:
+        match = PARALLEL_DOWNLOADS_OPTION.match(arg)
+        cache_dir = EXTRA_CACHEDIR_OPTION.match(arg)
+        if match:
+            parallel = int(match.group(1))
+        elif IMPORT_ARCHIVES_OPTION.match(arg):
+            continue
+        elif cache_dir:
+            cache_dirs.append(cache_dir.group(1))
+        else:
+            rest.append(arg)
+    if not rest:
+        return rest
+
+    tool = rest[0]
+    if tool == "pacman" and cache_dirs:
+        system = _config_values("/etc/pacman.conf", "options", "CacheDir") or ["/var/cache/pacman/pkg/"]
+        rest = [tool] + [f"--cachedir={directory}" for directory in system + cache_dirs] + rest[1:]
+    if parallel is None:
+        return rest
+    if tool == "pacman":
+        config = _write_config("/etc/pacman.conf", "options", "ParallelDownloads", parallel,
+                               os.path.join(config_dir, f"pacman-{parallel}.conf"))
+        return [tool, f"--config={config}"] + rest[1:]
+    if tool in ("dnf", "yum"):
+        return rest + [f"--setopt=max_parallel_downloads={min(parallel, MAX_PARALLEL_DOWNLOADS[tool])}"]
+    if tool == "zypper":
+        config = _write_config("/etc/zypp/zypp.conf", "main", "download.max_concurrent_connections", parallel,
+                               os.path.join(config_dir, f"zypp-{parallel}.conf"))
+        # ZYPP_PCK_PRELOAD makes libzypp fetch all packages up front, in parallel
+        return ["env", f"ZYPP_CONF={config}", "ZYPP_PCK_PRELOAD=1"] + rest
+    return rest
+
+
+# ---------------------------------------------------------------- server side
+
+def _peer_uid(conn: socket.socket) -> int:
+    creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    _pid, uid, _gid = struct.unpack("3i", creds)
+    return uid
+
+
+def _send(conn, message: dict):
+    conn.sendall((json.dumps(message) + "\n").encode())
+
+
+def _handle_request(conn, request: dict, uid: int, fake: bool, config_dir: str):
+    argv = request.get("argv")
+    if not isinstance(argv, list) or not all(isinstance(a, str) for a in argv) or not validate_command(argv, uid):
+        _send(conn, {"type": "exit", "returncode": 126, "error": "operation not allowed"})
+        return
+    importing = any(IMPORT_ARCHIVES_OPTION.match(arg) for arg in argv)
+    argv = expand_options(argv, config_dir)
+
+    if fake:
+        _send(conn, {"type": "output", "line": "[fake] " + " ".join(argv)})
+        _send(conn, {"type": "exit", "returncode": 0})
+        return
+
+    if importing:
+        try:
+            import_archives(prefetch_dirs(uid)["apt"])
+        except OSError:
+            pass  # apt downloads whatever didn't make it
+    env = {"PATH": "/usr/sbin:/usr/bin:/sbin:/bin", "LANG": "C", "DEBIAN_FRONTEND": "noninteractive"}
+    try:
+        process = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   stdin=subprocess.DEVNULL, text=True, env=env)
+    except OSError as e:
+        # the same code a shell gives a command it can't find
+        _send(conn, {"type": "exit", "returncode": 127, "error": f"{argv[0]}: {e.strerror or e}"})
+        return
+    for line in process.stdout:
+        _send(conn, {"type": "output", "line": line.rstrip("\n")})
+    _send(conn, {"type": "exit", "returncode": process.wait()})
+
+
+def serve(uid: int, fake: bool = False):
+    """Accept requests until shutdown or until the parent closes our stdin"""
+    # the socket goes in a directory only the helper can write to, so nobody can
+    # swap its path for a symlink between bind() and chown(); others may only traverse it
+    socket_dir = tempfile.mkdtemp(prefix="dev_manager-helper-")
+    os.chmod(socket_dir, 0o711)
+    socket_path = os.path.join(socket_dir, "helper.sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask = os.umask(0o177)
+    try:
+        server.bind(socket_path)
+    finally:
+        os.umask(umask)
+    if not fake:
+        os.chown(socket_path, uid, -1, follow_symlinks=False)
+    server.listen(1)
+    # generated package-manager configs live where only the helper can write
+    config_dir = os.path.join(socket_dir, "config")
+    os.mkdir(config_dir, 0o700)
+    print(socket_path, flush=True)
+
+    try:
+        while True:
+            # stdin reaching EOF means the application that started us is gone
+            readable, _, _ = select.select([server, sys.stdin], [], [])
+            if sys.stdin in readable and not sys.stdin.buffer.read1(1):
+                return
+            if server not in readable:
+                continue
+            conn, _ = server.accept()
+            with conn:
+                if _peer_uid(conn) not in (uid, 0):
+                    continue
+                for raw in conn.makefile("rb"):
+                    try:
+                        request = json.loads(raw)
+                        kind = request.get("type")
+                    except (ValueError, AttributeError):
+                        _send(conn, {"type": "exit", "returncode": 126, "error": "malformed request"})
+                        continue
+                    if kind == "shutdown":
+                        return
+                    _handle_request(conn, request, uid, fake, config_dir)
+    finally:
+        server.close()
+        shutil.rmtree(socket_dir, ignore_errors=True)
+
+
+# ---------------------------------------------------------------- client side
+
+class PrivilegedHelper:
+    """Client for the privileged helper, one connection shared by all operations"""
+
+    START_TIMEOUT = 120  # leave time for the user to answer the password dialog
+
+    def __init__(self, privilege_command: list[str] | None = None, fake: bool = False):
+        self.privilege_command = privilege_command or []
+        self.fake = fake
+        self.process = None
+        self.conn = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return self.process is not None and self.process.poll() is None and self.conn is not None
+
+    def start(self) -> bool:
+        """Start the helper, asking for authorisation once"""
+        if self.is_running:
+            return True
+
+        cmd = [sys.executable, os.path.abspath(__file__), "--uid", str(os.getuid())]
+        if self.fake:
+            cmd.append("--fake")
+        else:
+            cmd = self.privilege_command + cmd
+
+        try:
+            self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        except OSError:
+            return False
+
+        socket_path = self._read_socket_path(time.monotonic() + self.START_TIMEOUT)
+        if socket_path:
+            try:
+                self.conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self.conn.connect(socket_path)
+                self._reader = self.conn.makefile("r")
+                return True
+            except OSError:
+                self.conn = None
+
+        self.stop()
+        return False
+
+    def _read_socket_path(self, deadline: float) -> str | None:
+        """The socket path the helper prints once it listens, None if it exits or times out first"""
+        fd = self.process.stdout.fileno()
+        data = b""
+        while b"\n" not in data:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            readable, _, _ = select.select([fd], [], [], remaining)
+            if not readable:
+                continue
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                return None
+            data += chunk
+        path = data.split(b"\n", 1)[0].decode(errors="replace")
+        return path if os.path.isabs(path) else None
+
+    def run(self, argv: list[str], on_output=None) -> subprocess.CompletedProcess:
+        """Run one allowed command through the helper and collect its output"""
+        with self._lock:
+            if not self.is_running:
+                raise ConnectionError("Privileged helper is not running")
+            _send(self.conn, {"type": "run", "argv": argv})
+            lines = []
+            returncode = None
+            for raw in self._reader:
+                message = json.loads(raw)
+                if message["type"] == "output":
+                    lines.append(message["line"])
+                    if on_output:
+                        on_output(message["line"])
+                elif message["type"] == "exit":
+                    returncode = message["returncode"]
+                    if message.get("error"):
+                        lines.append(message["error"])
+                    break
+            if returncode is None:
+                self.stop()
+                raise ConnectionError("Privileged helper exited unexpectedly")
+            output = "\n".join(lines) + ("\n" if lines else "")
+            return subprocess.CompletedProcess(argv, returncode, output, "")
+
+    def stop(self):
+        """Shut the helper down"""
+        if self.conn is not None:
+            try:
+                _send(self.conn, {"type": "shutdown"})
+                self.conn.close()
+            except OSError:
+                pass
+            self.conn = None
+        if self.process is not None:
+            if self.process.stdin:
+                self.process.stdin.close()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                pass
+            if self.process.stdout:
+                self.process.stdout.close()
+            self.process = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dev Manager privileged helper")
+    parser.add_argument("--uid", type=int, required=True)
+    parser.add_argument("--fake", action="store_true", help="don't run anything, only echo commands")
+    args = parser.parse_args()
+
+    if not args.fake and os.geteuid() != 0:
+        sys.exit("The privileged helper must run as root (or use --fake)")
+    serve(args.uid, args.fake)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+# core/progress.py
+import html
+import re
+import threading
+import time
+from typing import NamedTuple
+
+
+DOWNLOAD = "download"
+UNPACK = "unpack"
+CONFIGURE = "configure"
+
+# share of the overall progress bar each phase covers
+PHASE_RANGES = {DOWNLOAD: (0.0, 0.4), UNPACK: (0.4, 0.85), CONFIGURE: (0.85, 1.0)}
+PHASE_LABELS = {DOWNLOAD: "Downloading", UNPACK: "Installing", CONFIGURE: "Configuring"}
+
+# at most this many events per second reach the callback
+MAX_EVENT_RATE = 10
+
+# apt -oAPT::Status-Fd=1: "dlstatus:1:9.5:Retrieving file 1 of 3", "pmstatus:htop:40:Unpacking htop (amd64)"
+APT_STATUS = re.compile(r"^(?P<kind>dlstatus|pmstatus):(?P<package>[^:]*):(?P<percent>[\d.]+):(?P<message>.*)$")
+APT_CONFIGURE_WORDS = ("Configuring", "Setting up", "Running", "Installed", "Triggers")
+
+# pacman without a terminal: "Packages (3) a-1 b-2 c-3", "( 1/3) installing htop", "(2/5) Arming ConditionNeedsUpdate..."
+PACMAN_TOTAL = re.compile(r"^Packages \((\d+)\)")
+PACMAN_DOWNLOADING = re.compile(r"^\s*(\S+) downloading\.\.\.")
+PACMAN_STEP = re.compile(r"^\(\s*(\d+)/(\d+)\) (?P<action>\S+)\s*(?P<rest>.*)$")
+PACMAN_UNPACK_ACTIONS = ("installing", "upgrading", "reinstalling", "downgrading", "removing")
+PACMAN_HOOKS = ":: Running post-transaction hooks"
+
+# dnf/yum: "(1/3): htop-3.2.2-1.fc39.x86_64.rpm  1.2 MB/s | 300 kB  00:00", "  Installing  : htop-3.2.2-1.fc39.x86_64  1/3"
+DNF_DOWNLOAD = re.compile(r"^\((\d+)/(\d+)\): (\S+)")
+DNF_STEP = re.compile(r"^\s*(?P<action>[A-Z][a-z]+(?: [a-z]+)?)\s*: (?P<package>\S*)\s+(?P<current>\d+)/(?P<total>\d+)\s*$")
+DNF_UNPACK_ACTIONS = ("Preparing", "Installing", "Upgrading", "Reinstalling", "Downgrading",
+                      "Erasing", "Removing", "Cleanup", "Obsoleting", "Obsoleted")
+
+# zypper --xmlout: <progress id="..." name="(1/3) Installing: htop-3.2.2" value="40"/>, <download-progress ... percent="50"/>
+ZYPPER_ELEMENT = re.compile(r"^\s*<(?P<tag>progress|download-progress|download)\b(?P<attributes>[^>]*)/?>")
+ZYPPER_ATTRIBUTE = re.compile(r'([\w-]+)="([^"]*)"')
+ZYPPER_COUNTER = re.compile(r"^\((\d+)/(\d+)\)\s*(?P<action>[^:]+):?\s*(?P<package>\S*)")
+
+
+class ProgressEvent(NamedTuple):
+    """Where a running transaction is: its phase, the package at hand and overall progress"""
+    phase: str
+    fraction: float          # overall, 0.0 - 1.0
+    package: str = ""
+    current: int = 0         # package counter within the phase, when known
+    total: int = 0
+
+    def describe(self) -> str:
+        parts = [PHASE_LABELS[self.phase]]
+        if self.package:
+            parts.append(self.package)
+        if self.total:
+            parts.append(f"({self.current}/{self.total})")
+        return " ".join(parts)
+
+
+def _overall(phase: str, fraction: float) -> float:
+    start, end = PHASE_RANGES[phase]
+    return start + (end - start) * min(max(fraction, 0.0), 1.0)
+
+
+class TransactionProgress:
+    """Turns a package manager's output, one line at a time, into ProgressEvents.
+
+    Each manager is parsed from the output it gives a pipe: apt's status
+    file descriptor (see STATUS_OPTIONS), pacman's and dnf's counters and
+    zypper's XML. Overall progress never moves backwards, even when the
+    package manager's own counters restart for the next phase.
+    """
+
+    def __init__(self, manager: str):
+        self.manager = manager
+        self.fraction = 0.0
+        self.phase = DOWNLOAD
+        self.total = 0
+        self.downloaded = 0
+        self._parse = {
+            "apt": self._parse_apt,
+            "pacman": self._parse_pacman,
+            "dnf": self._parse_dnf,
+            "yum": self._parse_dnf,
+            "zypper": self._parse_zypper,
+        }.get(manager)
+
+    def feed(self, line: str) -> ProgressEvent | None:
+        """The event for one output line, None when the line says nothing about progress"""
+        if self._parse is None:
+            return None
+        parsed = self._parse(line.rstrip("\n"))
+        if parsed is None:
+            return None
+        phase, fraction, package, current, total = parsed
+        self.phase = phase
+        self.fraction = max(self.fraction, _overall(phase, fraction))
+        return ProgressEvent(phase, self.fraction, package, current, total)
+
+    def _parse_apt(self, line):
+        match = APT_STATUS.match(line)
+        if not match:
+            return None
+        percent = float(match["percent"]) / 100
+        if match["kind"] == "dlstatus":
+            return DOWNLOAD, percent, "", 0, 0
+        phase = CONFIGURE if match["message"].startswith(APT_CONFIGURE_WORDS) else UNPACK
+        # pmstatus is one percentage over unpacking and configuring together, spread it over both ranges
+        overall = PHASE_RANGES[UNPACK][0] + (1.0 - PHASE_RANGES[UNPACK][0]) * percent
+        start, end = PHASE_RANGES[phase]
+        return phase, (overall - start) / (end - start), match["package"], 0, 0
+
+    def _parse_pacman(self, line):
+        match = PACMAN_TOTAL.match(line)
+        if match:
+            self.total = int(match.group(1))
+            return None
+        match = PACMAN_DOWNLOADING.match(line)
+        if match:
+            self.downloaded += 1
+            total = max(self.total, self.downloaded)
+            return DOWNLOAD, (self.downloaded - 1) / total, match.group(1), self.downloaded, total
+        if line.startswith(PACMAN_HOOKS):
+            return CONFIGURE, 0.0, "", 0, 0
+        match = PACMAN_STEP.match(line)
+        if not match:
+            return None
+        current, total = int(match.group(1)), int(match.group(2))
+        action = match["action"]
+        if self.phase == CONFIGURE:
+            return CONFIGURE, current / total, f"{action} {match['rest']}".rstrip(". "), current, total
+        if action in PACMAN_UNPACK_ACTIONS:
+            return UNPACK, (current - 1) / total, match["rest"].split()[0] if match["rest"] else "", current, total
+        # checking keys, integrity, conflicts and disk space come before anything is unpacked
+        return UNPACK, 0.0, "", 0, 0
+
+    def _parse_dnf(self, line):
+        match = DNF_DOWNLOAD.match(line)
+        if match:
+            current, total = int(match.group(1)), int(match.group(2))
+            return DOWNLOAD, current / total, match.group(3), current, total
+        match = DNF_STEP.match(line)
+        if not match:
+            return None
+        current, total = int(match["current"]), int(match["total"])
+        if not match["package"]:
+            return UNPACK, 0.0, "", 0, 0
+        if match["action"] in DNF_UNPACK_ACTIONS:
+            return UNPACK, (current - 1) / total, match["package"], current, total
+        if match["action"] == "Running scriptlet":
+            # scriptlets run in between the packages being unpacked
+            return UNPACK, current / total, match["package"], current, total
+        # verification is a last pass over everything once it is in place
+        return CONFIGURE, current / total, match["package"], current, total
+
+    def _parse_zypper(self, line):
+        match = ZYPPER_ELEMENT.match(line)
+        if not match:
+            return None
+        attributes = {key: html.unescape(value) for key, value in ZYPPER_ATTRIBUTE.findall(match["attributes"])}
+        if match["tag"] != "progress":
+            percent = attributes.get("percent") or attributes.get("value")
+            if percent is None:
+                return None
+            return DOWNLOAD, float(percent) / 100, attributes.get("name", ""), 0, 0
+        counter = ZYPPER_COUNTER.match(attributes.get("name", ""))
+        if not counter:
+            return None
+        current, total = int(counter.group(1)), int(counter.group(2))
+        value = float(attributes.get("value") or (100 if attributes.get("done") == "1" else 0)) / 100
+        action = counter["action"].strip().lower()
+        phase = DOWNLOAD if action.startswith(("retrieving", "downloading")) else UNPACK
+        return phase, (current - 1 + value) / total, counter["package"], current, total
+
+
+# what each manager needs on its command line to report progress to a pipe;
+# the flag goes right after the program name
+STATUS_OPTIONS = {"apt": "-oAPT::Status-Fd=1", "zypper": "--xmlout"}
+
+
+def with_status_option(manager: str, cmd: list[str]) -> list[str]:
+    option = STATUS_OPTIONS.get(manager)
+    if option is None or not cmd:
+        return cmd
+    return cmd[:1] + [option] + cmd[1:]
+
+
+class ProgressThrottle:
+    """Passes events on at no more than `rate` per second.
+
+    An event is delivered right away when the phase changes; otherwise only
+    the newest event of each interval gets through. flush() delivers the
+    one still held back, so the last state is never lost.
+    """
+
+    def __init__(self, callback, rate: float = MAX_EVENT_RATE):
+        self.callback = callback
+        self.interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._last_sent = 0.0
+        self._last_phase = None
+        self._pending = None
+
+    def __call__(self, event: ProgressEvent):
+        now = time.monotonic()
+        with self._lock:
+            if event.phase == self._last_phase and now - self._last_sent < self.interval:
+                self._pending = event
+                return
+            self._pending = None
+            self._last_sent = now
+            self._last_phase = event.phase
+        self.callback(event)
+
+    def flush(self):
+        with self._lock:
+            event, self._pending = self._pending, None
+        if event is not None:
+            self.callback(event)
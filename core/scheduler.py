@@ -0,0 +1,425 @@
+# core/scheduler.py
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+
+
+QUERY = "query"        # read-only, runs on the shared query pool
+MUTATION = "mutation"  # changes the system, one at a time per backend
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+# AUR clones and makepkg runs queue here, apart from the pacman transactions they lead to
+AUR_BUILD_BACKEND = "aur-build"
+
+logger = logging.getLogger(__name__)
+
+# (scheduler, queue key) of the queue the current thread works for, unset off the workers
+_worker = threading.local()
+
+
+class OperationCancelled(Exception):
+    """Raised inside an operation's function to stop it early"""
+
+
+class Operation:
+    """One unit of work for the scheduler.
+
+    `fn` is called with the operation itself, so it can report progress
+    with set_progress(), register the subprocess it runs with
+    attach_process() (so cancelling kills it) and read `packages`, which
+    grows when later operations are merged into this one while it waits.
+
+    A mutation can also carry `prefetch(packages, cancelled)`, which fetches
+    what it will install without touching the system; the scheduler runs
+    it as soon as the operation is queued, so downloads overlap with the
+    transactions ahead of it.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, title: str, fn, kind: str = QUERY, backend: str | None = None,
+                 priority: int = PRIORITY_NORMAL, merge_key=None, packages=None, prefetch=None):
+        self.id = next(self._ids)
+        self.title = title
+        self.fn = fn
+        self.kind = kind
+        self.backend = backend
+        self.priority = priority
+        self.merge_key = merge_key    # queued mutations with the same key run as one
+        self.packages = list(packages or [])
+        self.merged = []              # titles of the operations folded into this one
+        self.prefetch = prefetch
+        self.prefetches = []          # download-ahead operations for this one's packages
+        self.status = QUEUED
+        self.progress = None          # 0.0 - 1.0, None while unknown
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._scheduler = None
+        self._cancel_event = threading.Event()
+        self._finished_event = threading.Event()
+        self._process = None
+        self._done_callbacks = []
+        self._progress_callbacks = []
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until the operation has ended; False if the timeout passed first"""
+        return self._finished_event.wait(timeout)
+
+    def add_done_callback(self, callback):
+        """Call callback(operation) when it ends; right away if it already has"""
+        if self.finished:
+            callback(self)
+        else:
+            self._done_callbacks.append(callback)
+
+    def add_progress_callback(self, callback):
+        self._progress_callbacks.append(callback)
+
+    def set_progress(self, fraction: float | None, message: str = ""):
+        self.progress = fraction
+        if message:
+            self.message = message
+        for callback in list(self._progress_callbacks):
+            # a broken listener mustn't take the operation down with it
+            try:
+                callback(self)
+            except Exception:
+                logger.exception("Progress callback of %r failed", self.title)
+        if self._scheduler:
+            self._scheduler._notify()
+
+    def attach_process(self, process):
+        """Remember the running subprocess so cancel() can kill it"""
+        self._process = process
+        if self.cancelled and process.poll() is None:
+            process.kill()
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise OperationCancelled()
+
+    def cancel(self):
+        if self._scheduler:
+            self._scheduler.cancel(self)
+        else:
+            self._cancel_event.set()
+
+
+class OperationScheduler:
+    """Runs every package-manager operation of the application.
+
+    Queries run concurrently on a small pool; mutations queue per backend
+    (the package manager whose lock they take) and run one at a time, so
+    two installs never fight over the dpkg/rpm/pacman lock and reads never
+    wait behind them. Queues are ordered by priority, then submission
+    order. A mutation submitted while another with the same `merge_key` is
+    still queued is folded into it: their packages go in one transaction.
+    """
+
+    def __init__(self, query_workers: int = 4, history: int = 50):
+        self.query_workers = query_workers
+        self._lock = threading.Condition()
+        self._seq = itertools.count()
+        self._queues = {}        # QUERY or backend -> heap of (priority, seq, operation)
+        self._threads = {}       # QUERY or backend -> worker threads
+        self._running = []
+        self._history = deque(maxlen=history)
+        self._listeners = []
+
+    # ------------------------------------------------------------ submitting
+
+    def submit(self, operation: Operation) -> Operation:
+        """Queue an operation; returns the operation that will actually run it"""
+        queue_key = QUERY if operation.kind == QUERY else operation.backend
+        with self._lock:
+            queue = self._queues.setdefault(queue_key, [])
+            target = None
+            if operation.kind == MUTATION and operation.merge_key is not None:
+                target = next((queued for _, _, queued in queue
+                               if queued.merge_key == operation.merge_key), None)
+            if target is not None:
+                added = [name for name in operation.packages if name not in target.packages]
+                self._merge(target, operation)
+                # the merged operation may have moved up in priority
+                queue[:] = [(op.priority, seq, op) for _, seq, op in queue]
+                heapq.heapify(queue)
+            else:
+                added = operation.packages
+                target = operation
+                operation._scheduler = self
+                heapq.heappush(queue, (operation.priority, next(self._seq), operation))
+                self._ensure_workers(queue_key)
+                self._lock.notify_all()
+        self._notify()
+        if target.prefetch and added:
+            self._submit_prefetch(target, list(added))
+        return target
+
+    def submit_query(self, title: str, fn, priority: int = PRIORITY_NORMAL) -> Operation:
+        return self.submit(Operation(title, fn, QUERY, priority=priority))
+
+    def submit_mutation(self, title: str, fn, backend: str, priority: int = PRIORITY_NORMAL,
+                        merge_key=None, packages=None, prefetch=None) -> Operation:
+        return self.submit(Operation(title, fn, MUTATION, backend, priority, merge_key, packages, prefetch))
+
+    def _submit_prefetch(self, operation: Operation, packages: list[str]):
+        """Download `packages` for a queued operation on its backend's download queue.
+
+        Downloads queue separately from the backend's transactions, one
+        batch at a time in the same priority order, so the next install's
+        archives arrive while the current one is still applying.
+        """
+        prefetch = operation.prefetch
+        download = Operation(f"Download ahead: {', '.join(packages)}",
+                             lambda op: _run_prefetch(op, prefetch, packages),
+                             MUTATION, f"{operation.backend}-download", operation.priority)
+        operation.prefetches.append(download)
+        self.submit(download)
+
+    def queued(self, backend: str) -> int:
+        """How many mutations are waiting on a backend"""
+        with self._lock:
+            return len(self._queues.get(backend, []))
+
+    @staticmethod
+    def _merge(queued: Operation, operation: Operation):
+        queued.packages.extend(name for name in operation.packages if name not in queued.packages)
+        queued.priority = min(queued.priority, operation.priority)
+        queued.merged.append(operation.title)
+
+    # ------------------------------------------------------------ cancelling
+
+    def cancel(self, operation: Operation):
+        """Drop a queued operation, or ask a running one to stop"""
+        operation._cancel_event.set()
+        with self._lock:
+            if operation.status != QUEUED:
+                process = operation._process
+            else:
+                process = None
+                queue_key = QUERY if operation.kind == QUERY else operation.backend
+                queue = self._queues.get(queue_key, [])
+                queue[:] = [item for item in queue if item[2] is not operation]
+                heapq.heapify(queue)
+        if operation.status == QUEUED:
+            self._finish(operation, CANCELLED)
+            for download in operation.prefetches:
+                self.cancel(download)
+        elif process is not None and process.poll() is None:
+            process.kill()
+
+    # ------------------------------------------------------------ queue view
+
+    def subscribe(self, listener):
+        """listener() is called from any thread whenever the queue changes"""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def snapshot(self) -> list[Operation]:
+        """Running operations, then queued ones in run order, then recently finished ones"""
+        with self._lock:
+            queued = sorted((item for queue in self._queues.values() for item in queue),
+                            key=lambda item: (item[0], item[1]))
+            return list(self._running) + [op for _, _, op in queued] + list(reversed(self._history))
+
+    def _notify(self):
+        for listener in list(self._listeners):
+            try:
+                listener()
+            except Exception:
+                pass
+
+    # ------------------------------------------------------------ running
+
+    def _ensure_workers(self, queue_key):
+        """Start the threads for a queue; call with the lock held"""
+        threads = self._threads.setdefault(queue_key, [])
+        wanted = self.query_workers if queue_key == QUERY else 1
+        while len(threads) < wanted:
+            thread = threading.Thread(target=self._work, args=(queue_key,), daemon=True,
+                                      name=f"scheduler-{queue_key}-{len(threads)}")
+            threads.append(thread)
+            thread.start()
+
+    def _work(self, queue_key):
+        _worker.queue = (self, queue_key)
+        queue = self._queues[queue_key]
+        while True:
+            with self._lock:
+                while not queue:
+                    self._lock.wait()
+                _, _, operation = heapq.heappop(queue)
+                operation.status = RUNNING
+                operation.started_at = time.time()
+                self._running.append(operation)
+            self._notify()
+            self._run(operation)
+
+    def _run(self, operation: Operation):
+        try:
+            operation.check_cancelled()
+            operation.result = operation.fn(operation)
+            status = CANCELLED if operation.cancelled else DONE
+        except OperationCancelled:
+            status = CANCELLED
+        except Exception as e:
+            operation.error = str(e)
+            status = FAILED
+        self._finish(operation, status)
+
+    def _finish(self, operation: Operation, status: str):
+        with self._lock:
+            operation.status = status
+            operation.finished_at = time.time()
+            if operation in self._running:
+                self._running.remove(operation)
+            self._history.append(operation)
+        operation._finished_event.set()
+        for callback in operation._done_callbacks:
+            try:
+                callback(operation)
+            except Exception:
+                logger.exception("Done callback of %r failed", operation.title)
+        operation._done_callbacks = []
+        self._notify()
+
+
+def _run_prefetch(operation: Operation, prefetch, packages: list[str]):
+    timing = prefetch(packages, cancelled=lambda: operation.cancelled)
+    operation.set_progress(1.0, timing.describe() if timing else "Already downloaded")
+    return timing
+
+
+def _run_transaction(operation: Operation, pm, method, **options) -> tuple[bool, list[str]]:
+    # the install should find its archives in the cache; let a download that is under way finish
+    for download in list(operation.prefetches):
+        if not download.finished:
+            operation.set_progress(None, "Waiting for downloads")
+        while not download.wait(0.5):
+            operation.check_cancelled()
+    # another program (unattended-upgrades, a terminal) may hold the package database; wait visibly
+    pm.wait_for_lock(on_wait=lambda holder: operation.set_progress(None, f"Waiting for {holder.describe()}"),
+                     cancelled=lambda: operation.cancelled)
+    operation.check_cancelled()
+    # packages is read only now, after every merge into the operation has happened
+    operation.set_progress(None, ", ".join(operation.packages))
+    result = method(operation.packages,
+                    on_progress=lambda event: operation.set_progress(event.fraction, event.describe()),
+                    **options)
+    operation.set_progress(1.0)
+    return result
+
+
+def _run_install(operation: Operation, pm) -> tuple[bool, list[str]]:
+    scheduler = operation._scheduler
+    try:
+        return _run_transaction(operation, pm, pm.install_many, keep_downloads=True,
+                                on_download=lambda timing: operation.set_progress(None, timing.describe()))
+    finally:
+        # prefetched archives are kept for the installs queued behind this one
+        if scheduler is None or not scheduler.queued(operation.backend):
+            pm.clear_downloads()
+
+
+def run_mutation(title: str, fn, backend: str | None = None, priority: int = PRIORITY_NORMAL):
+    """Run fn() as a mutation on a backend's queue (the system package manager's by default) and return its result.
+
+    For long jobs off the GUI thread that need a transaction part way
+    through, like an AUR build installing what it built: only that step
+    waits in, and holds, the backend's queue. Blocks until it has run;
+    whatever fn raises is raised here. Called from the backend's own worker
+    it just runs fn, which would otherwise wait on itself.
+    """
+    from core.package_manager import get_package_manager
+    backend = backend or get_package_manager().manager or "system"
+    scheduler = get_scheduler()
+    if getattr(_worker, "queue", None) == (scheduler, backend):
+        return fn()
+
+    outcome = {}
+
+    def run(operation):
+        try:
+            outcome["result"] = fn()
+        except Exception as e:
+            outcome["error"] = e
+            raise
+
+    operation = scheduler.submit_mutation(title, run, backend, priority)
+    operation.wait()
+    if "error" in outcome:
+        raise outcome["error"]
+    if operation.status != DONE:
+        raise OperationCancelled()
+    return outcome["result"]
+
+
+def submit_install(packages: list[str], title: str | None = None,
+                   priority: int = PRIORITY_NORMAL) -> Operation:
+    """Queue installing packages; merges with an install that is still waiting"""
+    from core.package_manager import PREFETCH_DIRS, get_package_manager
+    pm = get_package_manager()
+    return get_scheduler().submit_mutation(
+        title or f"Install {', '.join(packages)}",
+        lambda op: _run_install(op, pm),
+        backend=pm.manager or "system",
+        priority=priority,
+        merge_key=("install", pm.manager),
+        packages=packages,
+        prefetch=pm.prefetch if pm.manager in PREFETCH_DIRS else None,
+    )
+
+
+def submit_remove(packages: list[str], title: str | None = None,
+                  priority: int = PRIORITY_NORMAL) -> Operation:
+    """Queue removing packages; merges with a removal that is still waiting"""
+    from core.package_manager import get_package_manager
+    pm = get_package_manager()
+    return get_scheduler().submit_mutation(
+        title or f"Remove {', '.join(packages)}",
+        lambda op: _run_transaction(op, pm, pm.remove_many),
+        backend=pm.manager or "system",
+        priority=priority,
+        merge_key=("remove", pm.manager),
+        packages=packages,
+    )
+
+
+_shared_scheduler = None
+_shared_lock = threading.Lock()
+
+
+def get_scheduler() -> OperationScheduler:
+    """The process-wide operation scheduler"""
+    global _shared_scheduler
+    with _shared_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = OperationScheduler()
+        return _shared_scheduler
@@ -0,0 +1,49 @@
+# core/settings.py
+import json
+import os
+
+
+SETTINGS_FILE = os.path.expanduser("~/.config/dev_manager/settings.json")
+
+DEFAULT_SETTINGS = {
+    "theme": "Dark",
+    "auto_update_check": True,
+    "preload_pages": True,
+    "confirm_installations": True,
+    "confirm_removals": True,
+    "keep_logs_days": 30,
+    "default_helper": "yay",
+    "parallel_downloads": 5,
+    "lock_wait_timeout": 300,
+    "metadata_max_age_minutes": 60,
+    "show_aur_warnings": True,
+    "aur_build_profile": "default",
+    "aur_bin_substitution": "ask",
+    "log_level": "Info",
+    "custom_install_path": "",
+    "auto_clean_cache": False,
+    "persistent_privileges": False,
+}
+
+
+def load_settings(path: str = SETTINGS_FILE) -> dict:
+    """Load settings from file, filling in defaults for anything missing"""
+    settings = dict(DEFAULT_SETTINGS)
+    try:
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                settings.update(json.load(f))
+    except Exception:
+        pass
+    return settings
+
+
+def save_settings(settings: dict, path: str = SETTINGS_FILE) -> bool:
+    """Save settings to file"""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(settings, f, indent=2)
+        return True
+    except Exception:
+        return False
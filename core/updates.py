@@ -0,0 +1,320 @@
+# core/updates.py
+"""
+Available updates computed offline.
+
+Installed versions come from the local package database (core.package_db)
+and candidate versions from the repository metadata the last refresh left
+on disk, so counting updates needs no root, no network and no package
+manager process:
+
+    pacman        /var/lib/pacman/sync/*.db, in pacman.conf repository order
+    apt           /var/lib/apt/lists/*_Packages
+    dnf, zypper   repodata/*-primary.xml.* in their metadata caches
+    yum           *primary.sqlite* in its metadata cache
+
+Versions are ordered with core.versions.
+"""
+import bz2
+import glob
+import gzip
+import lzma
+import os
+import platform
+import re
+import sqlite3
+import tempfile
+from typing import NamedTuple
+
+from core.package_db import PACMAN_SYNC_DIR, read_installed, read_pacman_sync_db
+from core.versions import COMPARE_FOR_MANAGER
+
+
+PACMAN_CONF = "/etc/pacman.conf"
+APT_LISTS_DIR = "/var/lib/apt/lists"
+
+RPM_PRIMARY_FILES = {
+    "dnf": ["/var/cache/dnf/*/repodata/*primary.xml*", "/var/cache/libdnf5/*/repodata/*primary.xml*"],
+    "zypper": ["/var/cache/zypp/raw/*/repodata/*primary.xml*"],
+    "yum": ["/var/cache/yum/*/*/*/*primary.sqlite*", "/var/cache/yum/*/*/*/gen/primary_db.sqlite"],
+}
+
+# dpkg architecture names for the machine types Python reports
+DEB_ARCHITECTURES = {"x86_64": "amd64", "aarch64": "arm64", "i686": "i386", "i386": "i386",
+                     "armv7l": "armhf", "ppc64le": "ppc64el", "s390x": "s390x", "riscv64": "riscv64"}
+
+_APT_FIELD = re.compile(rb"^(Package|Version|Architecture): ?(.*)$", re.MULTILINE)
+_PRIMARY_PACKAGE = re.compile(
+    rb'<name>([^<]+)</name>\s*<arch>([^<]+)</arch>\s*'
+    rb'<version epoch="(\d*)" ver="([^"]*)" rel="([^"]*)"'
+)
+
+
+class AvailableUpdate(NamedTuple):
+    name: str
+    installed: str
+    available: str
+    repository: str
+
+
+def _read_compressed(path: str) -> bytes | None:
+    """The contents of a plain or gzip/xz/bzip2/zstd compressed file, None if it can't be read"""
+    try:
+        if path.endswith(".gz"):
+            with gzip.open(path) as f:
+                return f.read()
+        if path.endswith(".xz"):
+            with lzma.open(path) as f:
+                return f.read()
+        if path.endswith(".bz2"):
+            with bz2.open(path) as f:
+                return f.read()
+        if path.endswith(".zst"):
+            try:
+                from compression import zstd  # Python 3.14+
+            except ImportError:
+                return None
+            with zstd.open(path) as f:
+                return f.read()
+        if path.endswith((".zck", ".lz4")):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+    except (OSError, EOFError, lzma.LZMAError, ValueError):
+        return None
+
+
+def _newer(updates: dict, compare, repository: str, name: str, version: str):
+    """Keep the highest version seen for `name`"""
+    current = updates.get(name)
+    if current is None or compare(version, current[0]) > 0:
+        updates[name] = (version, repository)
+
+
+# ---------------------------------------------------------------- pacman
+
+def _pacman_config(path: str = PACMAN_CONF) -> tuple[list[str], set[str]]:
+    """Repository names in the order pacman searches them, and the IgnorePkg list"""
+    repositories, ignored = [], set()
+    section = None
+    try:
+        with open(path) as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                header = re.match(r"^\[([^]]+)\]$", line)
+                if header:
+                    section = header.group(1)
+                    if section != "options":
+                        repositories.append(section)
+                elif section == "options" and line.startswith("IgnorePkg") and "=" in line:
+                    ignored.update(line.split("=", 1)[1].split())
+    except OSError:
+        pass
+    return repositories, ignored
+
+
+def pacman_candidates(names: set[str], sync_dir: str = PACMAN_SYNC_DIR,
+                      conf: str = PACMAN_CONF) -> dict[str, tuple[str, str]] | None:
+    """name -> (version, repository) from the sync databases; the first repository with a package wins, as in pacman"""
+    repositories, ignored = _pacman_config(conf)
+    try:
+        available = {filename[:-3] for filename in os.listdir(sync_dir) if filename.endswith(".db")}
+    except OSError:
+        return None
+    if not available:
+        return None
+    # repositories missing from pacman.conf (or no pacman.conf) go last, alphabetically
+    order = [repo for repo in repositories if repo in available] + sorted(available - set(repositories))
+
+    candidates = {}
+    for repository in order:
+        packages = read_pacman_sync_db(os.path.join(sync_dir, f"{repository}.db"))
+        if packages is None:
+            return None
+        for name in names & packages.keys():
+            if name not in candidates and name not in ignored:
+                candidates[name] = (packages[name], repository)
+    return candidates
+
+
+# ---------------------------------------------------------------- apt
+
+def _apt_list_is_automatic(list_path: str) -> bool:
+    """False for suites like backports and experimental, which apt never upgrades to on its own"""
+    filename = os.path.basename(list_path)
+    if "_dists_" not in filename:
+        return True
+    prefix, rest = filename.split("_dists_", 1)
+    suite = rest.split("_", 1)[0]
+    for release_name in ("InRelease", "Release"):
+        try:
+            with open(os.path.join(os.path.dirname(list_path), f"{prefix}_dists_{suite}_{release_name}"),
+                      encoding="utf-8", errors="replace") as f:
+                header = f.read(64 * 1024)
+        except OSError:
+            continue
+        return "NotAutomatic: yes" not in header or "ButAutomaticUpgrades: yes" in header
+    return True
+
+
+def apt_candidates(names: set[str], lists_dir: str = APT_LISTS_DIR) -> dict[str, tuple[str, str]] | None:
+    """name -> (highest version, suite/component) from the downloaded Packages indexes.
+
+    apt's pin priorities aren't evaluated; suites that are not upgraded to
+    by default (NotAutomatic) are left out, which covers the common case.
+    """
+    arch = DEB_ARCHITECTURES.get(platform.machine(), platform.machine())
+    lists = [path for path in glob.glob(os.path.join(lists_dir, "*_Packages*"))
+             if not path.endswith(".diff_Index")]
+    if not lists:
+        return None
+
+    architectures = {arch.encode(), b"all"}
+    compare = COMPARE_FOR_MANAGER["apt"]
+    candidates = {}
+    for path in lists:
+        filename = os.path.basename(path)
+        if "_binary-" in filename and f"_binary-{arch}_" not in filename and "_binary-all_" not in filename:
+            continue
+        if not _apt_list_is_automatic(path):
+            continue
+        data = _read_compressed(path)
+        if data is None:
+            continue
+        fields = {}
+        for match in _APT_FIELD.finditer(data):
+            key = match.group(1)
+            if key == b"Package":
+                _add_apt_candidate(candidates, compare, filename, fields, names, architectures)
+                fields = {}
+            fields[key] = match.group(2).strip()
+        _add_apt_candidate(candidates, compare, filename, fields, names, architectures)
+    return candidates
+
+
+def _apt_repository(filename: str) -> str:
+    """suite/component for a list file, like bookworm-backports/main"""
+    if "_dists_" not in filename:
+        return filename.rsplit("_Packages", 1)[0]
+    parts = filename.split("_dists_", 1)[1].split("_")
+    return "/".join(parts[:2])
+
+
+def _add_apt_candidate(candidates, compare, filename, fields, names, architectures):
+    name = fields.get(b"Package", b"").decode()
+    if name not in names or fields.get(b"Architecture", b"all") not in architectures:
+        return
+    _newer(candidates, compare, _apt_repository(filename), name, fields.get(b"Version", b"").decode())
+
+
+# ---------------------------------------------------------------- rpm (dnf, yum, zypper)
+
+def _evr(epoch, version, release) -> str:
+    evr = f"{version}-{release}"
+    return f"{epoch}:{evr}" if epoch not in (None, "", "0", 0) else evr
+
+
+def _newest_per_repository(paths: list[str]) -> list[str]:
+    """Old primary files can linger next to the current one; keep the newest in each directory"""
+    newest = {}
+    for path in paths:
+        directory = os.path.dirname(path)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            continue
+        if directory not in newest or mtime > newest[directory][0]:
+            newest[directory] = (mtime, path)
+    return [path for _, path in newest.values()]
+
+
+def _repository_name(path: str) -> str:
+    directory = os.path.dirname(path)
+    if os.path.basename(directory) in ("repodata", "gen"):
+        directory = os.path.dirname(directory)
+    return os.path.basename(directory)
+
+
+def rpm_candidates(manager: str, names: set[str]) -> dict[str, tuple[str, str]] | None:
+    """name -> (highest version, repository) from the cached primary metadata of every repository"""
+    paths = _newest_per_repository([path for pattern in RPM_PRIMARY_FILES.get(manager, [])
+                                    for path in glob.glob(pattern)])
+    if not paths:
+        return None
+
+    machine = platform.machine()
+    architectures = {machine, "noarch"}
+    compare = COMPARE_FOR_MANAGER[manager]
+    candidates = {}
+    read_any = False
+    for path in paths:
+        repository = _repository_name(path)
+        if ".sqlite" in path:
+            rows = _read_primary_sqlite(path)
+        else:
+            data = _read_compressed(path)
+            rows = None if data is None else (
+                (match.group(1).decode(), match.group(2).decode(), match.group(3).decode(),
+                 match.group(4).decode(), match.group(5).decode())
+                for match in _PRIMARY_PACKAGE.finditer(data))
+        if rows is None:
+            continue
+        read_any = True
+        for name, arch, epoch, version, release in rows:
+            if name in names and arch in architectures:
+                _newer(candidates, compare, repository, name, _evr(epoch, version, release))
+    return candidates if read_any else None
+
+
+def _read_primary_sqlite(path: str) -> list[tuple] | None:
+    """Rows of yum's primary.sqlite, decompressing a .bz2 copy to a temporary file first"""
+    temporary = None
+    try:
+        if path.endswith(".bz2"):
+            data = _read_compressed(path)
+            if data is None:
+                return None
+            with tempfile.NamedTemporaryFile(suffix=".sqlite", delete=False) as f:
+                f.write(data)
+                temporary = path = f.name
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            return conn.execute("SELECT name, arch, epoch, version, release FROM packages").fetchall()
+        finally:
+            conn.close()
+    except (OSError, sqlite3.Error):
+        return None
+    finally:
+        if temporary:
+            os.unlink(temporary)
+
+
+# ---------------------------------------------------------------- all together
+
+def find_updates(manager: str) -> list[AvailableUpdate] | None:
+    """Installed packages with a newer version in the synced repository metadata.
+
+    Returns None when the local database or the metadata can't be read, so
+    callers can fall back to asking the package manager.
+    """
+    installed = read_installed(manager)
+    if installed is None or manager not in COMPARE_FOR_MANAGER:
+        return None
+
+    names = set(installed)
+    if manager == "pacman":
+        candidates = pacman_candidates(names)
+    elif manager == "apt":
+        candidates = apt_candidates(names)
+    else:
+        candidates = rpm_candidates(manager, names)
+    if candidates is None:
+        return None
+
+    compare = COMPARE_FOR_MANAGER[manager]
+    updates = []
+    for name, (version, repository) in sorted(candidates.items()):
+        current = installed[name].version
+        # nearly every package is already up to date, and equal strings need no real comparison
+        if version != current and compare(version, current) > 0:
+            updates.append(AvailableUpdate(name, current, version, repository))
+    return updates
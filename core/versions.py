@@ -0,0 +1,204 @@
+# core/versions.py
+"""
+Version ordering of the supported package managers, in pure Python.
+
+Each compare function returns a negative number, zero or a positive number
+when the first version is older than, equal to or newer than the second,
+like the C functions they follow: pacman's alpm_pkg_vercmp, rpm's
+rpmvercmp and dpkg's verrevcmp.
+"""
+import re
+
+
+_DIGITS = re.compile(r"\d+")
+_ALPHA = re.compile(r"[A-Za-z]+")
+
+
+def _split_evr(version: str) -> tuple[str, str, str | None]:
+    """epoch:version-release; epoch defaults to 0, release to None"""
+    epoch, colon, rest = version.partition(":")
+    if not colon or not epoch.isdigit():
+        epoch, rest = "0", version
+    rest, dash, release = rest.rpartition("-")
+    if not dash:
+        return epoch, release, None
+    return epoch, rest, release
+
+
+def _compare_numbers(a: str, b: str) -> int:
+    a, b = a.lstrip("0"), b.lstrip("0")
+    if len(a) != len(b):
+        return 1 if len(a) > len(b) else -1
+    return (a > b) - (a < b)
+
+
+def _segment(text: str, pos: int, numeric: bool) -> int:
+    match = (_DIGITS if numeric else _ALPHA).match(text, pos)
+    return match.end() if match else pos
+
+
+def alpm_rpmvercmp(a: str, b: str) -> int:
+    """pacman's rpmvercmp: like rpm's, but a trailing letter segment is older (1.0a < 1.0)"""
+    if a == b:
+        return 0
+    i = j = 0
+    prev_i = prev_j = 0
+    while i < len(a) and j < len(b):
+        while i < len(a) and not a[i].isalnum():
+            i += 1
+        while j < len(b) and not b[j].isalnum():
+            j += 1
+        if i >= len(a) or j >= len(b):
+            break
+        # different separator lengths decide on their own
+        if i - prev_i != j - prev_j:
+            return -1 if i - prev_i < j - prev_j else 1
+
+        numeric = a[i].isdigit()
+        end_i, end_j = _segment(a, i, numeric), _segment(b, j, numeric)
+        if end_j == j:
+            # numeric segments are newer than alpha ones
+            return 1 if numeric else -1
+        if numeric:
+            rc = _compare_numbers(a[i:end_i], b[j:end_j])
+        else:
+            rc = (a[i:end_i] > b[j:end_j]) - (a[i:end_i] < b[j:end_j])
+        if rc:
+            return rc
+        i, j = prev_i, prev_j = end_i, end_j
+
+    if i >= len(a) and j >= len(b):
+        return 0
+    # a remaining letter segment never beats the end of the string
+    if (i >= len(a) and not b[j].isalpha()) or (i < len(a) and a[i].isalpha()):
+        return -1
+    return 1
+
+
+def vercmp(a: str, b: str) -> int:
+    """pacman's version ordering of full epoch:pkgver-pkgrel strings (alpm_pkg_vercmp)"""
+    if a == b:
+        return 0
+    epoch_a, version_a, release_a = _split_evr(a)
+    epoch_b, version_b, release_b = _split_evr(b)
+    rc = alpm_rpmvercmp(epoch_a, epoch_b) or alpm_rpmvercmp(version_a, version_b)
+    if rc == 0 and release_a is not None and release_b is not None:
+        rc = alpm_rpmvercmp(release_a, release_b)
+    return rc
+
+
+def rpmvercmp(a: str, b: str) -> int:
+    """rpm's segment-wise comparison of one version or release string, with ~ and ^"""
+    if a == b:
+        return 0
+    i = j = 0
+    while i < len(a) or j < len(b):
+        while i < len(a) and not a[i].isalnum() and a[i] not in "~^":
+            i += 1
+        while j < len(b) and not b[j].isalnum() and b[j] not in "~^":
+            j += 1
+
+        # a tilde sorts before everything, even the end of the string
+        one = a[i] if i < len(a) else ""
+        two = b[j] if j < len(b) else ""
+        if one == "~" or two == "~":
+            if one != "~":
+                return 1
+            if two != "~":
+                return -1
+            i, j = i + 1, j + 1
+            continue
+        # a caret sorts after the end of the string but before anything else
+        if one == "^" or two == "^":
+            if not one:
+                return -1
+            if not two:
+                return 1
+            if one != "^":
+                return 1
+            if two != "^":
+                return -1
+            i, j = i + 1, j + 1
+            continue
+        if not (one and two):
+            break
+
+        numeric = one.isdigit()
+        end_i, end_j = _segment(a, i, numeric), _segment(b, j, numeric)
+        if end_i == i:
+            return -1
+        if end_j == j:
+            return 1 if numeric else -1
+        if numeric:
+            rc = _compare_numbers(a[i:end_i], b[j:end_j])
+        else:
+            rc = (a[i:end_i] > b[j:end_j]) - (a[i:end_i] < b[j:end_j])
+        if rc:
+            return rc
+        i, j = end_i, end_j
+
+    if i >= len(a) and j >= len(b):
+        return 0
+    return -1 if i >= len(a) else 1
+
+
+def rpm_evr_compare(a: str, b: str) -> int:
+    """Compare rpm [epoch:]version-release strings"""
+    if a == b:
+        return 0
+    epoch_a, version_a, release_a = _split_evr(a)
+    epoch_b, version_b, release_b = _split_evr(b)
+    rc = (int(epoch_a) > int(epoch_b)) - (int(epoch_a) < int(epoch_b))
+    return rc or rpmvercmp(version_a, version_b) or rpmvercmp(release_a or "", release_b or "")
+
+
+def _dpkg_order(char: str) -> int:
+    if not char or char.isdigit():
+        return 0
+    if char.isalpha():
+        return ord(char)
+    if char == "~":
+        return -1
+    return ord(char) + 256
+
+
+def _verrevcmp(a: str, b: str) -> int:
+    i = j = 0
+    while i < len(a) or j < len(b):
+        # the non-digit prefix, letter by letter, with ~ before everything
+        while (i < len(a) and not a[i].isdigit()) or (j < len(b) and not b[j].isdigit()):
+            ac = _dpkg_order(a[i] if i < len(a) else "")
+            bc = _dpkg_order(b[j] if j < len(b) else "")
+            if ac != bc:
+                return ac - bc
+            i, j = i + 1, j + 1
+        end_i, end_j = _segment(a, i, True), _segment(b, j, True)
+        rc = _compare_numbers(a[i:end_i] or "0", b[j:end_j] or "0")
+        if rc:
+            return rc
+        i, j = end_i, end_j
+    return 0
+
+
+def dpkg_compare(a: str, b: str) -> int:
+    """Debian version ordering of [epoch:]upstream[-revision] strings"""
+    if a == b:
+        return 0
+    epoch_a, upstream_a, revision_a = _split_evr(a)
+    epoch_b, upstream_b, revision_b = _split_evr(b)
+    rc = (int(epoch_a) > int(epoch_b)) - (int(epoch_a) < int(epoch_b))
+    return rc or _verrevcmp(upstream_a, upstream_b) or _verrevcmp(revision_a or "", revision_b or "")
+
+
+# which ordering each package manager uses
+COMPARE_FOR_MANAGER = {
+    "apt": dpkg_compare,
+    "pacman": vercmp,
+    "dnf": rpm_evr_compare,
+    "yum": rpm_evr_compare,
+    "zypper": rpm_evr_compare,
+}
+
+
+def compare_versions(manager: str, a: str, b: str) -> int:
+    return COMPARE_FOR_MANAGER[manager](a, b)
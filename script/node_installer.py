@@ -1,8 +1,8 @@
-from core.package_manager import PackageManager
+from core.package_manager import get_package_manager
 
 class NodeInstaller:
     def __init__(self):
-        self.pkg_manager = PackageManager()
+        self.pkg_manager = get_package_manager()
 
     def install(self):
         return self.pkg_manager.install("nodejs")
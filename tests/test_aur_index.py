@@ -0,0 +1,91 @@
+# tests/test_aur_index.py
+import gzip
+import json
+
+import pytest
+
+from core.aur_index import AURIndex
+
+
+RECORDS = [
+    {"Name": "yay", "PackageBase": "yay", "Version": "12.3.5-1", "Description": "Yet another yogurt",
+     "NumVotes": 2000, "Popularity": 10.0},
+    {"Name": "yay-bin", "PackageBase": "yay-bin", "Version": "12.3.5-1", "Description": "Yet another yogurt",
+     "NumVotes": 900, "Popularity": 5.0, "Provides": ["yay"]},
+    {"Name": "yay-git", "PackageBase": "yay-git", "Version": "12.3.5.r2-1", "Description": "Yet another yogurt",
+     "NumVotes": 100, "Popularity": 1.0, "Provides": ["yay"]},
+    {"Name": "aur-yay-wrapper", "Version": "0.1-1", "Description": "Wrapper script",
+     "NumVotes": 5, "Popularity": 50.0},
+    {"Name": "paru", "PackageBase": "paru", "Version": "2.0.4-1", "Description": "Feature packed AUR helper",
+     "Keywords": ["yay-alternative", "rust"], "NumVotes": 1500, "Popularity": 8.0},
+    {"Name": "libfoo-git", "PackageBase": "libfoo", "Version": "1.2-1", "Description": "Foo library",
+     "Provides": ["libfoo=1.2", "libfoo.so=1-64"], "Depends": ["glibc"], "MakeDepends": ["git", "cmake"],
+     "Popularity": 0.5},
+    {"Name": "visual-studio-code-bin", "Version": "1.90.0-1", "Description": "Editor",
+     "Provides": ["code"], "Popularity": 20.0},
+    {"Name": "code", "Version": "1.90.0-1", "Description": "Editor, built from source", "Popularity": 3.0},
+    {"Description": "a record without a name is skipped"},
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    dump = tmp_path / "packages-meta-ext-v1.json.gz"
+    with gzip.open(dump, "wt", encoding="utf-8") as f:
+        json.dump(RECORDS, f)
+    index = AURIndex(str(tmp_path / "aur" / "index.sqlite"))
+    assert not index.is_available()
+    assert index.ingest(str(dump)) == 8
+    return index
+
+
+def names(results):
+    return [result["name"] for result in results]
+
+
+def test_ingest_stores_records(index):
+    assert index.is_available()
+    assert index.info()["count"] == 8
+    record = index.get("LIBFOO-GIT")
+    assert record["base"] == "libfoo"
+    assert record["provides"] == "libfoo=1.2 libfoo.so=1-64"
+    assert record["makedepends"] == "git cmake"
+    assert index.get("aur-yay-wrapper")["base"] == "aur-yay-wrapper"
+    assert index.get("missing") is None
+
+
+def test_search_ranks_by_tier_then_popularity(index):
+    # exact, then prefixes, then substrings (more popular but a lower tier), then keyword matches
+    assert names(index.search("yay")) == ["yay", "yay-bin", "yay-git", "aur-yay-wrapper", "paru"]
+
+
+def test_search_matches_descriptions(index):
+    assert names(index.search("helper")) == ["paru"]
+    assert names(index.search("  feature PACKED ")) == ["paru"]
+
+
+def test_search_falls_back_to_fuzzy_names(index):
+    assert names(index.search("paruu")) == ["paru"]
+
+
+def test_search_treats_like_wildcards_literally(index):
+    assert index.search("%") == []
+    assert index.search("y_y") == []
+
+
+def test_search_limit_and_empty_query(index):
+    assert names(index.search("yay", limit=2)) == ["yay", "yay-bin"]
+    assert index.search("   ") == []
+
+
+def test_find_provider(index):
+    assert index.find_provider("yay")["name"] == "yay"
+    assert index.find_provider("libfoo")["name"] == "libfoo-git"
+    assert index.find_provider("libfoo.so")["name"] == "libfoo-git"
+    assert index.find_provider("libbar") is None
+
+
+def test_find_binary_variant(index):
+    assert index.find_binary_variant("yay")["name"] == "yay-bin"
+    assert index.find_binary_variant("code")["name"] == "visual-studio-code-bin"
+    assert index.find_binary_variant("paru") is None
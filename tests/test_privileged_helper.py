@@ -0,0 +1,110 @@
+# tests/test_privileged_helper.py
+import os
+
+import pytest
+
+from core import privileged_helper as helper
+
+
+UID = os.getuid()
+PINNED_CACHE_DIR = f"--extra-cachedir={helper.prefetch_dirs(UID)['pacman']}/"
+
+
+@pytest.mark.parametrize("argv", [
+    ["pacman", "-S", "--noconfirm", "vim"],
+    ["pacman", "-S", "--noconfirm", "--needed", "--asdeps", "glibc", "lib32-gcc-libs"],
+    ["pacman", "-U", "--noconfirm", "/home/user/.cache/yay/foo/foo-1.0-1-x86_64.pkg.tar.zst"],
+    ["apt", "install", "-y", "python3.12", "libstdc++6:amd64"],
+    ["apt", "install", "-y", "--import-prefetched", "git"],
+    ["apt", "update"],
+    ["dnf", "install", "-y", "--parallel-downloads=10", "gcc-c++"],
+    ["dnf", "install", "-y", "--xmlout", "gcc"],
+    ["apt", "install", "-y", "-oAPT::Status-Fd=1", "git"],
+    ["pacman", "-S", "--noconfirm", PINNED_CACHE_DIR, "--parallel-downloads=5", "git"],
+])
+def test_validate_command_accepts_allowed_commands(argv):
+    assert helper.validate_command(argv, UID)
+
+
+@pytest.mark.parametrize("argv", [
+    [],
+    ["rm", "-rf", "/"],
+    ["pacman", "-Syu"],
+    ["apt", "install", "git"],
+    # options smuggled in where package names belong
+    ["pacman", "-S", "--noconfirm", "--config=/tmp/pacman.conf", "vim"],
+    ["apt", "install", "-y", "-oDir::Cache=/tmp", "git"],
+    ["apt", "install", "-y", "../../etc/passwd"],
+    # pacman -U takes package files only, and none outside a plain path
+    ["pacman", "-U", "--noconfirm", "vim"],
+    ["pacman", "-U", "--noconfirm", "/tmp/../etc/evil.pkg.tar.zst"],
+    ["pacman", "-U", "--noconfirm", "relative.pkg.tar.zst"],
+    # pseudo-options out of range or on the wrong command
+    ["dnf", "install", "-y", "--parallel-downloads=0", "gcc"],
+    ["dnf", "install", "-y", "--parallel-downloads=100", "gcc"],
+    ["pacman", "-S", "--noconfirm", "--import-prefetched", "git"],
+    ["apt", "remove", "-y", "--import-prefetched", "git"],
+    ["pacman", "-S", "--noconfirm", "--extra-cachedir=/tmp/", "git"],
+    ["apt", "install", "-y", PINNED_CACHE_DIR, "git"],
+])
+def test_validate_command_rejects_everything_else(argv):
+    assert not helper.validate_command(argv, UID)
+
+
+def test_expand_options_drops_what_apt_has_no_setting_for(tmp_path):
+    argv = ["apt", "install", "-y", "--parallel-downloads=8", "--import-prefetched", "git"]
+    assert helper.expand_options(argv, str(tmp_path)) == ["apt", "install", "-y", "git"]
+
+
+def test_expand_options_caps_dnf_parallel_downloads(tmp_path):
+    assert helper.expand_options(["dnf", "install", "-y", "--parallel-downloads=50", "gcc"], str(tmp_path)) == [
+        "dnf", "install", "-y", "gcc", "--setopt=max_parallel_downloads=20"
+    ]
+
+
+def test_expand_options_writes_a_pacman_config(tmp_path, monkeypatch):
+    source = tmp_path / "pacman.conf"
+    source.write_text("[options]\n#ParallelDownloads = 5\nCheckSpace\n\n[core]\nInclude = /etc/pacman.d/mirrorlist\n")
+    real_write_config = helper._write_config
+    monkeypatch.setattr(helper, "_write_config",
+                        lambda _source, *args: real_write_config(str(source), *args))
+
+    argv = helper.expand_options(["pacman", "-S", "--noconfirm", "--parallel-downloads=4", "git"], str(tmp_path))
+
+    config = tmp_path / "pacman-4.conf"
+    assert argv == ["pacman", f"--config={config}", "-S", "--noconfirm", "git"]
+    assert config.read_text().splitlines() == [
+        "[options]", "ParallelDownloads = 4", "CheckSpace", "", "[core]", "Include = /etc/pacman.d/mirrorlist"
+    ]
+
+
+def test_expand_options_puts_the_extra_cachedir_after_the_configured_ones(tmp_path, monkeypatch):
+    monkeypatch.setattr(helper, "_config_values", lambda *args: ["/var/cache/pacman/pkg/"])
+    argv = helper.expand_options(["pacman", "-S", "--noconfirm", "--extra-cachedir=/home/u/pkg/", "git"],
+                                 str(tmp_path))
+    assert argv == ["pacman", "--cachedir=/var/cache/pacman/pkg/", "--cachedir=/home/u/pkg/",
+                    "-S", "--noconfirm", "git"]
+
+
+def test_expand_options_points_zypper_at_its_own_config(tmp_path):
+    argv = helper.expand_options(["zypper", "install", "-y", "--parallel-downloads=6", "gcc"], str(tmp_path))
+    assert argv == ["env", f"ZYPP_CONF={tmp_path / 'zypp-6.conf'}", "ZYPP_PCK_PRELOAD=1",
+                    "zypper", "install", "-y", "gcc"]
+    assert "download.max_concurrent_connections = 6" in (tmp_path / "zypp-6.conf").read_text()
+
+
+def test_import_archives_copies_only_regular_deb_files(tmp_path):
+    source, target = tmp_path / "prefetched", tmp_path / "archives"
+    source.mkdir()
+    target.mkdir()
+    (source / "git_1%3a2.43.0-1_amd64.deb").write_bytes(b"deb")
+    (source / "notes.txt").write_text("not an archive")
+    (tmp_path / "secret").write_text("root only")
+    (source / "evil_1.0_amd64.deb").symlink_to(tmp_path / "secret")
+    (source / "present_1.0_all.deb").write_bytes(b"new")
+    (target / "present_1.0_all.deb").write_bytes(b"old")
+
+    assert helper.import_archives(str(source), str(target)) == 1
+    assert sorted(os.listdir(target)) == ["git_1%3a2.43.0-1_amd64.deb", "present_1.0_all.deb"]
+    assert (target / "present_1.0_all.deb").read_bytes() == b"old"
+    assert os.stat(target / "git_1%3a2.43.0-1_amd64.deb").st_mode & 0o777 == 0o644
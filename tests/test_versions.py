@@ -0,0 +1,83 @@
+# tests/test_versions.py
+import pytest
+
+from core.versions import compare_versions, dpkg_compare, rpm_evr_compare, rpmvercmp, vercmp
+
+
+def sign(number: int) -> int:
+    return (number > 0) - (number < 0)
+
+
+@pytest.mark.parametrize("a, b, expected", [
+    ("1.5.0", "1.5.0", 0),
+    ("1.5.1", "1.5.0", 1),
+    ("1.5", "1.5.1", -1),
+    ("2.30", "2.4", 1),
+    # pre-release letters sort before the release
+    ("1.5b", "1.5", -1),
+    ("1.0a", "1.0alpha", -1),
+    ("1.0alpha", "1.0b", -1),
+    ("1.0rc", "1.0", -1),
+    # pkgrel only counts when both sides have one
+    ("1.5-1", "1.5-2", -1),
+    ("1.5.1-1", "1.5.1", 0),
+    # epoch beats everything
+    ("1:1.0", "2.0", 1),
+    ("0:1.0", "1.0", 0),
+])
+def test_vercmp(a, b, expected):
+    assert sign(vercmp(a, b)) == expected
+    assert sign(vercmp(b, a)) == -expected
+
+
+@pytest.mark.parametrize("a, b, expected", [
+    ("1.0", "1.0", 0),
+    ("1.0", "1.0.0", -1),
+    ("1.0a", "1.0", 1),
+    ("1.a", "1.1", -1),
+    ("1.0~rc1", "1.0", -1),
+    ("1.0~rc1", "1.0~rc2", -1),
+    ("1.0^git1", "1.0", 1),
+    ("1.0^git1", "1.0.1", -1),
+    ("1.0^git1", "1.0~rc1", 1),
+    ("1_0", "1.0", 0),
+])
+def test_rpmvercmp(a, b, expected):
+    assert sign(rpmvercmp(a, b)) == expected
+    assert sign(rpmvercmp(b, a)) == -expected
+
+
+@pytest.mark.parametrize("a, b, expected", [
+    ("2:1.0-1", "1:9.0-1", 1),
+    ("1.0-1", "1.0-2", -1),
+    ("1.0-1.fc40", "1.0-1.fc39", 1),
+])
+def test_rpm_evr_compare(a, b, expected):
+    assert sign(rpm_evr_compare(a, b)) == expected
+    assert sign(rpm_evr_compare(b, a)) == -expected
+
+
+@pytest.mark.parametrize("a, b, expected", [
+    ("1.0", "1.0", 0),
+    ("1:0.1", "2.0", 1),
+    ("1.0-1", "1.0-2", -1),
+    ("2.30", "2.4", 1),
+    ("1.0", "1.0+b1", -1),
+    # ~ sorts before everything, even the end of the string
+    ("1.0~rc1", "1.0", -1),
+    ("1.0~~", "1.0~", -1),
+    # letters sort before other characters
+    ("1.0a", "1.0", 1),
+    ("1.0a", "1.0.1", -1),
+    ("2.43.0-1ubuntu7", "2.43.0-1ubuntu7.1", -1),
+])
+def test_dpkg_compare(a, b, expected):
+    assert sign(dpkg_compare(a, b)) == expected
+    assert sign(dpkg_compare(b, a)) == -expected
+
+
+def test_compare_versions_uses_the_managers_ordering():
+    # 1.0a is a pre-release to pacman but newer than 1.0 to dpkg and rpm
+    assert compare_versions("pacman", "1.0a", "1.0") < 0
+    assert compare_versions("apt", "1.0a", "1.0") > 0
+    assert compare_versions("dnf", "1.0a", "1.0") > 0